@@ -1,12 +1,23 @@
 # app/dashboard.py
 
 import os
+import sys
+from pathlib import Path
 import pandas as pd
 import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Streamlit runs this file directly; make the project root importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.aqi_converter import pm25_to_aqi
+from src.storage.connection import get_client
+from src.storage.timeseries import TIMESERIES_DB, FORECAST_TS, OBSERVATION_TS, FORECAST_DAILY, OBSERVATION_DAILY
+from app.queries import (
+    cache_window, fetch_current, fetch_forecast_series, fetch_stored_history, fetch_latest, flatten_forecast
+)
 
 load_dotenv()
 
@@ -29,36 +40,58 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # MongoDB
-MONGODB_URI = os.getenv("MONGODB_URI")
 PREDICTION_DB = os.getenv("MONGODB_PREDICTION_DB", "aqi_db")
-PREDICTION_COLLECTION = os.getenv("MONGODB_PREDICTION_COLLECTION", "predictions")
 FEATURE_DB = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
 FEATURE_COLLECTION = os.getenv("MONGODB_FEATURE_COLLECTION", "aqi_features")
+LATEST_COLLECTION = os.getenv("MONGODB_LATEST_COLLECTION", "latest_forecast")
+CITY = os.getenv("DASHBOARD_CITY", "Karachi")
+
+MONGO_POOL_SIZE = int(os.getenv("DASHBOARD_MONGO_POOL_SIZE", "20"))
+
+def get_mongo_client():
+    """The process-wide pooled client, shared by every session and rerun"""
+    return get_client(pool_size=MONGO_POOL_SIZE, server_selection_timeout_ms=5000)
+
+# Results are keyed by the prediction cycle, so viewers share one query per
+# hour; the TTL only bounds staleness if the job skips a run
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_latest(window, city):
+    client = get_mongo_client()
+    return fetch_latest(client[PREDICTION_DB][LATEST_COLLECTION], city)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_current(window):
+    client = get_mongo_client()
+    return fetch_current(client[FEATURE_DB][FEATURE_COLLECTION])
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_forecasts(window, limit=48):
+    client = get_mongo_client()
+    return fetch_forecast_series(client[TIMESERIES_DB][FORECAST_TS], CITY, limit=limit)
+
+# Long-range history: (raw time-series collection, daily rollups, value field, horizon) per series
+HISTORY_SERIES = {
+    "Observed PM2.5": (OBSERVATION_TS, OBSERVATION_DAILY, "pm2_5", None),
+    "Forecast PM2.5 (tomorrow)": (FORECAST_TS, FORECAST_DAILY, "pm25_prediction", "t_plus_1"),
+}
+HISTORY_RANGES = {"7 days": 7, "30 days": 30, "90 days": 90, "1 year": 365, "3 years": 3 * 365}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_history(window, series, days):
+    raw, daily, field, horizon = HISTORY_SERIES[series]
+    db = get_mongo_client()[TIMESERIES_DB]
+    end = datetime.utcnow()
+    return fetch_stored_history(db[raw], db[daily], field, end - timedelta(days=days), end, CITY, horizon)
 
 try:
-    client = MongoClient(MONGODB_URI, tlsInsecure=True, serverSelectionTimeoutMS=5000)
-    prediction_collection = client[PREDICTION_DB][PREDICTION_COLLECTION]
-    feature_collection = client[FEATURE_DB][FEATURE_COLLECTION]
+    get_mongo_client()
 except Exception as e:
     st.error(f"❌ Database connection failed: {e}")
     st.stop()
 
-# AQI Functions
-def pm25_to_aqi(pm25):
-    """Convert PM2.5 to AQI"""
-    if pm25 <= 12.0:
-        return int((50 - 0) / (12.0 - 0.0) * (pm25 - 0.0) + 0)
-    elif pm25 <= 35.4:
-        return int((100 - 51) / (35.4 - 12.1) * (pm25 - 12.1) + 51)
-    elif pm25 <= 55.4:
-        return int((150 - 101) / (55.4 - 35.5) * (pm25 - 35.5) + 101)
-    elif pm25 <= 150.4:
-        return int((200 - 151) / (150.4 - 55.5) * (pm25 - 55.5) + 151)
-    elif pm25 <= 250.4:
-        return int((300 - 201) / (250.4 - 150.5) * (pm25 - 150.5) + 201)
-    else:
-        return int((500 - 301) / (500.4 - 250.5) * (pm25 - 250.5) + 301)
+window = cache_window()
 
+# AQI Functions
 def get_aqi_color(aqi):
     """Get color for AQI level"""
     if aqi <= 50: return "#00e400"
@@ -87,43 +120,43 @@ def get_health_message(aqi):
 st.title("🌫️ Karachi AQI 3-Day Forecast")
 st.caption("Real-time Air Quality Predictions | Updated Hourly")
 
-# Load current AQI
-try:
-    current_data = list(feature_collection.find().sort("timestamp", -1).limit(1))
-    if current_data:
-        current_aqi = current_data[0].get('aqi', 0)
-        current_pm25 = current_data[0].get('pm2_5', 0)
-        current_time = current_data[0].get('timestamp', datetime.utcnow())
-    else:
+# Headline: the materialized latest_forecast document (one _id lookup)
+latest_doc = load_latest(window, CITY)
+
+if latest_doc:
+    current_aqi = latest_doc.get('current', {}).get('aqi', 0)
+    current_pm25 = latest_doc.get('current', {}).get('pm2_5', 0)
+    current_time = latest_doc.get('observation_time', datetime.utcnow())
+else:
+    # Fallback until the inference job has written latest_forecast
+    try:
+        current_data = load_current(window)
+        if current_data:
+            current_aqi = current_data.get('aqi', 0)
+            current_pm25 = current_data.get('pm2_5', 0)
+            current_time = current_data.get('timestamp', datetime.utcnow())
+        else:
+            current_aqi = 0
+            current_pm25 = 0
+            current_time = datetime.utcnow()
+    except:
         current_aqi = 0
         current_pm25 = 0
         current_time = datetime.utcnow()
-except:
-    current_aqi = 0
-    current_pm25 = 0
-    current_time = datetime.utcnow()
 
-# Load predictions
-data = list(prediction_collection.find().sort("timestamp", -1).limit(48))
+# Load predictions (trend chart)
+df = load_forecasts(window)
 
-if not data:
+if df.empty and not latest_doc:
     st.warning("⚠️ No forecast data available yet. Please check back soon.")
     st.info("💡 The system generates predictions automatically. First predictions may take a few hours.")
     st.stop()
 
-df = pd.json_normalize(data)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
-df = df.sort_values("timestamp")
-
-# Extract forecasts
-df["t1_pm25"] = df["forecasts.t_plus_1.pm25_prediction"]
-df["t2_pm25"] = df["forecasts.t_plus_2.pm25_prediction"]
-df["t3_pm25"] = df["forecasts.t_plus_3.pm25_prediction"]
-df["t1_label"] = df["forecasts.t_plus_1.aqi_category_label"]
-df["t2_label"] = df["forecasts.t_plus_2.aqi_category_label"]
-df["t3_label"] = df["forecasts.t_plus_3.aqi_category_label"]
-
-latest = df.iloc[-1]
+if latest_doc:
+    latest = flatten_forecast(latest_doc)
+    latest["timestamp"] = pd.to_datetime(latest["timestamp"])
+else:
+    latest = df.iloc[-1]
 
 # Current AQI Banner
 current_aqi_color = get_aqi_color(current_aqi)
@@ -193,11 +226,11 @@ st.divider()
 st.subheader("📈 AQI Forecast Trend")
 
 df["t1_pm25"] = df["t1_pm25"].fillna(0)
-df["t1_aqi"] = df["t1_pm25"].apply(pm25_to_aqi)
 df["t2_pm25"] = df["t2_pm25"].fillna(0)
-df["t2_aqi"] = df["t2_pm25"].apply(pm25_to_aqi)
 df["t3_pm25"] = df["t3_pm25"].fillna(0)
-df["t3_aqi"] = df["t3_pm25"].apply(pm25_to_aqi)
+df["t1_aqi"] = pm25_to_aqi(df["t1_pm25"])
+df["t2_aqi"] = pm25_to_aqi(df["t2_pm25"])
+df["t3_aqi"] = pm25_to_aqi(df["t3_pm25"])
 
 fig = go.Figure()
 
@@ -240,6 +273,43 @@ fig.update_layout(
 
 st.plotly_chart(fig, use_container_width=True)
 
+# Long-range history (aggregated server-side, downsampled before plotting)
+st.subheader("📜 History")
+
+hist_col1, hist_col2 = st.columns([1, 2])
+with hist_col1:
+    series = st.selectbox("Series", list(HISTORY_SERIES))
+with hist_col2:
+    range_label = st.radio("Range", list(HISTORY_RANGES), index=1, horizontal=True)
+
+history, unit = load_history(window, series, HISTORY_RANGES[range_label])
+bucket = {"hour": "hourly", "day": "daily"}[unit]
+
+if history.empty:
+    st.info("No history for this range yet.")
+else:
+    hist_fig = go.Figure()
+    hist_fig.add_trace(go.Scatter(
+        x=history["timestamp"], y=history["max"], mode="lines",
+        line=dict(width=0), showlegend=False, hoverinfo="skip"
+    ))
+    hist_fig.add_trace(go.Scatter(
+        x=history["timestamp"], y=history["min"], mode="lines",
+        line=dict(width=0), fill="tonexty", fillcolor="rgba(59,130,246,0.2)",
+        name=f"{bucket} min–max"
+    ))
+    hist_fig.add_trace(go.Scatter(
+        x=history["timestamp"], y=history["mean"], mode="lines",
+        line=dict(color="#3b82f6", width=2), name=f"{bucket} mean"
+    ))
+    hist_fig.update_layout(
+        xaxis_title="Date", yaxis_title="PM2.5 (µg/m³)", hovermode="x unified",
+        height=400, plot_bgcolor="white", paper_bgcolor="white",
+        font=dict(family="Arial", size=12)
+    )
+    st.plotly_chart(hist_fig, use_container_width=True)
+    st.caption(f"{len(history)} {bucket} points")
+
 # AQI Reference
 with st.expander("ℹ️ Understanding AQI Levels"):
     st.markdown("""
@@ -0,0 +1,162 @@
+# app/queries.py
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.utils.downsample import lttb
+
+HORIZONS = ["t_plus_1", "t_plus_2", "t_plus_3"]
+
+# The hourly job is scheduled on the hour but usually lands a few minutes later
+REFRESH_OFFSET_MINUTES = int(os.getenv("DASHBOARD_REFRESH_OFFSET_MINUTES", "15"))
+
+# Only what the page renders: no full rows, no json_normalize
+FORECAST_PROJECTION = {"_id": 0, "timestamp": 1, "meta.horizon": 1, "pm25_prediction": 1, "aqi_category_label": 1}
+CURRENT_PROJECTION = {"_id": 0, "timestamp": 1, "aqi": 1, "pm2_5": 1}
+
+def cache_window(now=None, offset_minutes=REFRESH_OFFSET_MINUTES):
+    """
+    Start of the current prediction cycle. Cached queries take this as an
+    argument, so every viewer shares one result per cycle and the cache
+    turns over right after the hourly job has written.
+    """
+    now = now or datetime.utcnow()
+    shifted = now - timedelta(minutes=offset_minutes)
+    return shifted.replace(minute=0, second=0, microsecond=0) + timedelta(minutes=offset_minutes)
+
+def fetch_current(feature_collection):
+    """Latest observation as a dict (aqi, pm2_5, timestamp), or None"""
+    return feature_collection.find_one({}, CURRENT_PROJECTION, sort=[("timestamp", -1)])
+
+def flatten_forecast(doc):
+    """timestamp plus t{1,2,3}_pm25 / t{1,2,3}_label from a forecast document"""
+    row = {"timestamp": doc.get("timestamp")}
+    forecasts = doc.get("forecasts", {})
+    for i, horizon in enumerate(HORIZONS, start=1):
+        forecast = forecasts.get(horizon, {})
+        row[f"t{i}_pm25"] = forecast.get("pm25_prediction")
+        row[f"t{i}_label"] = forecast.get("aqi_category_label")
+    return row
+
+def fetch_latest(latest_collection, city):
+    """The materialized latest_forecast document of a city: one _id lookup"""
+    return latest_collection.find_one({"_id": city})
+
+# -------------------- LONG-RANGE HISTORY --------------------
+
+HISTORY_MAX_POINTS = int(os.getenv("DASHBOARD_HISTORY_MAX_POINTS", "2000"))
+HISTORY_COLUMNS = ["timestamp", "min", "mean", "max", "count"]
+
+def history_pipeline(value_field, start, end, unit="day", time_field="timestamp", match=None):
+    """
+    Aggregation bucketing `value_field` per hour or day on the server.
+
+    Only one small document per bucket (min/mean/max/count) leaves Atlas,
+    so transfer size depends on the number of buckets, not on the range.
+    """
+    parts = {
+        "year": {"$year": f"${time_field}"},
+        "month": {"$month": f"${time_field}"},
+        "day": {"$dayOfMonth": f"${time_field}"},
+    }
+    if unit == "hour":
+        parts["hour"] = {"$hour": f"${time_field}"}
+
+    return [
+        {"$match": {**(match or {}), time_field: {"$gte": start, "$lt": end}, value_field: {"$ne": None}}},
+        {"$group": {
+            "_id": {"$dateFromParts": parts},
+            "min": {"$min": f"${value_field}"},
+            "mean": {"$avg": f"${value_field}"},
+            "max": {"$max": f"${value_field}"},
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "timestamp": "$_id", "min": 1, "mean": 1, "max": 1, "count": 1}},
+    ]
+
+def fetch_history(collection, value_field, start, end, max_points=HISTORY_MAX_POINTS,
+                  time_field="timestamp", match=None):
+    """
+    min/mean/max series for [start, end) with at most `max_points` rows.
+
+    Hourly buckets are used while the range fits in `max_points`, daily
+    buckets beyond that; if even the daily series is too long it is
+    reduced with LTTB on the mean (min/max of the kept buckets are kept).
+
+    Returns:
+        tuple: (DataFrame[timestamp, min, mean, max, count], unit)
+    """
+    hours = (end - start).total_seconds() / 3600
+    unit = "hour" if hours <= max_points else "day"
+    pipeline = history_pipeline(value_field, start, end, unit, time_field, match)
+
+    df = pd.DataFrame(list(collection.aggregate(pipeline, allowDiskUse=True)), columns=HISTORY_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+    return _cap_points(df, max_points), unit
+
+def _cap_points(df, max_points):
+    """LTTB on the mean when there are more rows than `max_points`"""
+    if len(df) > max_points:
+        df = df.iloc[lttb(df["timestamp"].to_numpy(), df["mean"].to_numpy(), max_points)]
+    return df.reset_index(drop=True)
+
+# -------------------- TIME-SERIES STORAGE --------------------
+
+def fetch_forecast_series(ts_collection, city, limit=48):
+    """
+    Last `limit` forecast runs of a city from the flat time-series rows
+    (one per horizon), as one row per run with t{1,2,3}_pm25 / t{1,2,3}_label
+    """
+    cursor = ts_collection.find(
+        {"meta.city": city}, FORECAST_PROJECTION,
+    ).sort("timestamp", -1).limit(limit * len(HORIZONS))
+
+    runs = {}
+    for row in cursor:
+        horizon = row["meta"]["horizon"]
+        if horizon not in HORIZONS:
+            continue
+        i = HORIZONS.index(horizon) + 1
+        run = runs.setdefault(row["timestamp"], {"timestamp": row["timestamp"]})
+        run[f"t{i}_pm25"] = row.get("pm25_prediction")
+        run[f"t{i}_label"] = row.get("aqi_category_label")
+
+    columns = ["timestamp"] + [f"t{i}_{k}" for i in range(1, 4) for k in ("pm25", "label")]
+    df = pd.DataFrame(list(runs.values()), columns=columns)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df[[f"t{i}_pm25" for i in range(1, 4)]] = df[[f"t{i}_pm25" for i in range(1, 4)]].astype(float)
+    return df.sort_values("timestamp").tail(limit).reset_index(drop=True)
+
+def fetch_daily(daily_collection, field, start, end, match=None):
+    """Stored daily rollups of `field` for [start, end) as a history frame"""
+    cursor = daily_collection.find(
+        {**(match or {}), "day": {"$gte": start, "$lt": end}},
+        {"_id": 0, "day": 1, "count": 1, field: 1},
+    ).sort("day", 1)
+
+    rows = [{"timestamp": d["day"], **{s: d[field][s] for s in ("min", "mean", "max")}, "count": d["count"]}
+            for d in cursor if d.get(field)]
+    df = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+def fetch_stored_history(raw_collection, daily_collection, field, start, end, city,
+                         horizon=None, max_points=HISTORY_MAX_POINTS):
+    """
+    History of one city (and horizon) from the time-series storage: hourly
+    buckets over the raw rows while the range fits in `max_points` (well
+    inside the raw TTL), the precomputed daily rollups beyond that.
+
+    Returns:
+        tuple: (DataFrame[timestamp, min, mean, max, count], unit)
+    """
+    if (end - start).total_seconds() / 3600 <= max_points:
+        match = {"meta.city": city, **({"meta.horizon": horizon} if horizon else {})}
+        return fetch_history(raw_collection, field, start, end, max_points, match=match)
+
+    df = fetch_daily(daily_collection, field, start, end, {"city": city, "horizon": horizon})
+    return _cap_points(df, max_points), "day"
@@ -0,0 +1,88 @@
+# benchmarks/bench_dtypes.py
+#
+# Default (float64/int64/object) vs compact (float32/int8/category) schema
+# through clean_data + build_features: runtime, peak traced memory, final
+# frame size, and holdout RMSE of the same models trained on both.
+# Exits non-zero if compact changes any RMSE by more than --tolerance.
+#
+#   python -m benchmarks.bench_dtypes --cities 20 --days 730
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_squared_error
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features, FEATURE_COLUMNS, TARGET_COLUMNS
+from src.utils.schema import memory_mb
+
+def run_pipeline(raw, compact):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = build_features(clean_data(raw, compact=compact), compact=compact)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, {"seconds": round(elapsed, 3), "peak_mb": round(peak / 1024 ** 2, 1),
+                "frame_mb": round(memory_mb(df), 1)}
+
+def holdout_rmse(df, max_rows):
+    df = df.dropna().sort_values("timestamp", kind="stable").tail(max_rows)
+    split = int(len(df) * 0.8)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    scores = {}
+    for name, model in {
+        "Ridge": Ridge(alpha=1.0),
+        "RandomForest": RandomForestRegressor(n_estimators=50, max_depth=12, random_state=42, n_jobs=-1),
+    }.items():
+        for horizon, col in TARGET_COLUMNS.items():
+            y = df[col].to_numpy(dtype=np.float64)
+            model.fit(X[:split], y[:split])
+            preds = model.predict(X[split:])
+            scores[f"{name}_{horizon}"] = float(np.sqrt(mean_squared_error(y[split:], preds)))
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--train-rows", type=int, default=50000,
+                        help="most recent rows used for the accuracy check")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="max relative RMSE change allowed")
+    args = parser.parse_args()
+
+    raw = generate_raw_data(n_cities=args.cities, days=args.days)
+    print(f"🧪 {len(raw)} raw rows ({args.cities} cities x {args.days} days)")
+
+    results, rmse = {}, {}
+    for mode, compact in [("default", False), ("compact", True)]:
+        df, results[mode] = run_pipeline(raw, compact)
+        rmse[mode] = holdout_rmse(df, args.train_rows)
+        print(json.dumps({"mode": mode, **results[mode]}))
+        del df
+
+    print(f"📉 Peak memory: {results['compact']['peak_mb'] / results['default']['peak_mb']:.2f}x, "
+          f"frame: {results['compact']['frame_mb'] / results['default']['frame_mb']:.2f}x, "
+          f"runtime: {results['compact']['seconds'] / results['default']['seconds']:.2f}x")
+
+    worst = 0.0
+    for key, base in rmse["default"].items():
+        change = abs(rmse["compact"][key] - base) / base
+        worst = max(worst, change)
+        print(f"  {key}: RMSE {base:.4f} -> {rmse['compact'][key]:.4f} ({change:+.2%})")
+
+    if worst > args.tolerance:
+        print(f"❌ Compact schema changed RMSE by {worst:.2%} (> {args.tolerance:.2%})")
+        sys.exit(1)
+    print(f"✅ Accuracy unchanged (max RMSE change {worst:.2%})")
+
+if __name__ == "__main__":
+    main()
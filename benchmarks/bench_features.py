@@ -0,0 +1,57 @@
+# benchmarks/bench_features.py
+#
+# Scaling of the city-partitioned feature pipeline on synthetic long-format
+# data. Throughput (rows/s) should stay roughly flat as cities are added,
+# i.e. total time grows linearly.
+#
+#   python -m benchmarks.bench_features --cities 10 25 50 100 --days 730
+
+import json
+import time
+import argparse
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import (
+    add_time_features,
+    add_lag_features,
+    add_rolling_features,
+    add_derived_features,
+    create_targets,
+)
+
+def run_pipeline(df):
+    df = add_time_features(df)
+    df = add_lag_features(df, target="pm2_5", lags=[24, 48, 72])
+    df = add_rolling_features(df)
+    df = add_derived_features(df)
+    return create_targets(df)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--days", type=int, default=730)
+    args = parser.parse_args()
+    
+    results = []
+    for n_cities in args.cities:
+        df = clean_data(generate_raw_data(n_cities=n_cities, days=args.days))
+        
+        start = time.perf_counter()
+        run_pipeline(df)
+        elapsed = time.perf_counter() - start
+        
+        results.append({
+            "cities": n_cities,
+            "rows": len(df),
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(len(df) / elapsed),
+        })
+        print(json.dumps(results[-1]))
+    
+    # Linear scaling: per-row cost at the largest size vs the smallest
+    ratio = results[0]["rows_per_sec"] / results[-1]["rows_per_sec"]
+    print(f"📈 Per-row cost ratio (largest / smallest): {ratio:.2f} (1.0 = perfectly linear)")
+
+if __name__ == "__main__":
+    main()
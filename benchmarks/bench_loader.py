@@ -0,0 +1,87 @@
+# benchmarks/bench_loader.py
+#
+# Compare peak RSS and throughput of load_data() against the streaming
+# columnar loader. Needs a MongoDB reachable through MONGODB_URI; documents
+# are seeded into a scratch collection (aqi_bench.aqi_features by default).
+#
+#   python -m benchmarks.bench_loader --docs 1000000
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_DB = os.getenv("BENCH_DB", "aqi_bench")
+BENCH_COLLECTION = os.getenv("BENCH_COLLECTION", "aqi_features")
+
+def seed(coll, n_docs, batch=50000):
+    from benchmarks.synthetic import generate_raw_data, to_documents
+    
+    existing = coll.estimated_document_count()
+    if existing >= n_docs:
+        print(f"✅ Using existing {existing} documents")
+        return
+    
+    coll.drop()
+    n_cities = max(1, n_docs // (365 * 24))
+    days = -(-n_docs // (n_cities * 24))
+    df = generate_raw_data(n_cities=n_cities, days=days).head(n_docs)
+    
+    print(f"📥 Seeding {len(df)} documents...")
+    for start in range(0, len(df), batch):
+        coll.insert_many(to_documents(df.iloc[start:start + batch]), ordered=False)
+
+def run_mode(mode):
+    """Run one loader in this (fresh) process and print its measurements"""
+    from src.utils.data_loader import get_client, load_data_columnar, FEATURE_FIELDS
+    import pandas as pd
+    
+    coll = get_client()[BENCH_DB][BENCH_COLLECTION]
+    start = time.perf_counter()
+    
+    if mode == "load_data":
+        df = pd.DataFrame(list(coll.find()))
+    else:
+        df = load_data_columnar(coll, fields=FEATURE_FIELDS)
+    
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    
+    print(json.dumps({
+        "mode": mode,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(df) / elapsed),
+        "peak_rss_mb": round(peak_mb, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["load_data", "columnar"])
+    args = parser.parse_args()
+    
+    if args.mode:
+        run_mode(args.mode)
+        return
+    
+    from src.utils.data_loader import get_client
+    seed(get_client()[BENCH_DB][BENCH_COLLECTION], args.docs)
+    
+    # Each loader runs in its own process so peak RSS is not shared
+    for mode in ["load_data", "columnar"]:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_loader", "--mode", mode],
+            capture_output=True, text=True, check=True
+        )
+        print(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_multi_output.py
+#
+# Three per-horizon RandomForests vs one multi-output RandomForest on
+# synthetic data: training time, single-row inference latency, artifact
+# size and per-horizon RMSE.
+#
+#   python -m benchmarks.bench_multi_output --cities 1 --days 365
+
+import io
+import json
+import time
+import argparse
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features, FEATURE_COLUMNS, TARGET_COLUMNS
+
+def make_forest():
+    # Same configuration as get_models()["RandomForest"]
+    return RandomForestRegressor(
+        n_estimators=200, max_depth=12, min_samples_split=5,
+        min_samples_leaf=2, random_state=42, n_jobs=-1
+    )
+
+def artifact_bytes(models):
+    total = 0
+    for model in models:
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        total += buffer.tell()
+    return total
+
+def latency_ms(predict, x, repeats=50):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(x)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=1)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+    
+    df = build_features(clean_data(generate_raw_data(n_cities=args.cities, days=args.days))).dropna()
+    X = df[FEATURE_COLUMNS].to_numpy()
+    Y = df[list(TARGET_COLUMNS.values())].to_numpy()
+    split = int(len(X) * 0.8)
+    X_train, X_test, Y_train, Y_test = X[:split], X[split:], Y[:split], Y[split:]
+    horizons = list(TARGET_COLUMNS)
+    
+    # Three separate models
+    start = time.perf_counter()
+    per_horizon = [make_forest().fit(X_train, Y_train[:, i]) for i in range(len(horizons))]
+    per_horizon_fit = time.perf_counter() - start
+    per_horizon_preds = np.column_stack([m.predict(X_test) for m in per_horizon])
+    
+    # One multi-output model
+    start = time.perf_counter()
+    multi = make_forest().fit(X_train, Y_train)
+    multi_fit = time.perf_counter() - start
+    multi_preds = multi.predict(X_test)
+    
+    row = X_test[-1:]
+    results = {
+        "rows": len(X),
+        "per_horizon": {
+            "fit_seconds": round(per_horizon_fit, 3),
+            "predict_ms": round(latency_ms(lambda x: [m.predict(x) for m in per_horizon], row), 3),
+            "artifact_mb": round(artifact_bytes(per_horizon) / 1e6, 2),
+            "rmse": {h: round(float(np.sqrt(mean_squared_error(Y_test[:, i], per_horizon_preds[:, i]))), 3)
+                     for i, h in enumerate(horizons)},
+        },
+        "multi_output": {
+            "fit_seconds": round(multi_fit, 3),
+            "predict_ms": round(latency_ms(multi.predict, row), 3),
+            "artifact_mb": round(artifact_bytes([multi]) / 1e6, 2),
+            "rmse": {h: round(float(np.sqrt(mean_squared_error(Y_test[:, i], multi_preds[:, i]))), 3)
+                     for i, h in enumerate(horizons)},
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
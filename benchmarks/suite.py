@@ -0,0 +1,255 @@
+# benchmarks/suite.py
+#
+# Offline performance suite: times and memory-profiles every pipeline
+# stage on deterministic synthetic data, writes the results as JSON and
+# flags regressions against a stored baseline. No MongoDB, DagsHub or
+# network access is needed.
+#
+#   python -m benchmarks.suite                      # run + compare to baseline
+#   python -m benchmarks.suite --save-baseline      # record a new baseline
+#   python -m benchmarks.suite --cities 10 --years 2 --gap-rate 0.05 --fail-on-regression
+#
+# benchmarks/baseline.json holds a baseline for the default config. Timings
+# depend on the machine: before comparing elsewhere (another laptop, a CI
+# runner), record one there on the parent commit with --save-baseline
+# (--baseline <path> keeps it out of the tree), then run the change against it.
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import (
+    add_time_features,
+    add_lag_features,
+    add_rolling_features,
+    add_weather_features,
+    add_change_rate_features,
+    add_pollutant_ratio_features,
+    create_targets,
+    to_hourly_grid,
+    build_features,
+    FEATURE_COLUMNS,
+)
+from src.utils.aqi_converter import pm25_to_aqi, compute_aqi
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+
+# -------------------- CASES --------------------
+
+def _stages(raw):
+    """Inputs for each feature step: the frame as the previous step left it"""
+    cleaned = clean_data(raw)
+    timed = add_time_features(cleaned.copy())
+    lagged = add_lag_features(timed.copy())
+    rolled = add_rolling_features(lagged.copy())
+    weather = add_weather_features(rolled.copy())
+    changed = add_change_rate_features(weather.copy())
+    ratios = add_pollutant_ratio_features(changed.copy())
+    return {
+        "cleaned": cleaned, "timed": timed, "lagged": lagged, "rolled": rolled,
+        "weather": weather, "changed": changed, "ratios": ratios,
+    }
+
+def _training_data(raw, max_rows):
+    df = build_features(clean_data(raw)).dropna().sort_values("timestamp", kind="stable").tail(max_rows)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df["target_t1"].to_numpy(dtype=np.float64)
+    split = int(len(X) * 0.8)
+    return X[:split], y[:split], X[split:]
+
+def _models():
+    # Same configurations as training, single-threaded for stable timings
+    from src.training.train_multi_day import get_models
+    models = {name: get_models()[name] for name in ("RandomForest", "Ridge")}
+    models["RandomForest"].set_params(n_jobs=1)
+    return models
+
+def build_cases(raw, train_rows):
+    """
+    Benchmark cases as name -> (make_input, fn). make_input() runs untimed
+    before every repeat, so in-place feature steps always see fresh input.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages = _stages(raw)
+        X_train, y_train, X_test = _training_data(raw, train_rows)
+    pm25 = raw["pm2_5"].to_numpy()
+    concentrations = {p: raw[p].to_numpy() for p in ["pm2_5", "pm10", "o3", "no2", "so2", "co"]}
+
+    cases = {
+        "clean_data": (lambda: raw, clean_data),
+        "add_time_features": (lambda: stages["cleaned"].copy(), add_time_features),
+        "add_lag_features": (lambda: stages["timed"].copy(), add_lag_features),
+        "add_rolling_features": (lambda: stages["lagged"].copy(), add_rolling_features),
+        "add_weather_features": (lambda: stages["rolled"].copy(), add_weather_features),
+        "add_change_rate_features": (lambda: stages["weather"].copy(), add_change_rate_features),
+        "add_pollutant_ratio_features": (lambda: stages["changed"].copy(), add_pollutant_ratio_features),
+        "create_targets": (lambda: stages["ratios"].copy(), create_targets),
+        "to_hourly_grid": (lambda: stages["cleaned"], to_hourly_grid),
+        "build_features": (lambda: stages["cleaned"], build_features),
+        "pm25_to_aqi": (lambda: pm25, pm25_to_aqi),
+        "compute_aqi": (lambda: concentrations, compute_aqi),
+    }
+
+    fitted = {}
+    def fit_once(name, model):
+        # Prediction cases share one fitted copy, built only if they run
+        if name not in fitted:
+            fitted[name] = clone(model).fit(X_train, y_train)
+        return fitted[name]
+
+    for name, model in _models().items():
+        cases[f"train_{name}"] = (lambda m=model: clone(m), lambda m: m.fit(X_train, y_train))
+        cases[f"predict_batch_{name}"] = (lambda n=name, m=model: fit_once(n, m), lambda m: m.predict(X_test))
+        cases[f"predict_row_{name}"] = (lambda n=name, m=model: fit_once(n, m), lambda m: m.predict(X_test[-1:]))
+
+    return cases
+
+# -------------------- MEASUREMENT --------------------
+
+def measure(make_input, fn, repeats):
+    """Median/min wall time over `repeats`, then one traced run for peak memory"""
+    times = []
+    # Pipeline progress prints are not part of what is measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            arg = make_input()
+            start = time.perf_counter()
+            fn(arg)
+            times.append(time.perf_counter() - start)
+
+        # Tracing slows execution, so memory gets its own run
+        arg = make_input()
+        tracemalloc.start()
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "median_s": round(statistics.median(times), 6),
+        "min_s": round(min(times), 6),
+        "peak_mb": round(peak / 1024 ** 2, 3),
+    }
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+def run_suite(cities=5, years=1.0, gap_rate=0.02, seed=42, repeats=3, train_rows=10000, only=None):
+    raw = generate_raw_data(n_cities=cities, years=years, gap_rate=gap_rate, seed=seed)
+    config = {"cities": cities, "years": years, "gap_rate": gap_rate, "seed": seed,
+              "repeats": repeats, "train_rows": train_rows, "rows": len(raw)}
+    print(f"🧪 {len(raw)} rows ({cities} cities x {years} years, gap rate {gap_rate:.0%})")
+
+    results = {}
+    for name, (make_input, fn) in build_cases(raw, train_rows).items():
+        if only and name not in only:
+            continue
+        results[name] = measure(make_input, fn, repeats)
+        r = results[name]
+        print(f"  ⏱️ {name:<32} {r['median_s'] * 1000:10.2f} ms  {r['peak_mb']:9.2f} MB")
+
+    return {"created": datetime.utcnow().isoformat(), "config": config,
+            "environment": environment(), "results": results}
+
+# -------------------- BASELINE --------------------
+
+def compare(report, baseline, time_tolerance=0.25, memory_tolerance=0.10, min_seconds=0.001):
+    """
+    Cases slower (best-of-repeats time, the least noisy statistic) or
+    hungrier (peak memory) than the baseline by more than the tolerances.
+    Cases faster than `min_seconds` in the baseline are only checked for
+    memory, since their timings are mostly noise.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if base["min_s"] >= min_seconds and current["min_s"] > base["min_s"] * (1 + time_tolerance):
+            regressions.append({"case": name, "metric": "min_s",
+                                "baseline": base["min_s"], "current": current["min_s"]})
+        if current["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance) and current["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append({"case": name, "metric": "peak_mb",
+                                "baseline": base["peak_mb"], "current": current["peak_mb"]})
+    return regressions
+
+def write_json(data, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=5)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--gap-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--train-rows", type=int, default=10000)
+    parser.add_argument("--only", nargs="+", help="run a subset of cases")
+    parser.add_argument("--output", help="results JSON (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    report = run_suite(args.cities, args.years, args.gap_rate, args.seed,
+                       args.repeats, args.train_rows, args.only)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.utcnow():%Y%m%d_%H%M%S}.json")
+    write_json(report, output)
+    print(f"\n💾 Results: {output}")
+
+    if args.save_baseline:
+        write_json(report, args.baseline)
+        print(f"📌 Baseline saved: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save-baseline to record one")
+        if args.fail_on_regression:
+            sys.exit(1)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["config"] != report["config"]:
+        print("⚠️ Baseline was recorded with a different config; comparison may be meaningless")
+    if baseline.get("environment") != report["environment"]:
+        print("⚠️ Baseline was recorded in a different environment; timings may not be comparable "
+              "(record a local one with --save-baseline)")
+
+    regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+    for r in regressions:
+        print(f"  ❌ {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} "
+              f"({r['current'] / r['baseline'] - 1:+.0%})")
+    if not regressions:
+        print("✅ No regressions against baseline")
+    elif args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
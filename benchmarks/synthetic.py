@@ -0,0 +1,87 @@
+# benchmarks/synthetic.py
+
+import numpy as np
+import pandas as pd
+
+WEATHER_MAIN = ["Clear", "Clouds", "Haze", "Smoke", "Dust", "Rain"]
+
+def generate_raw_data(n_cities=1, days=90, seed=42, start="2025-01-01", years=None, gap_rate=0.0):
+    """
+    Deterministic hourly AQI + weather frame shaped like the aqi_features
+    collection (long format, one row per city and hour).
+    
+    `years` overrides `days` (365 days each). `gap_rate` is the fraction of
+    hours dropped as missed ingestion runs, in outages of 1-12 hours; it
+    uses its own random stream, so the kept rows are identical to the
+    gap-free frame.
+    """
+    if years is not None:
+        days = int(round(years * 365))
+    rng = np.random.default_rng(seed)
+    hours = days * 24
+    n = n_cities * hours
+    
+    timestamps = pd.date_range(start, periods=hours, freq="h")
+    hour_of_day = np.tile(timestamps.hour.to_numpy(), n_cities)
+    day_of_year = np.tile(timestamps.dayofyear.to_numpy(), n_cities)
+    city_idx = np.repeat(np.arange(n_cities), hours)
+    
+    # Diurnal + seasonal PM2.5 cycle with a per-city baseline and AR(1)-ish noise
+    baseline = rng.uniform(25, 90, n_cities)[city_idx]
+    diurnal = 15 * np.sin(2 * np.pi * (hour_of_day - 7) / 24)
+    seasonal = 20 * np.cos(2 * np.pi * day_of_year / 365)
+    noise = pd.Series(rng.normal(0, 8, n)).ewm(alpha=0.3).mean().to_numpy()
+    pm2_5 = np.clip(baseline + diurnal + seasonal + noise, 1, 480)
+    
+    df = pd.DataFrame({
+        "city": np.array([f"city_{i:03d}" for i in range(n_cities)])[city_idx],
+        "lat": rng.uniform(5, 45, n_cities)[city_idx],
+        "lon": rng.uniform(60, 120, n_cities)[city_idx],
+        "timestamp": np.tile(timestamps.to_numpy(), n_cities),
+        "aqi": np.digitize(pm2_5, [12, 35.4, 55.4, 150.4]).astype(float) + 1,
+        "pm2_5": pm2_5,
+        "pm10": pm2_5 * rng.uniform(1.3, 2.2, n),
+        "co": rng.gamma(4, 150, n),
+        "no2": rng.gamma(3, 8, n),
+        "o3": rng.gamma(3, 15, n),
+        "so2": rng.gamma(2, 5, n),
+        "nh3": rng.gamma(2, 3, n),
+        "temp": 25 + 8 * np.sin(2 * np.pi * (hour_of_day - 9) / 24) + rng.normal(0, 2, n),
+        "humidity": rng.uniform(20, 95, n),
+        "pressure": rng.normal(1010, 5, n),
+        "wind_speed": rng.gamma(2, 1.5, n),
+        "wind_deg": rng.uniform(0, 360, n),
+        "clouds": rng.uniform(0, 100, n),
+        "weather_main": np.array(WEATHER_MAIN)[rng.integers(0, len(WEATHER_MAIN), n)],
+        "source": "synthetic",
+    })
+    df["ingestion_time"] = df["timestamp"]
+    
+    if gap_rate > 0:
+        df = drop_gaps(df, gap_rate, seed=seed + 1)
+    
+    return df
+
+def drop_gaps(df, gap_rate, seed=0, max_outage=12):
+    """
+    Drop about `gap_rate` of the rows in outages of 1-`max_outage` rows.
+    Rows are city-major, so each outage is a run of consecutive hours.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(df)
+    n_outages = max(1, int(round(n * gap_rate / ((1 + max_outage) / 2))))
+    lengths = rng.integers(1, max_outage + 1, size=n_outages)
+    starts = rng.integers(0, n, size=n_outages)
+    
+    keep = np.ones(n, dtype=bool)
+    for s, length in zip(starts, lengths):
+        keep[s:s + length] = False
+    return df[keep].reset_index(drop=True)
+
+def to_documents(df):
+    """Convert a synthetic frame into Mongo-ready documents"""
+    records = df.to_dict("records")
+    for r in records:
+        r["timestamp"] = r["timestamp"].to_pydatetime()
+        r["ingestion_time"] = r["ingestion_time"].to_pydatetime()
+    return records
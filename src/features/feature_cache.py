@@ -0,0 +1,197 @@
+# src/features/feature_cache.py
+
+import os
+import json
+import time
+import shutil
+import inspect
+import hashlib
+import numpy as np
+import pandas as pd
+
+from src.features import feature_engineering
+from src.preprocessing import preprocess, validation
+from src.utils import schema
+
+CACHE_DIR = os.getenv("AQI_FEATURE_CACHE_DIR", os.path.join("data", "cache", "features"))
+MAX_BYTES = int(float(os.getenv("AQI_FEATURE_CACHE_MAX_BYTES", 2 * 1024 ** 3)))
+MAX_ENTRIES = int(os.getenv("AQI_FEATURE_CACHE_MAX_ENTRIES", 8))
+
+# Modules whose source is part of every key: editing them invalidates the cache
+# (schema decides the dtypes of build_features(compact=True) output)
+CODE_MODULES = [validation, preprocess, feature_engineering, schema]
+
+def _source_digest(objs):
+    digest = hashlib.sha256()
+    for obj in objs:
+        try:
+            digest.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            # Lambdas/builtins without retrievable source fall back to their name
+            digest.update(getattr(obj, "__qualname__", repr(obj)).encode())
+    return digest.hexdigest()
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """SHA-256 over column names, dtypes and row values (index ignored)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _is_plain(series: pd.Series) -> bool:
+    """Columns stored as a raw .npy (everything else is dictionary-encoded)"""
+    dtype = series.dtype
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufM"
+
+class FeatureCache:
+    """
+    On-disk cache of engineered feature frames.
+
+    Entries are keyed by the fingerprint of the raw input frame, the feature
+    spec and the source of the preprocessing/feature modules, so a code or
+    data change is a miss. Every column is its own .npy file that is
+    memory-mapped on load; string columns are stored as int32 codes plus a
+    category list. Least recently used entries are evicted once the cache
+    exceeds `max_bytes` or `max_entries`.
+
+    Layout:
+        <cache_dir>/<key>/meta.json    {"columns": [...], "bytes": n, "last_used": t}
+        <cache_dir>/<key>/<i>.npy
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, raw: pd.DataFrame, spec=None, build=None) -> str:
+        spec = json.dumps(spec or {}, sort_keys=True, default=str)
+        code = _source_digest(CODE_MODULES + ([build] if build is not None else []))
+        return hashlib.sha256(f"{frame_fingerprint(raw)}|{spec}|{code}".encode()).hexdigest()[:32]
+
+    # -------------------- ENTRIES --------------------
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, path, meta):
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def get(self, key):
+        """Cached frame with memory-mapped columns, or None on a miss"""
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+
+        path = self._entry_dir(key)
+        columns = {}
+        try:
+            for i, col in enumerate(meta["columns"]):
+                values = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r")
+                if "categories" in col:
+                    values = pd.Categorical.from_codes(values, col["categories"])
+                    columns[col["name"]] = pd.Series(values).astype(col["dtype"])
+                else:
+                    # Plain ndarray view, still backed by the mapped file
+                    columns[col["name"]] = values.view(np.ndarray)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Feature cache entry {key} unreadable ({e}), rebuilding")
+            self.remove(key)
+            return None
+
+        meta["last_used"] = time.time()
+        self._write_meta(path, meta)
+        return pd.DataFrame(columns, copy=False)
+
+    def put(self, key, df: pd.DataFrame):
+        """Store `df` (its index is not kept) and evict down to the limits"""
+        path = self._entry_dir(key)
+        tmp = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        columns, size = [], 0
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            col = {"name": name, "dtype": str(series.dtype)}
+            if _is_plain(series):
+                values = series.to_numpy()
+            else:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(np.int32)
+                col["categories"] = [str(c) for c in categories]
+            np.save(os.path.join(tmp, f"{i}.npy"), np.ascontiguousarray(values))
+            size += values.nbytes
+            columns.append(col)
+
+        self._write_meta(tmp, {"columns": columns, "rows": len(df), "bytes": size, "last_used": time.time()})
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self.evict(keep=key)
+
+    def remove(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def entries(self):
+        """[(key, meta)] from least to most recently used"""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            if ".tmp" in key:
+                continue
+            meta = self._read_meta(key)
+            if meta is not None:
+                entries.append((key, meta))
+        return sorted(entries, key=lambda e: e[1]["last_used"])
+
+    def evict(self, keep=None):
+        """Drop LRU entries until both the size and the entry limits hold"""
+        entries = self.entries()
+        total = sum(meta["bytes"] for _, meta in entries)
+
+        evicted = []
+        for key, meta in entries:
+            if total <= self.max_bytes and len(entries) - len(evicted) <= self.max_entries:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            total -= meta["bytes"]
+            evicted.append(key)
+        return evicted
+
+def cached_features(raw: pd.DataFrame, build=None, spec=None, cache=None) -> pd.DataFrame:
+    """
+    Features for `raw`, computed by `build(raw)` only on a cache miss.
+
+    The default build is clean_data + build_features(**spec). `spec` is
+    part of the key, so pass anything that changes the output through it.
+    """
+    spec = spec if spec is not None else {"time_aware": True, "targets": True}
+    if build is None:
+        def build(df):
+            return feature_engineering.build_features(preprocess.clean_data(df), **spec)
+
+    cache = cache or FeatureCache()
+    key = cache.key(raw, spec, build)
+
+    features = cache.get(key)
+    if features is not None:
+        print(f"⚡ Feature cache hit ({key[:12]}): {features.shape}")
+        return features
+
+    features = build(raw).reset_index(drop=True)
+    cache.put(key, features)
+    print(f"💾 Feature cache stored ({key[:12]}): {features.shape}")
+    return features
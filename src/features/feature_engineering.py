@@ -3,6 +3,44 @@
 import pandas as pd
 import numpy as np
 
+from src.utils.schema import compact_dtypes
+from src.utils.tracing import traced
+
+# Model inputs shared by training and inference (order matters)
+FEATURE_COLUMNS = [
+    "pm2_5", "pm10", "co", "no2", "o3", "so2", "nh3",
+    "hour", "day", "month", "day_of_week", "is_weekend",
+    "is_morning_rush", "is_evening_rush",
+    "temp", "humidity", "pressure", "wind_speed", "clouds",
+    "wind_from_north", "wind_from_east", "wind_from_south", "wind_from_west",
+    "temp_high", "temp_low", "stable_atmosphere",
+    "pm2_5_lag24", "pm2_5_lag48", "pm2_5_lag72",
+    "temp_lag24", "wind_speed_lag24", "humidity_lag24",
+    "aqi_roll24", "aqi_roll72", "aqi_std24", "aqi_roll24_max",
+    "temp_roll24", "wind_roll24",
+    "pm2_5_change_rate", "aqi_change_24h",
+    "temp_change_24h", "wind_change_24h",
+    "pm2_5_pm10_ratio", "co_no2_ratio"
+]
+
+TARGET_COLUMNS = {"t_plus_1": "target_t1", "t_plus_2": "target_t2", "t_plus_3": "target_t3"}
+
+# Long-format frames hold one series per city; windows must not cross cities
+GROUP_COL = "city"
+
+def _by_city(df: pd.DataFrame, col: str):
+    """Column as a Series, or grouped per city when several cities are present"""
+    if GROUP_COL in df.columns and df[GROUP_COL].nunique() > 1:
+        return df.groupby(GROUP_COL, sort=False)[col]
+    return df[col]
+
+def _rolling(df: pd.DataFrame, col: str, window: int, min_periods: int, stat: str) -> pd.Series:
+    """Rolling statistic computed within each city, aligned back to df's index"""
+    result = getattr(_by_city(df, col).rolling(window, min_periods=min_periods), stat)()
+    if isinstance(result.index, pd.MultiIndex):
+        result = result.droplevel(0)
+    return result
+
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     """Add time features"""
     df["hour"] = df["timestamp"].dt.hour
@@ -40,43 +78,43 @@ def add_weather_features(df: pd.DataFrame) -> pd.DataFrame:
 def add_lag_features(df: pd.DataFrame, target="pm2_5", lags=[24, 48, 72]) -> pd.DataFrame:
     """Daily lags"""
     for lag in lags:
-        df[f"{target}_lag{lag}"] = df[target].shift(lag)
+        df[f"{target}_lag{lag}"] = _by_city(df, target).shift(lag)
         
         # Also add weather lags (yesterday's weather affects today's AQI)
         if "temp" in df.columns:
-            df[f"temp_lag{lag}"] = df["temp"].shift(lag)
+            df[f"temp_lag{lag}"] = _by_city(df, "temp").shift(lag)
         if "wind_speed" in df.columns:
-            df[f"wind_speed_lag{lag}"] = df["wind_speed"].shift(lag)
+            df[f"wind_speed_lag{lag}"] = _by_city(df, "wind_speed").shift(lag)
         if "humidity" in df.columns:
-            df[f"humidity_lag{lag}"] = df["humidity"].shift(lag)
+            df[f"humidity_lag{lag}"] = _by_city(df, "humidity").shift(lag)
     
     return df
 
 def add_rolling_features(df: pd.DataFrame) -> pd.DataFrame:
     """Rolling features"""
-    df["aqi_roll24"] = df["aqi"].rolling(24, min_periods=12).mean()
-    df["aqi_roll72"] = df["aqi"].rolling(72, min_periods=36).mean()
-    df["aqi_std24"] = df["aqi"].rolling(24, min_periods=12).std()
-    df["aqi_roll24_max"] = df["aqi"].rolling(24, min_periods=12).max()
+    df["aqi_roll24"] = _rolling(df, "aqi", 24, 12, "mean")
+    df["aqi_roll72"] = _rolling(df, "aqi", 72, 36, "mean")
+    df["aqi_std24"] = _rolling(df, "aqi", 24, 12, "std")
+    df["aqi_roll24_max"] = _rolling(df, "aqi", 24, 12, "max")
     
     # Weather rolling averages
     if "temp" in df.columns:
-        df["temp_roll24"] = df["temp"].rolling(24, min_periods=12).mean()
+        df["temp_roll24"] = _rolling(df, "temp", 24, 12, "mean")
     if "wind_speed" in df.columns:
-        df["wind_roll24"] = df["wind_speed"].rolling(24, min_periods=12).mean()
+        df["wind_roll24"] = _rolling(df, "wind_speed", 24, 12, "mean")
     
     return df
 
 def add_change_rate_features(df: pd.DataFrame) -> pd.DataFrame:
     """Change rates"""
-    df["pm2_5_change_rate"] = df["pm2_5"].diff(24)
-    df["aqi_change_24h"] = df["aqi"].diff(24)
+    df["pm2_5_change_rate"] = _by_city(df, "pm2_5").diff(24)
+    df["aqi_change_24h"] = _by_city(df, "aqi").diff(24)
     
     # Weather changes
     if "temp" in df.columns:
-        df["temp_change_24h"] = df["temp"].diff(24)
+        df["temp_change_24h"] = _by_city(df, "temp").diff(24)
     if "wind_speed" in df.columns:
-        df["wind_change_24h"] = df["wind_speed"].diff(24)
+        df["wind_change_24h"] = _by_city(df, "wind_speed").diff(24)
     
     return df
 
@@ -95,7 +133,117 @@ def add_derived_features(df: pd.DataFrame) -> pd.DataFrame:
 
 def create_targets(df: pd.DataFrame) -> pd.DataFrame:
     """Create daily targets"""
-    df["target_t1"] = df["pm2_5"].shift(-24)  # Tomorrow
-    df["target_t2"] = df["pm2_5"].shift(-48)  # Day after
-    df["target_t3"] = df["pm2_5"].shift(-72)  # 3rd day
-    return df
\ No newline at end of file
+    df["target_t1"] = _by_city(df, "pm2_5").shift(-24)  # Tomorrow
+    df["target_t2"] = _by_city(df, "pm2_5").shift(-48)  # Day after
+    df["target_t3"] = _by_city(df, "pm2_5").shift(-72)  # 3rd day
+    return df
+
+# -------------------- TIME-AWARE (GAP TOLERANT) FEATURES --------------------
+
+def _grid_positions(df: pd.DataFrame, freq: str = "1h"):
+    """Per-row slot on a regular per-city time grid, plus each city's grid span"""
+    step = pd.Timedelta(freq)
+    ts = df["timestamp"].dt.floor(freq)
+    keys = df[GROUP_COL] if GROUP_COL in df.columns else pd.Series(0, index=df.index)
+    
+    bounds = ts.groupby(keys, sort=True).agg(["min", "max"])
+    lengths = ((bounds["max"] - bounds["min"]) // step + 1).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    
+    code = pd.Index(bounds.index).get_indexer(keys)
+    slot = ((ts - bounds["min"].to_numpy()[code]) // step).to_numpy()
+    positions = offsets[code] + slot
+    
+    return positions, bounds, lengths, offsets
+
+def gap_statistics(df: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
+    """Missing-hour summary per city: expected vs observed rows and gap sizes"""
+    positions, bounds, lengths, offsets = _grid_positions(df, freq)
+    pos = np.unique(positions)
+    
+    city_of = np.searchsorted(offsets, pos, side="right") - 1
+    jumps = np.diff(pos) - 1
+    same_city = city_of[1:] == city_of[:-1]
+    gaps = np.where(same_city & (jumps > 0), jumps, 0)
+    
+    observed = np.bincount(city_of, minlength=len(lengths))
+    n_gaps = np.bincount(city_of[1:], weights=gaps > 0, minlength=len(lengths)).astype(int)
+    longest = np.zeros(len(lengths), dtype=int)
+    np.maximum.at(longest, city_of[1:], gaps)
+    
+    stats = pd.DataFrame({
+        "start": bounds["min"].to_numpy(),
+        "end": bounds["max"].to_numpy(),
+        "expected_rows": lengths,
+        "observed_rows": observed,
+        "missing_rows": lengths - observed,
+        "n_gaps": n_gaps,
+        "longest_gap": longest,
+    }, index=bounds.index)
+    stats["coverage"] = stats["observed_rows"] / stats["expected_rows"]
+    return stats
+
+def to_hourly_grid(df: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
+    """
+    Reindex each city onto a complete hourly grid in O(n).
+    
+    Missing hours become all-NaN rows flagged `_observed=False`, so plain
+    row shifts and windows on the grid are true timestamp offsets.
+    Timestamps are floored to `freq`; duplicates within a slot keep the last row.
+    """
+    positions, bounds, lengths, offsets = _grid_positions(df, freq)
+    total = int(lengths.sum())
+    
+    grid = df.set_index(pd.Index(positions)).loc[lambda d: ~d.index.duplicated(keep="last")]
+    grid = grid.reindex(pd.RangeIndex(total))
+    
+    # Rebuild the keys of the filler rows
+    city_idx = np.repeat(np.arange(len(lengths)), lengths)
+    slot = np.arange(total) - offsets[city_idx]
+    grid["timestamp"] = bounds["min"].to_numpy()[city_idx] + slot * pd.Timedelta(freq)
+    if GROUP_COL in df.columns:
+        grid[GROUP_COL] = bounds.index.to_numpy()[city_idx]
+    
+    grid["_observed"] = False
+    grid.loc[np.unique(positions), "_observed"] = True
+    return grid
+
+def engineer_on_hourly_grid(df: pd.DataFrame, steps, freq: str = "1h") -> pd.DataFrame:
+    """Run feature steps on the hourly grid and return only the observed rows"""
+    grid = to_hourly_grid(df, freq)
+    for step in steps:
+        grid = step(grid)
+    return grid[grid["_observed"]].drop(columns="_observed").reset_index(drop=True)
+
+@traced("features")
+def build_features(df: pd.DataFrame, time_aware: bool = True, targets: bool = True,
+                   compact: bool = False) -> pd.DataFrame:
+    """
+    Full feature chain shared by training and inference.
+    
+    With `time_aware`, lags, windows and targets are computed on an hourly
+    grid so dropped rows and missed runs do not shift them (see
+    gap_statistics for how much of the grid is missing).
+    
+    With `compact`, every step's output is narrowed right away (float32,
+    int8 flags, categories; see src.utils.schema), so the frame never holds
+    a full set of float64 feature columns.
+    """
+    steps = [
+        add_time_features,
+        lambda d: add_lag_features(d, target="pm2_5", lags=[24, 48, 72]),
+        add_rolling_features,
+        add_derived_features,
+    ]
+    if targets:
+        steps.append(create_targets)
+    if compact:
+        steps = [lambda d, step=step: compact_dtypes(step(d)) for step in steps]
+        df = compact_dtypes(df)
+    
+    if not time_aware:
+        for step in steps:
+            df = step(df)
+        return df
+    
+    return engineer_on_hourly_grid(df, steps)
@@ -0,0 +1,324 @@
+# src/features/online_features.py
+
+import math
+from collections import deque
+
+import joblib
+import pandas as pd
+
+from src.features.feature_engineering import GROUP_COL
+
+NAN = float("nan")
+
+# Same windows as add_rolling_features: (output column, source column, window, min_periods, stat)
+ROLLING_SPECS = [
+    ("aqi_roll24", "aqi", 24, 12, "mean"),
+    ("aqi_roll72", "aqi", 72, 36, "mean"),
+    ("aqi_std24", "aqi", 24, 12, "std"),
+    ("aqi_roll24_max", "aqi", 24, 12, "max"),
+    ("temp_roll24", "temp", 24, 12, "mean"),
+    ("wind_roll24", "wind_speed", 24, 12, "mean"),
+]
+
+# Same diffs as add_change_rate_features: (output column, source column)
+CHANGE_SPECS = [
+    ("pm2_5_change_rate", "pm2_5"),
+    ("aqi_change_24h", "aqi"),
+    ("temp_change_24h", "temp"),
+    ("wind_change_24h", "wind_speed"),
+]
+
+WEATHER_LAG_COLS = ["temp", "wind_speed", "humidity"]
+
+
+def _value(obs, col):
+    """Read a float from an observation, mapping missing values to NaN"""
+    value = obs.get(col)
+    if value is None:
+        return NAN
+    return float(value)
+
+
+class _RingBuffer:
+    """Fixed-size history of the last `capacity` values"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = [NAN] * capacity
+        self.pos = 0
+        self.count = 0
+
+    def push(self, value):
+        """Store a value and return the one it evicts (NaN while filling)"""
+        evicted = self.values[self.pos] if self.count == self.capacity else NAN
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return evicted
+
+    def replace_latest(self, value):
+        """Overwrite the most recent value and return the one it replaces"""
+        index = (self.pos - 1) % self.capacity
+        replaced, self.values[index] = self.values[index], value
+        return replaced
+
+    def ago(self, k):
+        """Value pushed k steps before the most recent one (k=0 is the latest)"""
+        if k >= self.count:
+            return NAN
+        return self.values[(self.pos - 1 - k) % self.capacity]
+
+
+class _KahanSum:
+    """Compensated running sum so long add/remove streams do not drift"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.comp = 0.0
+
+    def add(self, value):
+        y = value - self.comp
+        t = self.total + y
+        self.comp = (t - self.total) - y
+        self.total = t
+
+    def reset(self):
+        self.total = 0.0
+        self.comp = 0.0
+
+
+class _RollingWindow:
+    """
+    Rolling mean/std/max over the last `window` observations.
+
+    Mirrors pandas `rolling(window, min_periods)`: NaNs occupy a slot but are
+    not counted, and a statistic is NaN until `min_periods` valid values exist.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = _RingBuffer(window)
+        self.n_seen = 0
+        self.count = 0
+        self.sum = _KahanSum()
+        self.sumsq = _KahanSum()
+        self.max_deque = deque()  # (position, value), values decreasing
+
+    def push(self, value):
+        evicted = self.buffer.push(value)
+        position = self.n_seen
+        self.n_seen += 1
+
+        self._remove(evicted)
+
+        if not math.isnan(value):
+            self.count += 1
+            self.sum.add(value)
+            self.sumsq.add(value * value)
+            while self.max_deque and self.max_deque[-1][1] <= value:
+                self.max_deque.pop()
+            self.max_deque.append((position, value))
+
+        while self.max_deque and self.max_deque[0][0] <= position - self.window:
+            self.max_deque.popleft()
+
+    def _remove(self, value):
+        if not math.isnan(value):
+            self.count -= 1
+            self.sum.add(-value)
+            self.sumsq.add(-value * value)
+            if self.count == 0:
+                self.sum.reset()
+                self.sumsq.reset()
+
+    def replace_latest(self, value):
+        """Swap the latest value for `value` (a later reading of the same slot)"""
+        self._remove(self.buffer.replace_latest(value))
+        if not math.isnan(value):
+            self.count += 1
+            self.sum.add(value)
+            self.sumsq.add(value * value)
+
+        # Rare (duplicate hours only): rebuild the max deque from the buffer
+        self.max_deque.clear()
+        for k in range(self.buffer.count - 1, -1, -1):
+            v = self.buffer.ago(k)
+            if math.isnan(v):
+                continue
+            while self.max_deque and self.max_deque[-1][1] <= v:
+                self.max_deque.pop()
+            self.max_deque.append((self.n_seen - 1 - k, v))
+
+    def mean(self, min_periods):
+        if self.count < min_periods or self.count == 0:
+            return NAN
+        return self.sum.total / self.count
+
+    def std(self, min_periods):
+        if self.count < max(min_periods, 2):
+            return NAN
+        n = self.count
+        var = (self.sumsq.total - self.sum.total * self.sum.total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def max(self, min_periods):
+        if self.count < min_periods or not self.max_deque:
+            return NAN
+        return self.max_deque[0][1]
+
+
+class _SeriesState:
+    """History buffers and rolling windows of one city's hourly series"""
+
+    def __init__(self, history_cols, capacity):
+        self.history = {col: _RingBuffer(capacity) for col in sorted(history_cols)}
+        self.windows = {}
+        for _, col, window, _, _ in ROLLING_SPECS:
+            self.windows.setdefault((col, window), _RollingWindow(window))
+        self.last_slot = None
+
+    def push(self, obs):
+        for col, buffer in self.history.items():
+            buffer.push(_value(obs, col))
+        for (col, _), window in self.windows.items():
+            window.push(_value(obs, col))
+
+    def replace_latest(self, obs):
+        for col, buffer in self.history.items():
+            buffer.replace_latest(_value(obs, col))
+        for (col, _), window in self.windows.items():
+            window.replace_latest(_value(obs, col))
+
+
+class OnlineFeatureEngine:
+    """
+    Stateful, one-observation-at-a-time version of build_features' lag,
+    rolling and change-rate steps on the hourly grid (to_hourly_grid).
+
+    State is kept per city. Missing hours are pushed as empty slots, so
+    lags and windows are true timestamp offsets, and a second observation
+    in the same hour replaces the first, like the grid's keep="last".
+    Each `update` costs O(1) in history length, and the engine can be
+    checkpointed with `save`/`load` between hourly runs. Values match the
+    batch functions up to floating-point rounding of the running sums.
+    """
+
+    def __init__(self, target="pm2_5", lags=(24, 48, 72), freq="1h"):
+        self.target = target
+        self.lags = list(lags)
+        self.change_lag = 24
+        self.step = pd.Timedelta(freq)
+
+        self.history_cols = {target, "aqi", "pm2_5", *WEATHER_LAG_COLS}
+        for _, col in CHANGE_SPECS:
+            self.history_cols.add(col)
+        self.capacity = max(self.lags + [self.change_lag]) + 1
+
+        self.series = {}
+        self.n_updates = 0
+        self.last_timestamp = None
+
+    @property
+    def history_needed(self):
+        """Number of trailing hours required to fully warm the engine"""
+        windows = [window for _, _, window, _, _ in ROLLING_SPECS]
+        return max(self.lags + windows + [self.change_lag])
+
+    def _advance(self, state, obs):
+        """Move a city's series to the observation's slot, filling missing hours"""
+        timestamp = obs.get("timestamp")
+        if timestamp is None or pd.isna(timestamp):
+            state.push(obs)  # untimed rows are taken as the next hour
+            return
+
+        slot = pd.Timestamp(timestamp).floor(self.step)
+        if state.last_slot is None:
+            state.push(obs)
+        elif slot == state.last_slot:
+            state.replace_latest(obs)
+        elif slot < state.last_slot:
+            raise ValueError(f"Observation at {timestamp} is older than {state.last_slot}; "
+                             "feed each city in time order")
+        else:
+            missing = (slot - state.last_slot) // self.step - 1
+            # Past the longest lag/window every buffer is empty anyway
+            for _ in range(min(missing, self.capacity)):
+                state.push({})
+            state.push(obs)
+        state.last_slot = slot
+
+    def update(self, obs: dict) -> dict:
+        """Advance the observation's city by one observation and return its stateful features"""
+        city = obs.get(GROUP_COL)
+        state = self.series.get(city)
+        if state is None:
+            state = self.series[city] = _SeriesState(self.history_cols, self.capacity)
+        self._advance(state, obs)
+
+        self.n_updates += 1
+        self.last_timestamp = obs.get("timestamp", self.last_timestamp)
+
+        features = {}
+
+        # Lags (same column order as add_lag_features)
+        for lag in self.lags:
+            features[f"{self.target}_lag{lag}"] = state.history[self.target].ago(lag)
+            for col in WEATHER_LAG_COLS:
+                features[f"{col}_lag{lag}"] = state.history[col].ago(lag)
+
+        # Rolling statistics
+        for name, col, window, min_periods, stat in ROLLING_SPECS:
+            features[name] = getattr(state.windows[(col, window)], stat)(min_periods)
+
+        # Change rates
+        for name, col in CHANGE_SPECS:
+            buffer = state.history[col]
+            features[name] = buffer.ago(0) - buffer.ago(self.change_lag)
+
+        return features
+
+    def update_many(self, records) -> list:
+        """Feed several observations in order, returning features for each"""
+        return [self.update(obs) for obs in records]
+
+    def advance(self, df, lookback=0) -> pd.DataFrame:
+        """
+        Feed the rows of a cleaned frame that the engine has not seen yet.
+
+        A known city resumes at its newest hour (fed again, so a reading
+        that arrived late replaces it); a new one starts history_needed
+        hours before its newest `lookback` hours, so those get exact features.
+
+        Returns:
+            DataFrame: features of the fed rows, indexed like `df`
+        """
+        ts = df["timestamp"].dt.floor(self.step)
+        cities = df[GROUP_COL] if GROUP_COL in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+        resume = pd.Series(
+            [self.series[c].last_slot if c in self.series else None for c in cities],
+            index=df.index, dtype="datetime64[ns]",
+        )
+        warm = ts.groupby(cities, dropna=False).transform("max") - (self.history_needed + lookback) * self.step
+        rows = df[ts.ge(resume) | (resume.isna() & ts.ge(warm))].sort_values("timestamp", kind="stable")
+
+        return pd.DataFrame(self.update_many(rows.to_dict("records")), index=rows.index)
+
+    @classmethod
+    def from_history(cls, df, **kwargs):
+        """Warm up an engine from the last hours of each city in a cleaned frame"""
+        engine = cls(**kwargs)
+        engine.advance(df)
+        return engine
+
+    def save(self, path):
+        """Checkpoint the engine state to disk"""
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore an engine checkpointed with `save`"""
+        engine = joblib.load(path)
+        if not isinstance(engine, cls):
+            raise TypeError(f"{path} does not contain an {cls.__name__}")
+        return engine
@@ -1,132 +1,238 @@
-# app/dashboard.py
+# src/inference/predict_multi_day.py
 
 import os
 import pandas as pd
-import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import plotly.graph_objects as go
-from datetime import datetime
-import numpy as np
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from datetime import datetime, timedelta
+
+from src.utils.data_loader import load_data, get_client, CACHE_DIR
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import (
+    FEATURE_COLUMNS,
+    add_time_features,
+    add_weather_features,
+    add_pollutant_ratio_features,
+)
+from src.features.online_features import OnlineFeatureEngine
+from src.utils.aqi_converter import pm25_to_aqi, pm25_to_aqi_category
+from src.registry.model_cache import ModelCache
+from src.utils.tracing import span
+from src.storage.timeseries import write_forecasts, TIMESERIES_DB
+from src.storage.indexes import ensure_indexes
+from src.storage.connection import log_pool_stats
 
 load_dotenv()
 
-# -------------------- PAGE CONFIG --------------------
-st.set_page_config(
-    page_title="AQI Forecast - Karachi",
-    layout="wide",
-    page_icon="🌫️",
-    initial_sidebar_state="collapsed"
-)
-
-# -------------------- STYLE --------------------
-st.markdown("""
-<style>
-.main {background-color: #f5f7fa;}
-.stAlert {border-radius: 10px;}
-h1 {color: #1f2937;}
-h3 {color: #374151;}
-</style>
-""", unsafe_allow_html=True)
-
-# -------------------- DATABASE --------------------
-MONGODB_URI = os.getenv("MONGODB_URI")
 PREDICTION_DB = os.getenv("MONGODB_PREDICTION_DB", "aqi_db")
 PREDICTION_COLLECTION = os.getenv("MONGODB_PREDICTION_COLLECTION", "predictions")
-FEATURE_DB = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
-FEATURE_COLLECTION = os.getenv("MONGODB_FEATURE_COLLECTION", "aqi_features")
-
-try:
-    client = MongoClient(MONGODB_URI, tlsInsecure=True, serverSelectionTimeoutMS=5000)
-    prediction_collection = client[PREDICTION_DB][PREDICTION_COLLECTION]
-    feature_collection = client[FEATURE_DB][FEATURE_COLLECTION]
-except Exception as e:
-    st.error(f"❌ Database connection failed: {e}")
-    st.stop()
-
-# -------------------- AQI FUNCTION (ABSOLUTELY SAFE) --------------------
-def pm25_to_aqi(pm25):
-    try:
-        pm25 = float(pm25)
-
-        # HARD BLOCK NaN / inf
-        if not np.isfinite(pm25) or pm25 < 0:
-            return 0
-
-        if pm25 <= 12.0:
-            aqi = 50 * pm25 / 12.0
-        elif pm25 <= 35.4:
-            aqi = ((100 - 51) / (35.4 - 12.1)) * (pm25 - 12.1) + 51
-        elif pm25 <= 55.4:
-            aqi = ((150 - 101) / (55.4 - 35.5)) * (pm25 - 35.5) + 101
-        elif pm25 <= 150.4:
-            aqi = ((200 - 151) / (150.4 - 55.5)) * (pm25 - 55.5) + 151
-        elif pm25 <= 250.4:
-            aqi = ((300 - 201) / (250.4 - 150.5)) * (pm25 - 150.5) + 201
-        else:
-            aqi = ((500 - 301) / (500.4 - 250.5)) * (pm25 - 250.5) + 301
-
-        if not np.isfinite(aqi):
-            return 0
-
-        return int(round(aqi))
-
-    except Exception:
-        return 0
-
-# -------------------- UI HELPERS --------------------
-def get_aqi_color(aqi):
-    if aqi <= 50: return "#00e400"
-    elif aqi <= 100: return "#ffff00"
-    elif aqi <= 150: return "#ff7e00"
-    elif aqi <= 200: return "#ff0000"
-    elif aqi <= 300: return "#8f3f97"
-    else: return "#7e0023"
-
-def get_health_message(aqi):
-    if aqi <= 50:
-        return "😊 Excellent air quality."
-    elif aqi <= 100:
-        return "🙂 Acceptable air quality."
-    elif aqi <= 150:
-        return "😐 Sensitive groups be cautious."
-    elif aqi <= 200:
-        return "😷 Unhealthy air."
-    elif aqi <= 300:
-        return "⚠️ Very unhealthy."
+# Forecasts live in the time-series collections (src.storage.timeseries); the nested
+# per-run documents are only written while a deployment still reads them
+WRITE_LEGACY_PREDICTIONS = os.getenv("MONGODB_WRITE_LEGACY_PREDICTIONS", "false").lower() in ("1", "true", "yes")
+# One document per city (_id = city) holding its newest forecast
+LATEST_COLLECTION = os.getenv("MONGODB_LATEST_COLLECTION", "latest_forecast")
+
+HORIZONS = {"t_plus_1": 24, "t_plus_2": 48, "t_plus_3": 72}
+
+# Online feature state, cached with the data between hourly runs: the engine
+# checkpoint and each city's last scorable feature row
+ONLINE_STATE_DIR = os.getenv("AQI_ONLINE_STATE_DIR", os.path.join(CACHE_DIR, "online"))
+# Hours before the newest one a fresh engine computes exactly, i.e. how far
+# back a city without a complete newest row can fall back on a cold start
+WARM_LOOKBACK_HOURS = int(os.getenv("AQI_ONLINE_WARM_LOOKBACK_HOURS", "24"))
+
+# "per_horizon" (aqi_t_plus_{1,2,3}) or "multi_output" (aqi_multi_horizon)
+MODEL_MODE = os.getenv("AQI_MODEL_MODE", "per_horizon")
+MULTI_OUTPUT_MODEL_NAME = "aqi_multi_horizon"
+
+def load_production_models(cache=None, mode=None):
+    """Load the @production models, going through the local model cache"""
+    cache = cache or ModelCache()
+    models, versions = {}, {}
+
+    if (mode or MODEL_MODE) == "multi_output":
+        model, version, source = cache.load(MULTI_OUTPUT_MODEL_NAME, alias="production")
+        print(f"✅ {MULTI_OUTPUT_MODEL_NAME} v{version} ({source})")
+        return {MULTI_OUTPUT_MODEL_NAME: model}, {MULTI_OUTPUT_MODEL_NAME: version}
+
+    for horizon in HORIZONS:
+        name = f"aqi_{horizon}"
+        model, version, source = cache.load(name, alias="production")
+        models[horizon] = model
+        versions[horizon] = version
+        print(f"✅ {name} v{version} ({source})")
+
+    return models, versions
+
+def load_online_state(state_dir=None):
+    """The checkpointed engine (a fresh one warms itself up) and the last scored rows"""
+    state_dir = state_dir or ONLINE_STATE_DIR
+    engine_path = os.path.join(state_dir, "engine.pkl")
+    rows_path = os.path.join(state_dir, "latest.parquet")
+
+    engine, previous = None, None
+    if os.path.exists(engine_path):
+        try:
+            engine = OnlineFeatureEngine.load(engine_path)
+        except Exception as e:
+            print(f"⚠️ Online feature checkpoint unusable ({type(e).__name__}), warming up from history")
+    if engine is not None and os.path.exists(rows_path):
+        previous = pd.read_parquet(rows_path)
+    return engine or OnlineFeatureEngine(), previous
+
+def save_online_state(engine, latest, state_dir=None):
+    state_dir = state_dir or ONLINE_STATE_DIR
+    os.makedirs(state_dir, exist_ok=True)
+    engine.save(os.path.join(state_dir, "engine.pkl"))
+    latest.to_parquet(os.path.join(state_dir, "latest.parquet"), index=False)
+
+def latest_features(df: pd.DataFrame, engine=None, previous=None) -> pd.DataFrame:
+    """
+    Newest fully-featured row per city.
+
+    Lags, windows and change rates come from the online engine, which is
+    fed only the rows it has not seen yet; the other features depend on
+    the row alone. A newest row with missing inputs (e.g. the weather
+    request failed that hour) falls back to the city's last complete one,
+    from this batch or from `previous` (the rows scored last run).
+    """
+    engine = engine or OnlineFeatureEngine()
+    online = engine.advance(df, lookback=WARM_LOOKBACK_HOURS)
+    rows = df.loc[online.index].drop(columns=online.columns, errors="ignore")
+    fresh = add_pollutant_ratio_features(add_weather_features(add_time_features(rows))).join(online)
+    newest = fresh.groupby("city", sort=False)["timestamp"].max()
+
+    candidates = fresh if previous is None else pd.concat([previous, fresh], ignore_index=True)
+    complete = candidates[FEATURE_COLUMNS].notna().all(axis=1)
+    latest = candidates[complete].sort_values("timestamp", kind="stable").groupby("city", sort=False).tail(1)
+
+    for city in newest.index.difference(latest["city"]):
+        print(f"⚠️ {city}: not enough history for all features, skipping")
+    for city, ts in latest.set_index("city")["timestamp"].items():
+        if city in newest and ts < newest[city]:
+            print(f"⚠️ {city}: newest rows are incomplete, using the observation at {ts}")
+
+    return latest.reset_index(drop=True)
+
+def predict(models, latest: pd.DataFrame, versions=None):
+    """Forecast documents, one per city"""
+    X = latest[FEATURE_COLUMNS]
+    if MULTI_OUTPUT_MODEL_NAME in models:
+        # One predict call returns every horizon as a column
+        Y = models[MULTI_OUTPUT_MODEL_NAME].predict(X)
+        preds = {h: Y[:, i] for i, h in enumerate(HORIZONS)}
     else:
-        return "🚨 Hazardous air quality."
-
-# -------------------- HEADER --------------------
-st.title("🌫️ Karachi AQI 3-Day Forecast")
-
-# -------------------- CURRENT AQI --------------------
-current = list(feature_collection.find().sort("timestamp", -1).limit(1))
-current = current[0] if current else {}
-
-current_aqi = int(current.get("aqi", 0))
-current_pm25 = float(current.get("pm2_5", 0))
-current_time = current.get("timestamp", datetime.utcnow())
-
-# -------------------- LOAD PREDICTIONS --------------------
-data = list(prediction_collection.find().sort("timestamp", -1).limit(48))
-if not data:
-    st.warning("No forecast data yet.")
-    st.stop()
-
-df = pd.json_normalize(data)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
-df = df.sort_values("timestamp")
-
-df["t1_pm25"] = pd.to_numeric(df["forecasts.t_plus_1.pm25_prediction"], errors="coerce")
-df["t2_pm25"] = pd.to_numeric(df["forecasts.t_plus_2.pm25_prediction"], errors="coerce")
-df["t3_pm25"] = pd.to_numeric(df["forecasts.t_plus_3.pm25_prediction"], errors="coerce")
-
-df = df.fillna(0)
+        preds = {h: models[h].predict(X) for h in HORIZONS}
+    now = datetime.utcnow()
+
+    docs = []
+    for i, row in latest.iterrows():
+        observed = pd.Timestamp(row["timestamp"]).to_pydatetime()
+        forecasts = {}
+        for horizon, hours in HORIZONS.items():
+            pm25 = max(float(preds[horizon][i]), 0.0)
+            code, label = pm25_to_aqi_category(pm25)
+            forecasts[horizon] = {
+                "target_time": observed + timedelta(hours=hours),
+                "pm25_prediction": round(pm25, 2),
+                "aqi": pm25_to_aqi(pm25),
+                "aqi_category_code": code,
+                "aqi_category_label": label,
+            }
+
+        docs.append({
+            "city": row["city"],
+            "timestamp": now,
+            "observation_time": observed,
+            "current": {"pm2_5": float(row["pm2_5"]), "aqi": int(row["aqi"])},
+            "forecasts": forecasts,
+            "model_versions": versions or {},
+        })
+
+    return docs
+
+def update_latest(coll, docs):
+    """
+    Materialize each city's newest forecast under _id = city.
+    
+    Every ReplaceOne swaps the whole document atomically, so readers see
+    either the previous run or this one. A run whose observation is older
+    than what is stored (e.g. a late rerun) does not overwrite it.
+    """
+    ops = []
+    for doc in docs:
+        latest = {k: v for k, v in doc.items() if k != "_id"}
+        latest["_id"] = doc["city"]
+        ops.append(ReplaceOne(
+            {"_id": doc["city"], "observation_time": {"$not": {"$gt": doc["observation_time"]}}},
+            latest, upsert=True
+        ))
+    if not ops:
+        return 0
+    try:
+        result = coll.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate _id: the stored forecast is newer, the filter skipped it
+        stale = [err for err in e.details["writeErrors"] if err["code"] == 11000]
+        if len(stale) != len(e.details["writeErrors"]):
+            raise
+        return e.details["nUpserted"] + e.details["nModified"]
+    return result.upserted_count + result.modified_count
+
+def run():
+    print("="*60)
+    print("🔮 HOURLY MULTI-DAY AQI PREDICTION")
+    print("="*60)
 
-df["t1_aqi"] = df["t1_pm25"].apply(pm25_to_aqi)
-df["t2_aqi"] = df["t2_pm25"].apply(pm25_to_aqi)
-df["t3_aqi"] = df["t3_pm25"].apply(pm25_to_aqi)
+    try:
+        from src.registry.tracking import init_tracking
+        init_tracking()
+    except Exception as e:
+        # The model cache falls back to the last good versions
+        print(f"⚠️ Tracking server init failed: {e}")
 
-# -------------------- DONE --------------------
-st.success("✅ Dashboard loaded safely — no NaN crashes")
+    try:
+        ensure_indexes(get_client())
+    except PyMongoError as e:
+        print(f"⚠️ Could not ensure indexes: {e}")
+
+    with span("load_models"):
+        models, versions = load_production_models()
+
+    print("\n📥 Loading data...")
+    df = clean_data(load_data(incremental=True))
+    engine, previous = load_online_state()
+    with span("features", rows=len(df)):
+        latest = latest_features(df, engine, previous)
+    if latest.empty:
+        print("❌ No city has enough history to predict")
+        exit(1)
+
+    with span("predict", rows=len(latest)):
+        docs = predict(models, latest, versions)
+
+    with span("write", rows=len(docs)):
+        client = get_client()
+        try:
+            write_forecasts(client[TIMESERIES_DB], docs)
+        except PyMongoError as e:
+            # The history misses this run, but the dashboard's current forecast still updates
+            print(f"⚠️ Time-series write failed: {e}")
+        update_latest(client[PREDICTION_DB][LATEST_COLLECTION], docs)
+        if WRITE_LEGACY_PREDICTIONS:
+            # insert_many adds _id to the docs, so it goes last
+            client[PREDICTION_DB][PREDICTION_COLLECTION].insert_many(docs)
+
+    for doc in docs:
+        summary = ", ".join(
+            f"{h}: {f['pm25_prediction']} µg/m³ ({f['aqi_category_label']})"
+            for h, f in doc["forecasts"].items()
+        )
+        print(f"📍 {doc['city']} → {summary}")
+    print(f"\n✅ Stored {len(docs)} predictions")
+    save_online_state(engine, latest)
+    log_pool_stats()
+
+if __name__ == "__main__":
+    run()
@@ -77,147 +77,67 @@
 # src/ingestion/backfill_with_weather.py
 
 import os
-import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from pymongo import MongoClient
+
+from src.ingestion.backfill_engine import BackfillEngine
+from src.ingestion.writer import upsert_records
+from src.utils.tracing import span
+from src.utils.data_loader import get_feature_collection
+from src.storage.indexes import ensure_indexes
 
 load_dotenv()
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
-MONGO_URI = os.getenv("MONGODB_URI")
-DB_NAME = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
-COLLECTION_NAME = os.getenv("MONGODB_FEATURE_COLLECTION", "aqi_features")
 
-client = MongoClient(MONGO_URI, tlsInsecure=True)
-collection = client[DB_NAME][COLLECTION_NAME]
+CHECKPOINT_DIR = os.getenv("BACKFILL_CHECKPOINT_DIR", os.path.join("data", "backfill_checkpoints"))
+MAX_WORKERS = int(os.getenv("BACKFILL_MAX_WORKERS", "4"))
+RATE_PER_SEC = float(os.getenv("BACKFILL_RATE_PER_SEC", "5"))
+CHUNK_HOURS = int(os.getenv("BACKFILL_CHUNK_HOURS", str(24 * 7)))
 
 # Karachi
 LAT = 24.8607
 LON = 67.0011
 CITY = "Karachi"
 
-AQI_URL = "http://api.openweathermap.org/data/2.5/air_pollution/history"
-WEATHER_URL = "http://api.openweathermap.org/data/2.5/onecall/timemachine"
-
-def fetch_weather_for_timestamp(ts):
-    """Fetch weather data for specific timestamp"""
-    params = {
-        "lat": LAT,
-        "lon": LON,
-        "dt": int(ts.timestamp()),
-        "appid": API_KEY
-    }
-    
-    try:
-        response = requests.get(WEATHER_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'current' in data:
-            weather = data['current']
-            return {
-                "temp": weather.get("temp", 0) - 273.15,  # Convert to Celsius
-                "humidity": weather.get("humidity", 0),
-                "pressure": weather.get("pressure", 0),
-                "wind_speed": weather.get("wind_speed", 0),
-                "wind_deg": weather.get("wind_deg", 0),
-                "clouds": weather.get("clouds", 0),
-                "weather_main": weather.get("weather", [{}])[0].get("main", "Clear") if weather.get("weather") else "Clear"
-            }
-    except:
-        pass
-    
-    return {
-        "temp": 0, "humidity": 0, "pressure": 0,
-        "wind_speed": 0, "wind_deg": 0, "clouds": 0,
-        "weather_main": "Unknown"
-    }
-
 def backfill_with_weather(days=90):
     """Backfill AQI + Weather data"""
-    end = datetime.utcnow()
+    # Align to the hour so reruns produce the same chunks (and hit checkpoints)
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
     start = end - timedelta(days=days)
 
-    # Fetch AQI data
-    params = {
-        "lat": LAT,
-        "lon": LON,
-        "start": int(start.timestamp()),
-        "end": int(end.timestamp()),
-        "appid": API_KEY
-    }
-
-    print(f"📡 Fetching AQI for {days} days...")
-    response = requests.get(AQI_URL, params=params, timeout=30)
-    response.raise_for_status()
-
-    aqi_data = response.json()["list"]
-    print(f"✅ Received {len(aqi_data)} AQI records")
-    
-    # Sample weather data (every 24 hours to save API calls)
-    print(f"🌤️ Fetching weather data (sampling every 24h)...")
-    weather_cache = {}
-    
-    for i in range(0, len(aqi_data), 24):  # Every 24 hours
-        record = aqi_data[i]
-        ts = datetime.utcfromtimestamp(record["dt"])
-        weather = fetch_weather_for_timestamp(ts)
-        weather_cache[ts.date()] = weather
-        
-        if i % 240 == 0:  # Progress every 10 days
-            print(f"  Fetched weather for {ts.date()}")
-
-    # Merge AQI + Weather
-    print(f"🔄 Merging AQI + Weather...")
-    docs = []
-    for record in aqi_data:
-        components = record["components"]
-        ts = datetime.utcfromtimestamp(record["dt"])
-        
-        # Get weather (use cached data from same day)
-        weather = weather_cache.get(ts.date(), {
-            "temp": 0, "humidity": 0, "pressure": 0,
-            "wind_speed": 0, "wind_deg": 0, "clouds": 0,
-            "weather_main": "Unknown"
-        })
-
-        doc = {
-            "city": CITY,
-            "lat": LAT,
-            "lon": LON,
-            "timestamp": ts,
-            # AQI data
-            "aqi": record["main"]["aqi"],
-            "pm2_5": components.get("pm2_5", 0),
-            "pm10": components.get("pm10", 0),
-            "co": components.get("co", 0),
-            "no2": components.get("no2", 0),
-            "o3": components.get("o3", 0),
-            "so2": components.get("so2", 0),
-            "nh3": components.get("nh3", 0),
-            # Weather data
-            "temp": weather.get("temp", 0),
-            "humidity": weather.get("humidity", 0),
-            "pressure": weather.get("pressure", 0),
-            "wind_speed": weather.get("wind_speed", 0),
-            "wind_deg": weather.get("wind_deg", 0),
-            "clouds": weather.get("clouds", 0),
-            "weather_main": weather.get("weather_main", "Unknown"),
-            "ingestion_time": datetime.utcnow(),
-            "source": "backfill_with_weather"
-        }
-        docs.append(doc)
+    engine = BackfillEngine(
+        API_KEY, LAT, LON, CITY,
+        checkpoint_dir=CHECKPOINT_DIR,
+        chunk_hours=CHUNK_HOURS,
+        max_workers=MAX_WORKERS,
+        rate_per_sec=RATE_PER_SEC,
+    )
+
+    print(f"📡 Fetching AQI + weather for {days} days...")
+    with span("backfill", days=days) as s:
+        records, failed = engine.run(start, end)
+        s.rows = len(records)
+
+    if failed:
+        print(f"❌ {len(failed)} chunks failed; rerun to resume from the checkpoints in {CHECKPOINT_DIR}")
+        return
+
+    ingestion_time = datetime.utcnow()
+    docs = [{**r, "ingestion_time": ingestion_time, "source": "backfill_with_weather"} for r in records]
 
     if docs:
-        collection.delete_many({"source": "backfill_with_weather"})
-        collection.insert_many(docs)
-        print(f"✅ Inserted {len(docs)} records with weather data")
-        print(f"📊 Total in DB: {collection.count_documents({})}")
+        collection = get_feature_collection()
+        with span("write", rows=len(docs)):
+            stats = upsert_records(collection, docs)
+        print(f"✅ Upserted {len(docs)} records with weather data "
+              f"({stats['upserted']} new, {stats['modified']} updated)")
+        print(f"📊 Total in DB: {collection.estimated_document_count()}")
 
 if __name__ == "__main__":
     if not os.getenv("OPENWEATHER_API_KEY"):
         print("❌ Get API key at: https://openweathermap.org/api")
         exit(1)
     
-    backfill_with_weather(days=90)
\ No newline at end of file
+    ensure_indexes()
+    backfill_with_weather(days=90)
@@ -0,0 +1,243 @@
+# src/ingestion/backfill_engine.py
+
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+AQI_URL = "http://api.openweathermap.org/data/2.5/air_pollution/history"
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/onecall/timemachine"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+WEATHER_FIELDS = ["temp", "humidity", "pressure", "wind_speed", "wind_deg", "clouds", "weather_main"]
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class BackfillError(RuntimeError):
+    """Raised when a request still fails after all retries"""
+
+# Chunk boundaries are multiples of chunk_hours since this instant (UTC, naive like utcnow())
+CHUNK_EPOCH = datetime(1970, 1, 1)
+
+def chunk_range(start, end, chunk_hours=24 * 7):
+    """
+    Split [start, end) into chunks on a fixed grid of `chunk_hours` cells
+    counted from CHUNK_EPOCH. Only the first and last chunk can be partial,
+    so a rerun with a later `start`/`end` produces the same interior chunks
+    (and checkpoint keys) as the run it resumes.
+    """
+    chunks = []
+    step = timedelta(hours=chunk_hours)
+    cursor = CHUNK_EPOCH + ((start - CHUNK_EPOCH) // step) * step
+    while cursor < end:
+        chunks.append((max(cursor, start), min(cursor + step, end)))
+        cursor += step
+    return chunks
+
+class BackfillEngine:
+    """
+    Chunked, concurrent, rate-limited and resumable AQI + weather backfill.
+
+    Each chunk fetches its AQI history plus one weather sample per day, with
+    retries and exponential backoff. Finished chunks are checkpointed as JSON
+    files, so rerunning after an interruption only fetches what is missing.
+    A chunk whose weather cannot be fetched fails instead of being zero-filled.
+    """
+
+    def __init__(self, api_key, lat, lon, city, checkpoint_dir,
+                 chunk_hours=24 * 7, max_workers=4, rate_per_sec=5,
+                 max_retries=4, backoff=0.5, timeout=30,
+                 aqi_url=AQI_URL, weather_url=WEATHER_URL):
+        self.api_key = api_key
+        self.lat = lat
+        self.lon = lon
+        self.city = city
+        self.checkpoint_dir = checkpoint_dir
+        self.chunk_hours = chunk_hours
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.aqi_url = aqi_url
+        self.weather_url = weather_url
+        self.bucket = TokenBucket(rate_per_sec)
+
+        # One pooled session shared by all worker threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    # -------------------- HTTP --------------------
+
+    def _get_json(self, url, params):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                if getattr(e, "response", None) is not None and e.response.status_code not in RETRY_STATUS:
+                    raise BackfillError(f"{url} failed: {e}") from e
+                error = str(e)
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+        raise BackfillError(f"{url} failed after {self.max_retries + 1} attempts: {error}")
+
+    def fetch_aqi(self, start, end):
+        params = {
+            "lat": self.lat, "lon": self.lon,
+            "start": int(start.timestamp()), "end": int(end.timestamp()),
+            "appid": self.api_key
+        }
+        return self._get_json(self.aqi_url, params).get("list", [])
+
+    def fetch_weather(self, ts):
+        params = {"lat": self.lat, "lon": self.lon, "dt": int(ts.timestamp()), "appid": self.api_key}
+        data = self._get_json(self.weather_url, params)
+
+        if "current" not in data:
+            raise BackfillError(f"No weather returned for {ts}")
+
+        weather = data["current"]
+        return {
+            "temp": weather.get("temp", 0) - 273.15,  # Convert to Celsius
+            "humidity": weather.get("humidity", 0),
+            "pressure": weather.get("pressure", 0),
+            "wind_speed": weather.get("wind_speed", 0),
+            "wind_deg": weather.get("wind_deg", 0),
+            "clouds": weather.get("clouds", 0),
+            "weather_main": weather.get("weather", [{}])[0].get("main", "Clear") if weather.get("weather") else "Clear"
+        }
+
+    # -------------------- CHECKPOINTS --------------------
+
+    def _checkpoint_path(self, start, end):
+        name = f"{self.city}_{start:%Y%m%d%H}_{end:%Y%m%d%H}.json"
+        return os.path.join(self.checkpoint_dir, name)
+
+    def _load_checkpoint(self, start, end):
+        path = self._checkpoint_path(start, end)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            records = json.load(f)
+        for r in records:
+            r["timestamp"] = datetime.fromisoformat(r["timestamp"])
+        return records
+
+    def _save_checkpoint(self, start, end, records):
+        path = self._checkpoint_path(start, end)
+        with open(path + ".tmp", "w") as f:
+            json.dump(records, f, default=lambda v: v.isoformat())
+        os.replace(path + ".tmp", path)
+
+    # -------------------- CHUNKS --------------------
+
+    def fetch_chunk(self, start, end):
+        """AQI for the chunk merged with one weather sample per day"""
+        aqi_data = self.fetch_aqi(start, end)
+
+        weather_cache = {}
+        for record in aqi_data:
+            ts = datetime.utcfromtimestamp(record["dt"])
+            if ts.date() not in weather_cache:
+                weather_cache[ts.date()] = self.fetch_weather(ts)
+
+        records = []
+        for record in aqi_data:
+            components = record["components"]
+            ts = datetime.utcfromtimestamp(record["dt"])
+            weather = weather_cache[ts.date()]
+
+            records.append({
+                "city": self.city,
+                "lat": self.lat,
+                "lon": self.lon,
+                "timestamp": ts,
+                # AQI data
+                "aqi": record["main"]["aqi"],
+                "pm2_5": components.get("pm2_5", 0),
+                "pm10": components.get("pm10", 0),
+                "co": components.get("co", 0),
+                "no2": components.get("no2", 0),
+                "o3": components.get("o3", 0),
+                "so2": components.get("so2", 0),
+                "nh3": components.get("nh3", 0),
+                # Weather data
+                **{k: weather[k] for k in WEATHER_FIELDS},
+            })
+
+        return records
+
+    def _run_chunk(self, start, end):
+        records = self.fetch_chunk(start, end)
+        self._save_checkpoint(start, end, records)
+        return records
+
+    def run(self, start, end):
+        """
+        Backfill [start, end). Returns (records, failed_chunks); failed chunks
+        are not checkpointed and are retried by the next run.
+        """
+        chunks = chunk_range(start, end, self.chunk_hours)
+        results = {}
+        pending = []
+
+        for chunk in chunks:
+            cached = self._load_checkpoint(*chunk)
+            if cached is None:
+                pending.append(chunk)
+            else:
+                results[chunk] = cached
+
+        print(f"📦 {len(chunks)} chunks: {len(results)} checkpointed, {len(pending)} to fetch")
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._run_chunk, *chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    results[chunk] = future.result()
+                    print(f"  ✅ {chunk[0]:%Y-%m-%d} → {chunk[1]:%Y-%m-%d}: {len(results[chunk])} records")
+                except BackfillError as e:
+                    failed.append(chunk)
+                    print(f"  ❌ {chunk[0]:%Y-%m-%d} → {chunk[1]:%Y-%m-%d}: {e}")
+
+        records = [r for chunk in chunks if chunk in results for r in results[chunk]]
+        return records, sorted(failed)
@@ -1,32 +1,79 @@
 # src/ingestion/fetch_data.py
 
 import os
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo.errors import PyMongoError
+
+from src.utils.data_loader import get_feature_collection
+from src.ingestion.writer import upsert_records
+from src.ingestion.locations import load_locations
+from src.utils.tracing import span
+from src.storage.timeseries import write_observations, TIMESERIES_DB
+from src.storage.indexes import ensure_indexes
+from src.storage.connection import log_pool_stats
 
 load_dotenv()
 
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
-# KARACHI coordinates (not Lahore!)
+# KARACHI coordinates (not Lahore!) - default when no location is given
 LAT = 24.8607
 LON = 67.0011
 CITY = "Karachi"
 
 BASE_URL = "https://api.openweathermap.org/data/2.5/air_pollution"
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+
+def make_session(pool_size=MAX_WORKERS):
+    """HTTP session whose connection pool is shared by all fetch threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-def fetch_aqi_data():
+def fetch_weather(location, session=None, weather_url=WEATHER_URL):
+    """Current weather at a location, in the units the backfill stores"""
+    http = session or requests
+    params = {"lat": location["lat"], "lon": location["lon"], "appid": OPENWEATHER_API_KEY}
+
+    response = http.get(weather_url, params=params, timeout=10)
+    response.raise_for_status()
+
+    data = response.json()
+    main, wind = data.get("main", {}), data.get("wind", {})
+    return {
+        "temp": main["temp"] - 273.15,  # Convert to Celsius
+        "humidity": main.get("humidity"),
+        "pressure": main.get("pressure"),
+        "wind_speed": wind.get("speed"),
+        "wind_deg": wind.get("deg"),
+        "clouds": data.get("clouds", {}).get("all"),
+        "weather_main": data["weather"][0].get("main", "Clear") if data.get("weather") else "Clear",
+    }
+
+def fetch_aqi_data(location=None, session=None, base_url=BASE_URL, weather_url=WEATHER_URL):
     if not OPENWEATHER_API_KEY:
         raise ValueError("OPENWEATHER_API_KEY not found in .env")
 
+    location = location or {"city": CITY, "lat": LAT, "lon": LON}
+    http = session or requests
+
     params = {
-        "lat": LAT,
-        "lon": LON,
+        "lat": location["lat"],
+        "lon": location["lon"],
         "appid": OPENWEATHER_API_KEY
     }
 
-    response = requests.get(BASE_URL, params=params, timeout=10)
+    response = http.get(base_url, params=params, timeout=10)
     response.raise_for_status()
 
     data = response.json()
@@ -34,9 +81,9 @@ def fetch_aqi_data():
     components = record["components"]
 
     result = {
-        "city": CITY,
-        "lat": LAT,
-        "lon": LON,
+        "city": location["city"],
+        "lat": location["lat"],
+        "lon": location["lon"],
         "timestamp": datetime.utcfromtimestamp(record["dt"]),
         "aqi": record["main"]["aqi"],
         "pm2_5": components.get("pm2_5", 0),
@@ -48,7 +95,72 @@ def fetch_aqi_data():
         "nh3": components.get("nh3", 0)
     }
 
+    # Weather features are model inputs too; without them the row is stored
+    # but cannot be scored or trained on (inference falls back to an older row)
+    try:
+        result.update(fetch_weather(location, session=session, weather_url=weather_url))
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+        print(f"  ⚠️ {location['city']}: weather unavailable ({type(e).__name__}: {e})")
+
     return result
 
+def fetch_all_locations(locations=None, max_workers=MAX_WORKERS, base_url=BASE_URL, weather_url=WEATHER_URL):
+    """
+    Poll every registered location concurrently.
+    
+    A failing location is reported but does not affect the others.
+    
+    Returns:
+        tuple: (records:list[dict], errors:dict[city -> message])
+    """
+    locations = locations if locations is not None else load_locations()
+    session = make_session(max_workers)
+    
+    def fetch_one(location):
+        try:
+            return fetch_aqi_data(location, session=session, base_url=base_url, weather_url=weather_url), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(fetch_one, locations))
+    session.close()
+    
+    records = [record for record, _ in results if record is not None]
+    errors = {loc["city"]: error for loc, (_, error) in zip(locations, results) if error}
+    
+    print(f"📡 Fetched {len(records)}/{len(locations)} locations in {time.perf_counter() - start:.2f}s")
+    for city, error in errors.items():
+        print(f"  ⚠️ {city}: {error}")
+    
+    return records, errors
+
+def save_records(records):
+    """Upsert fetched records into the feature collection, then append them to the time-series copy"""
+    coll = get_feature_collection()
+    stats = upsert_records(coll, records)
+    try:
+        write_observations(coll.database.client[TIMESERIES_DB], records)
+    except PyMongoError as e:
+        # The feature collection stays the source of truth; src.storage.migrate can backfill
+        print(f"⚠️ Time-series write failed: {e}")
+    return stats
+
 if __name__ == "__main__":
-    print(fetch_aqi_data())
\ No newline at end of file
+    try:
+        ensure_indexes()
+    except PyMongoError as e:
+        print(f"⚠️ Could not ensure indexes: {e}")
+
+    with span("fetch") as s:
+        records, errors = fetch_all_locations()
+        s.rows = len(records)
+    if records:
+        with span("write", rows=len(records)):
+            stats = save_records(records)
+        print(f"✅ Upserted {len(records)} records "
+              f"({stats['upserted']} new, {stats['modified']} updated)")
+        log_pool_stats()
+    if not records and errors:
+        exit(1)
@@ -0,0 +1,35 @@
+# src/ingestion/locations.py
+
+import os
+import yaml
+
+CONFIG_PATH = os.getenv(
+    "AQI_LOCATIONS_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "config", "config.yaml")
+)
+
+def load_locations(path=None):
+    """
+    Read the location registry.
+    
+    Returns:
+        list[dict]: each with `city`, `lat` and `lon`
+    """
+    path = path or CONFIG_PATH
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    
+    locations = []
+    seen = set()
+    for entry in config.get("locations", []):
+        missing = {"city", "lat", "lon"} - set(entry)
+        if missing:
+            raise ValueError(f"Location {entry} is missing {sorted(missing)}")
+        if entry["city"] in seen:
+            raise ValueError(f"Duplicate location: {entry['city']}")
+        seen.add(entry["city"])
+        locations.append({"city": str(entry["city"]), "lat": float(entry["lat"]), "lon": float(entry["lon"])})
+    
+    if not locations:
+        raise ValueError(f"No locations configured in {path}")
+    return locations
@@ -0,0 +1,67 @@
+# src/ingestion/writer.py
+
+import os
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne, DeleteMany
+from pymongo.errors import OperationFailure
+
+# One document per city and hour
+KEY_FIELDS = ("city", "timestamp")
+KEY_INDEX_NAME = "city_timestamp_unique"
+
+BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "1000"))
+
+def remove_duplicate_keys(coll):
+    """Keep the newest document per (city, timestamp) so the unique index can build"""
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": {k: f"${k}" for k in KEY_FIELDS}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ]
+    stale = [oid for group in coll.aggregate(pipeline, allowDiskUse=True) for oid in group["ids"][:-1]]
+    
+    removed = 0
+    for start in range(0, len(stale), BATCH_SIZE):
+        removed += coll.bulk_write([DeleteMany({"_id": {"$in": stale[start:start + BATCH_SIZE]}})]).deleted_count
+    return removed
+
+def ensure_unique_key(coll):
+    """Idempotently create the unique (city, timestamp) index"""
+    keys = [(k, ASCENDING) for k in KEY_FIELDS]
+    try:
+        coll.create_index(keys, unique=True, name=KEY_INDEX_NAME)
+    except OperationFailure as e:
+        if e.code != 11000:  # anything but duplicate keys
+            raise
+        removed = remove_duplicate_keys(coll)
+        print(f"🧹 Removed {removed} duplicate (city, timestamp) documents")
+        coll.create_index(keys, unique=True, name=KEY_INDEX_NAME)
+
+def upsert_records(coll, records, batch_size=BATCH_SIZE):
+    """
+    Idempotent ingestion: unordered bulk upserts keyed on (city, timestamp).
+    
+    Re-ingesting an overlapping window updates documents in place, so the
+    collection never holds duplicates and is never partially deleted.
+    """
+    ensure_unique_key(coll)
+    
+    ingestion_time = datetime.utcnow()
+    stats = {"upserted": 0, "modified": 0, "matched": 0}
+    
+    for start in range(0, len(records), batch_size):
+        ops = []
+        for record in records[start:start + batch_size]:
+            doc = {k: v for k, v in record.items() if k != "_id"}
+            doc.setdefault("ingestion_time", ingestion_time)
+            ops.append(UpdateOne({k: doc[k] for k in KEY_FIELDS}, {"$set": doc}, upsert=True))
+        
+        if not ops:
+            continue
+        
+        result = coll.bulk_write(ops, ordered=False)
+        stats["upserted"] += result.upserted_count
+        stats["modified"] += result.modified_count
+        stats["matched"] += result.matched_count
+    
+    return stats
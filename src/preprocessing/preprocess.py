@@ -1,39 +1,57 @@
 # src/preprocessing/preprocess.py
 
 import pandas as pd
+from pymongo.errors import PyMongoError
 
-def clean_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean raw AQI dataset - STRICT cleaning for better models"""
+from src.utils.schema import compact_dtypes
+from src.utils.tracing import traced
+from src.preprocessing.validation import validate, rejection_counts, rejected_records, write_quarantine
+
+@traced("clean")
+def clean_data(df: pd.DataFrame, compact: bool = False, quarantine=None) -> pd.DataFrame:
+    """Clean raw AQI dataset - STRICT cleaning for better models
     
-    df = df.copy()
+    All validation rules (see validation.RULES) are evaluated as one mask and
+    the frame is filtered once. Rejected rows and their reasons are written
+    to the `quarantine` collection when one is given.
+    With `compact`, measurements become float32 and city/weather_main categories.
+    """
     
     # Convert timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
     
-    # Drop rows with missing critical data
-    df = df.dropna(subset=["timestamp", "pm2_5", "aqi"])
+    # Missing critical data, impossible and outlier values
+    valid, failures = validate(df)
+    n_invalid = int((~valid).sum())
     
-    # CRITICAL: Remove invalid data
-    df = df[df["pm2_5"] > 0]  # PM2.5 cannot be 0
-    df = df[df["pm2_5"] < 500]  # Remove extreme outliers (500+ is sensor error)
-    df = df[df["aqi"] > 0]  # AQI cannot be 0
-    df = df[df["aqi"] < 500]  # AQI max is 500
+    if quarantine is not None and n_invalid:
+        try:
+            written = write_quarantine(quarantine, rejected_records(df, valid, failures))
+            print(f"🚧 Quarantined {written} rejected rows")
+        except PyMongoError as e:
+            # Losing the audit trail must not stop cleaning
+            print(f"⚠️ Quarantine write failed: {e}")
     
-    # Remove impossible pollutant values
-    if "pm10" in df.columns:
-        df = df[df["pm10"] < 1000]  # PM10 shouldn't exceed 1000
+    df = df[valid]
     
-    # Fill missing pollutants with 0 (some can legitimately be 0)
+    # Fill missing pollutants with 0 (some can legitimately be 0), no negative values
     pollutant_cols = ["pm10", "co", "no2", "o3", "so2", "nh3"]
     for col in pollutant_cols:
         if col in df.columns:
-            df[col] = df[col].fillna(0)
-            df.loc[df[col] < 0, col] = 0  # No negative values
+            df[col] = df[col].fillna(0).clip(lower=0)
     
-    # Sort and remove duplicates
+    # Sort and remove duplicates (one row per city and hour)
+    key = ["city", "timestamp"] if "city" in df.columns else ["timestamp"]
     df = df.sort_values("timestamp").reset_index(drop=True)
-    df = df.drop_duplicates(subset=["timestamp"], keep='last')
+    n_valid = len(df)
+    df = df.drop_duplicates(subset=key, keep='last')
+    
+    if compact:
+        df = compact_dtypes(df)
     
-    print(f"✅ Cleaned: {len(df)} records (removed {len(df) - len(df)} invalid)")
+    print(f"✅ Cleaned: {len(df)} records (removed {n_invalid} invalid, {n_valid - len(df)} duplicates)")
+    for rule, count in rejection_counts(failures).items():
+        if count:
+            print(f"   ↳ {rule}: {count}")
     
-    return df
\ No newline at end of file
+    return df
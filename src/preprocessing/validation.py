@@ -0,0 +1,108 @@
+# src/preprocessing/validation.py
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pymongo import InsertOne, UpdateOne
+
+QUARANTINE_BATCH_SIZE = int(os.getenv("QUARANTINE_BATCH_SIZE", "1000"))
+
+# Declarative rule table, evaluated in one pass (a row is valid if it fails none).
+# op: "notna" | ">" | "<". Comparisons pass NaN, so a missing value is only
+# reported by its notna rule; optional rules are skipped when the column is absent.
+RULES = [
+    {"name": "timestamp_missing", "column": "timestamp", "op": "notna"},
+    {"name": "pm2_5_missing", "column": "pm2_5", "op": "notna"},
+    {"name": "aqi_missing", "column": "aqi", "op": "notna"},
+    {"name": "pm2_5_not_positive", "column": "pm2_5", "op": ">", "value": 0},  # PM2.5 cannot be 0
+    {"name": "pm2_5_outlier", "column": "pm2_5", "op": "<", "value": 500},  # 500+ is sensor error
+    {"name": "aqi_not_positive", "column": "aqi", "op": ">", "value": 0},  # AQI cannot be 0
+    {"name": "aqi_out_of_range", "column": "aqi", "op": "<", "value": 500},  # AQI max is 500
+    {"name": "pm10_outlier", "column": "pm10", "op": "<", "value": 1000, "optional": True},
+]
+
+_OPS = {
+    ">": np.greater,
+    "<": np.less,
+}
+
+def _failures(df: pd.DataFrame, rule) -> np.ndarray:
+    values = df[rule["column"]]
+    missing = values.isna().to_numpy()
+    if rule["op"] == "notna":
+        return missing
+
+    with np.errstate(invalid="ignore"):
+        passed = _OPS[rule["op"]](values.to_numpy(dtype=np.float64, na_value=np.nan), rule["value"])
+    return ~passed & ~missing
+
+def validate(df: pd.DataFrame, rules=RULES):
+    """
+    Evaluate every rule against `df` without filtering it.
+
+    Returns:
+        tuple: (valid: bool array, failures: dict[rule name -> bool array])
+    """
+    failures = {}
+    for rule in rules:
+        if rule["column"] not in df.columns:
+            if rule.get("optional"):
+                continue
+            raise KeyError(f"Validation rule {rule['name']} needs column {rule['column']!r}")
+        failures[rule["name"]] = _failures(df, rule)
+
+    if not failures:
+        return np.ones(len(df), dtype=bool), failures
+
+    failed = np.vstack(list(failures.values()))
+    return ~failed.any(axis=0), failures
+
+def rejection_counts(failures) -> dict:
+    """Rows failing each rule (a row failing two rules counts for both)"""
+    return {name: int(mask.sum()) for name, mask in failures.items()}
+
+def rejected_records(df: pd.DataFrame, valid, failures) -> list:
+    """Rejected rows as documents with the names of the rules they failed"""
+    rejected = ~valid
+    if not rejected.any():
+        return []
+
+    names = np.array(list(failures))
+    matrix = np.vstack([failures[n][rejected] for n in names])
+    rows = df[rejected]
+    rows = rows.astype(object).where(rows.notna(), None)
+
+    records = []
+    for record, failed in zip(rows.to_dict("records"), matrix.T):
+        record["reasons"] = names[failed].tolist()
+        records.append(record)
+    return records
+
+def write_quarantine(coll, records, batch_size=QUARANTINE_BATCH_SIZE):
+    """
+    Bulk-write rejected rows to the quarantine collection.
+
+    Rows carrying a source `_id` are upserted on it, so re-cleaning the same
+    data does not duplicate them; anything else is inserted.
+    """
+    quarantined_at = datetime.utcnow()
+    written = 0
+
+    for start in range(0, len(records), batch_size):
+        ops = []
+        for record in records[start:start + batch_size]:
+            doc = {k: v for k, v in record.items() if k != "_id"}
+            doc["quarantined_at"] = quarantined_at
+            if record.get("_id") is not None:
+                doc["source_id"] = str(record["_id"])
+                ops.append(UpdateOne({"source_id": doc["source_id"]}, {"$set": doc}, upsert=True))
+            else:
+                ops.append(InsertOne(doc))
+
+        if ops:
+            result = coll.bulk_write(ops, ordered=False)
+            written += result.inserted_count + result.upserted_count + result.modified_count
+
+    return written
@@ -0,0 +1,148 @@
+# src/registry/model_cache.py
+
+import os
+import json
+import hashlib
+import joblib
+from datetime import datetime
+
+CACHE_DIR = os.getenv("MODEL_CACHE_DIR", ".model_cache")
+
+class ModelUnavailableError(RuntimeError):
+    """Registry unreachable and nothing cached for the model"""
+
+class ModelCache:
+    """
+    Content-addressed local cache of registered MLflow models.
+    
+    Each load does one alias -> version lookup against the registry. A cached
+    (name, version) is loaded from disk without downloading; otherwise the
+    model is downloaded once and stored under the SHA-256 of its pickle. If
+    the registry cannot be reached, the last version that loaded
+    successfully is used instead.
+    
+    Layout:
+        <cache_dir>/index.json        {name: {"versions": {...}, "last_good": v}}
+        <cache_dir>/blobs/<sha256>.pkl
+    """
+    
+    def __init__(self, cache_dir=CACHE_DIR, client=None, loader=None):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._client = client
+        self._loader = loader
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = self._read_index()
+    
+    # -------------------- REGISTRY --------------------
+    
+    @property
+    def client(self):
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+            self._client = MlflowClient()
+        return self._client
+    
+    def _download(self, name, version):
+        if self._loader is not None:
+            return self._loader(name, version)
+        import mlflow
+        return mlflow.sklearn.load_model(f"models:/{name}/{version}")
+    
+    def resolve(self, name, alias="production"):
+        """Registry version behind an alias (the one network call on a cache hit)"""
+        return str(self.client.get_model_version_by_alias(name, alias).version)
+    
+    # -------------------- INDEX --------------------
+    
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print("⚠️ Model cache index unreadable, starting empty")
+            return {}
+    
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+    
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.pkl")
+    
+    def _load_cached(self, name, version):
+        entry = self.index.get(name, {}).get("versions", {}).get(version)
+        if not entry:
+            return None
+        path = self._blob_path(entry["sha256"])
+        if not os.path.exists(path) or _sha256(path) != entry["sha256"]:
+            print(f"⚠️ Cached {name} v{version} missing or corrupt, re-downloading")
+            return None
+        return joblib.load(path)
+    
+    def _store(self, name, version, model):
+        tmp = os.path.join(self.blob_dir, f".{name}-{version}.tmp")
+        joblib.dump(model, tmp)
+        digest = _sha256(tmp)
+        os.replace(tmp, self._blob_path(digest))
+        
+        entry = self.index.setdefault(name, {"versions": {}, "last_good": None})
+        entry["versions"][version] = {"sha256": digest, "cached_at": datetime.utcnow().isoformat()}
+    
+    # -------------------- LOAD --------------------
+    
+    def load(self, name, alias="production"):
+        """
+        Returns:
+            tuple: (model, version:str, source) with source one of
+            "cache", "registry" or "fallback"
+        """
+        try:
+            version = self.resolve(name, alias)
+        except Exception as e:
+            version = self.index.get(name, {}).get("last_good")
+            if version is None:
+                raise ModelUnavailableError(f"Registry unreachable and no cached {name}: {e}") from e
+            model = self._load_cached(name, version)
+            if model is None:
+                raise ModelUnavailableError(f"Registry unreachable and cached {name} v{version} is unusable") from e
+            print(f"⚠️ Registry unreachable ({type(e).__name__}), using cached {name} v{version}")
+            return model, version, "fallback"
+        
+        model = self._load_cached(name, version)
+        source = "cache"
+        if model is None:
+            model = self._download(name, version)
+            self._store(name, version, model)
+            source = "registry"
+        
+        self.index[name]["last_good"] = version
+        self._write_index()
+        return model, version, source
+    
+    def prune(self, keep=3):
+        """Drop all but the newest `keep` cached versions per model"""
+        live = set()
+        for entry in self.index.values():
+            versions = sorted(entry["versions"], key=lambda v: int(v) if v.isdigit() else v)
+            for v in versions[:-keep]:
+                if v != entry.get("last_good"):
+                    del entry["versions"][v]
+            live.update(e["sha256"] for e in entry["versions"].values())
+        
+        for filename in os.listdir(self.blob_dir):
+            if filename.endswith(".pkl") and filename[:-4] not in live:
+                os.remove(os.path.join(self.blob_dir, filename))
+        self._write_index()
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,18 @@
+# src/registry/tracking.py
+
+import os
+
+def init_tracking(experiment=None):
+    """Point MLflow at the DagsHub tracking server / model registry"""
+    import dagshub
+    import mlflow
+    
+    dagshub.init(
+        repo_owner=os.environ.get("DAGSHUB_USER"),
+        repo_name=os.environ.get("DAGSHUB_REPO", "pearls-aqi-predictor"),
+        mlflow=True
+    )
+    if experiment:
+        mlflow.set_experiment(experiment)
+    
+    return mlflow
@@ -0,0 +1,196 @@
+# src/storage/connection.py
+#
+# One pooled MongoClient per process. The first get_client() call connects
+# eagerly (a ping forces server selection), so a bad URI or certificate
+# fails at startup instead of on the first query, and a TLS verification
+# failure can actually fall back to tlsInsecure. Every later call reuses
+# the same client, its pool and its SRV/TLS state.
+
+import os
+import time
+import atexit
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
+from pymongo.errors import ConnectionFailure
+
+from src.utils import tracing
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("MONGODB_POOL_SIZE", "20"))
+MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "30000"))
+SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+# Retry without certificate verification when verification is what failed
+TLS_INSECURE_FALLBACK = os.getenv("MONGODB_TLS_INSECURE_FALLBACK", "true").lower() not in ("0", "false", "no")
+
+TLS_ERROR_MARKERS = ("SSL", "TLS", "CERTIFICATE")
+
+# -------------------- POOL METRICS --------------------
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Checkout wait time from CMAP events: the time between a thread asking
+    the pool for a connection and getting one (including any handshake
+    when a new connection has to be opened).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.failures = 0
+            self.wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.created = 0
+            self.closed = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "failures": self.failures,
+                "wait_ms": round(self.wait_ms, 3),
+                "mean_wait_ms": round(self.wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "connections_created": self.created,
+                "connections_open": self.created - self.closed,
+            }
+
+    def _waited(self):
+        start = getattr(self._local, "start", None)
+        self._local.start = None
+        return (time.perf_counter() - start) * 1000 if start is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        ms = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms += ms
+            self.max_wait_ms = max(self.max_wait_ms, ms)
+        tracing.bump_pool_wait(ms)
+
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.failures += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+POOL_METRICS = PoolMetrics()
+
+def pool_stats():
+    """Checkout/wait counters of this process' pool"""
+    return POOL_METRICS.snapshot()
+
+def log_pool_stats():
+    s = pool_stats()
+    print(f"🔌 Mongo pool: {s['checkouts']} checkouts, {s['connections_created']} connections opened, "
+          f"wait mean {s['mean_wait_ms']:.2f} ms / max {s['max_wait_ms']:.2f} ms")
+
+# -------------------- CLIENT --------------------
+
+def _is_tls_error(error):
+    message = str(error).upper()
+    return any(marker in message for marker in TLS_ERROR_MARKERS)
+
+def connect(uri, pool_size=POOL_SIZE, server_selection_timeout_ms=SERVER_SELECTION_TIMEOUT_MS):
+    """
+    A connected client: ping first with certificate verification, then
+    (if the failure was a TLS one and the fallback is enabled) once more
+    with tlsInsecure=True. Anything else is raised.
+    """
+    options = dict(
+        maxPoolSize=pool_size,
+        minPoolSize=MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=server_selection_timeout_ms,
+        connectTimeoutMS=CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=SOCKET_TIMEOUT_MS,
+        event_listeners=[POOL_METRICS],
+    )
+
+    start = time.perf_counter()
+    client = MongoClient(uri, **options)
+    try:
+        client.admin.command("ping")
+    except ConnectionFailure as e:
+        client.close()
+        if not (TLS_INSECURE_FALLBACK and _is_tls_error(e)):
+            raise
+        print(f"⚠️ TLS verification failed: {str(e)[:200]}")
+        print("🔄 Retrying with tlsInsecure=True...")
+        client = MongoClient(uri, tlsInsecure=True, **options)
+        client.admin.command("ping")
+
+    print(f"🔌 Connected to MongoDB in {(time.perf_counter() - start) * 1000:.0f} ms (pool size {pool_size})")
+    return client
+
+_CLIENT = None
+_PID = None
+_LOCK = threading.Lock()
+
+def get_client(uri=None, pool_size=None, server_selection_timeout_ms=None):
+    """
+    The process-wide client, connected on first use. Options only apply
+    to that first call; a forked child gets its own client.
+    """
+    global _CLIENT, _PID
+    with _LOCK:
+        if _CLIENT is not None and _PID == os.getpid():
+            return _CLIENT
+
+        uri = uri or os.getenv("MONGODB_URI")
+        if not uri:
+            raise ValueError("MONGODB_URI environment variable not set")
+
+        _CLIENT = connect(
+            uri,
+            pool_size or POOL_SIZE,
+            server_selection_timeout_ms or SERVER_SELECTION_TIMEOUT_MS,
+        )
+        _PID = os.getpid()
+        return _CLIENT
+
+def close_client():
+    """Close the shared client; the next get_client() reconnects"""
+    global _CLIENT, _PID
+    with _LOCK:
+        if _CLIENT is not None and _PID == os.getpid():
+            _CLIENT.close()
+        _CLIENT, _PID = None, None
+
+atexit.register(close_client)
@@ -0,0 +1,206 @@
+# src/storage/indexes.py
+#
+# Declares the indexes every hot query needs and creates the missing ones.
+# Ingestion and inference call ensure_indexes() at startup; --check runs
+# explain() on each hot query and fails on a COLLSCAN.
+#
+#   python -m src.storage.indexes            # ensure indexes on MONGODB_URI
+#   python -m src.storage.indexes --check    # ensure, then assert query plans
+
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from src.ingestion.writer import KEY_FIELDS, KEY_INDEX_NAME, remove_duplicate_keys
+from src.storage.timeseries import (
+    TIMESERIES_DB, FORECAST_TS, OBSERVATION_TS, FORECAST_DAILY, OBSERVATION_DAILY, ensure_storage,
+)
+
+load_dotenv()
+
+# role -> indexes; roles are resolved to the env-configured collections
+REQUIRED_INDEXES = {
+    "features": [
+        # Upsert key of every ingestion write
+        {"keys": [(k, ASCENDING) for k in KEY_FIELDS], "name": KEY_INDEX_NAME, "unique": True},
+        # Dashboard "current" lookup, history ranges, incremental load (new hours)
+        {"keys": [("timestamp", DESCENDING)], "name": "timestamp_desc"},
+        # Incremental load (rewritten documents)
+        {"keys": [("ingestion_time", ASCENDING)], "name": "ingestion_time"},
+    ],
+    # Time-series collections: the automatic meta index cannot serve meta.city
+    "forecasts_ts": [
+        # Dashboard forecast table and short history ranges
+        {"keys": [("meta.city", ASCENDING), ("timestamp", DESCENDING)], "name": "city_timestamp"},
+    ],
+    "observations_ts": [
+        {"keys": [("meta.city", ASCENDING), ("timestamp", DESCENDING)], "name": "city_timestamp"},
+    ],
+    # Long history ranges
+    "forecasts_daily": [
+        {"keys": [("city", ASCENDING), ("horizon", ASCENDING), ("day", ASCENDING)], "name": "city_horizon_day"},
+    ],
+    "observations_daily": [
+        {"keys": [("city", ASCENDING), ("horizon", ASCENDING), ("day", ASCENDING)], "name": "city_horizon_day"},
+    ],
+    "quarantine": [
+        # Re-rejected rows are upserted on their source _id
+        {"keys": [("source_id", ASCENDING)], "name": "source_id"},
+    ],
+}
+
+def get_collections(client):
+    """role -> Collection for every role in REQUIRED_INDEXES"""
+    from src.utils.data_loader import get_feature_collection, get_quarantine_collection
+    ts = client[TIMESERIES_DB]
+    return {
+        "features": get_feature_collection(client),
+        "quarantine": get_quarantine_collection(client),
+        "forecasts_ts": ts[FORECAST_TS],
+        "observations_ts": ts[OBSERVATION_TS],
+        "forecasts_daily": ts[FORECAST_DAILY],
+        "observations_daily": ts[OBSERVATION_DAILY],
+    }
+
+# -------------------- ENSURE --------------------
+
+def missing_indexes(coll, specs):
+    """Specs whose key pattern is not indexed yet, whatever the existing index is named"""
+    existing = {
+        tuple((k, d if isinstance(d, str) else int(d)) for k, d in info["key"])  # "text", "2dsphere", ...
+        for info in coll.index_information().values()
+    }
+    return [s for s in specs if tuple(s["keys"]) not in existing]
+
+def _create(coll, spec):
+    options = {k: v for k, v in spec.items() if k != "keys"}
+    try:
+        coll.create_index(spec["keys"], **options)
+    except OperationFailure as e:
+        if e.code != 11000 or not spec.get("unique"):
+            raise
+        # Same recovery as the writer: drop older duplicates, then build
+        print(f"🧹 Removed {remove_duplicate_keys(coll)} duplicate documents in {coll.name}")
+        coll.create_index(spec["keys"], **options)
+
+def ensure_indexes(client=None, collections=None, required=REQUIRED_INDEXES):
+    """
+    Create every declared index that does not exist yet. One listIndexes
+    per collection when nothing is missing, so it is cheap to call at the
+    start of every job.
+
+    Returns:
+        dict: role -> names of the indexes created
+    """
+    if collections is None:
+        from src.utils.data_loader import get_client
+        client = client or get_client()
+        # An index build on a missing collection would create it as a regular one
+        try:
+            ensure_storage(client[TIMESERIES_DB])
+        except OperationFailure as e:
+            # e.g. a TTL change needs collMod, which a readWrite user may not be granted
+            print(f"⚠️ Could not update time-series collections: {e}")
+        collections = get_collections(client)
+
+    created = {}
+    for role, specs in required.items():
+        coll = collections.get(role)
+        if coll is None:
+            continue
+        for spec in missing_indexes(coll, specs):
+            _create(coll, spec)
+            created.setdefault(role, []).append(spec["name"])
+            print(f"🗂️ Created index {spec['name']} on {coll.name}")
+    return created
+
+# -------------------- QUERY PLANS --------------------
+
+def hot_queries(collections, now=None):
+    """
+    name -> callable returning the explain() output of one hot query,
+    shaped exactly like the query the code runs
+    """
+    from app.queries import history_pipeline
+    now = now or datetime.utcnow()
+    features, quarantine = collections["features"], collections["quarantine"]
+    forecasts, observations = collections["forecasts_ts"], collections["observations_ts"]
+    city = {"meta.city": "Karachi"}
+
+    def explain_aggregate(coll, pipeline):
+        return coll.database.command(
+            "explain", {"aggregate": coll.name, "pipeline": pipeline, "cursor": {}},
+            verbosity="queryPlanner",
+        )
+
+    return {
+        "dashboard_forecasts": lambda: forecasts.find(city).sort("timestamp", -1).limit(48 * 3).explain(),
+        "dashboard_current": lambda: features.find({}).sort("timestamp", -1).limit(1).explain(),
+        "dashboard_history": lambda: explain_aggregate(
+            observations, history_pipeline("pm2_5", now - timedelta(days=30), now, "hour", match=city)),
+        "dashboard_history_daily": lambda: collections["observations_daily"].find(
+            {"city": "Karachi", "horizon": None, "day": {"$gte": now - timedelta(days=365), "$lt": now}}
+        ).sort("day", 1).explain(),
+        "incremental_load": lambda: features.find({"$or": [
+            {"timestamp": {"$gt": now - timedelta(hours=1)}},
+            {"ingestion_time": {"$gt": now - timedelta(hours=1)}},
+        ]}).explain(),
+        "ingestion_upsert": lambda: features.find({"city": "Karachi", "timestamp": now}).explain(),
+        "quarantine_upsert": lambda: quarantine.find({"source_id": "0" * 24}).explain(),
+    }
+
+def plan_stages(explain):
+    """Every stage name in the winning plan(s) of an explain() result, find or aggregate"""
+    stages = []
+
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, in_plan)
+
+    walk(explain, False)
+    return stages
+
+def check_query_plans(collections, queries=None):
+    """
+    Run explain() on each hot query.
+
+    Returns:
+        dict: query name -> stages, for every query whose plan has a COLLSCAN
+    """
+    queries = queries or hot_queries(collections)
+    failures = {}
+    for name, explain in queries.items():
+        stages = plan_stages(explain())
+        status = "❌" if "COLLSCAN" in stages else "✅"
+        print(f"  {status} {name}: {' <- '.join(stages)}")
+        if "COLLSCAN" in stages:
+            failures[name] = stages
+    return failures
+
+if __name__ == "__main__":
+    from src.utils.data_loader import get_client
+
+    parser = argparse.ArgumentParser(description="Ensure required MongoDB indexes")
+    parser.add_argument("--check", action="store_true",
+                        help="also explain() the hot queries and fail on any COLLSCAN")
+    args = parser.parse_args()
+
+    client = get_client()
+    created = ensure_indexes(client)
+    collections = get_collections(client)
+    print(f"✅ Indexes in place ({sum(len(v) for v in created.values())} created)")
+
+    if args.check:
+        print("🔍 Query plans:")
+        if check_query_plans(collections):
+            sys.exit(1)
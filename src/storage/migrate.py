@@ -0,0 +1,130 @@
+# src/storage/migrate.py
+#
+# Bulk-copies the legacy `predictions` and feature documents into the
+# time-series collections. Progress is checkpointed by _id, so an
+# interrupted migration resumes where it stopped.
+#
+# Cut-over: inference writes only the time-series collections unless
+# MONGODB_WRITE_LEGACY_PREDICTIONS=true. Run this once before deploying
+# that change (and again afterwards if legacy writes were kept on in the
+# meantime; resuming copies only the new documents), then the legacy
+# `predictions` collection can be archived or dropped.
+#
+#   python -m src.storage.migrate                         # both, then roll up
+#   python -m src.storage.migrate --only forecasts --batch-size 5000
+#   python -m src.storage.migrate --restart               # ignore checkpoints
+
+import os
+import argparse
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from src.storage.timeseries import (
+    TIMESERIES_DB,
+    FORECAST_TS,
+    OBSERVATION_TS,
+    FORECAST_DAILY,
+    OBSERVATION_DAILY,
+    FORECAST_ROLLUP_FIELDS,
+    OBSERVATION_ROLLUP_FIELDS,
+    ensure_storage,
+    forecast_rows,
+    observation_row,
+    rollup_daily,
+)
+
+load_dotenv()
+
+MIGRATIONS_COLLECTION = os.getenv("MONGODB_MIGRATIONS_COLLECTION", "migrations")
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "2000"))
+
+def _checkpoint(db, name):
+    return db[MIGRATIONS_COLLECTION].find_one({"_id": name}) or {}
+
+def migrate_collection(source, target, convert, db, name, batch_size=BATCH_SIZE, restart=False):
+    """
+    Copy `source` into `target` in _id order, `batch_size` documents per
+    read and per insert_many. After every batch the last _id is stored in
+    the migrations collection under `name`. A crash between the insert and
+    the checkpoint re-copies at most one batch; rollups count each
+    (meta, timestamp) once, so the duplicates do not skew them.
+
+    Returns:
+        dict: documents read, rows written and the covered time range
+    """
+    state = {} if restart else _checkpoint(db, name)
+    last_id = state.get("last_id")
+    stats = {"documents": 0, "rows": 0, "start": None, "end": None}
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(source.find(query).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        rows = [row for doc in batch if doc.get("timestamp") is not None for row in convert(doc)]
+        if rows:
+            target.insert_many(rows, ordered=False)
+            times = [row["timestamp"] for row in rows]
+            stats["start"] = min(times + ([stats["start"]] if stats["start"] else []))
+            stats["end"] = max(times + ([stats["end"]] if stats["end"] else []))
+
+        last_id = batch[-1]["_id"]
+        stats["documents"] += len(batch)
+        stats["rows"] += len(rows)
+        db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": name},
+            {"$set": {"last_id": last_id, "updated": datetime.utcnow()},
+             "$inc": {"documents": len(batch), "rows": len(rows)}},
+            upsert=True,
+        )
+        print(f"  📦 {name}: {stats['documents']} documents → {stats['rows']} rows")
+
+    return stats
+
+def migrate(db, prediction_collection, feature_collection, only=None, batch_size=BATCH_SIZE,
+            restart=False, rollup=True):
+    """Migrate forecasts and/or observations, then roll up the migrated days"""
+    jobs = {
+        "forecasts": (prediction_collection, db[FORECAST_TS], forecast_rows,
+                      db[FORECAST_DAILY], FORECAST_ROLLUP_FIELDS),
+        "observations": (feature_collection, db[OBSERVATION_TS], lambda doc: [observation_row(doc)],
+                         db[OBSERVATION_DAILY], OBSERVATION_ROLLUP_FIELDS),
+    }
+
+    results = {}
+    for name, (source, target, convert, daily, fields) in jobs.items():
+        if only and name != only:
+            continue
+        print(f"🚚 Migrating {source.name} → {target.name}")
+        stats = migrate_collection(source, target, convert, db, name, batch_size, restart)
+        if rollup and stats["rows"]:
+            # Whole days covering the migrated range, the last one included
+            start = stats["start"].replace(hour=0, minute=0, second=0, microsecond=0)
+            end = stats["end"].replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            stats["rollups"] = rollup_daily(target, daily, fields, start, end)
+        results[name] = stats
+    return results
+
+if __name__ == "__main__":
+    from src.utils.data_loader import get_client, get_feature_collection
+
+    parser = argparse.ArgumentParser(description="Migrate legacy documents into time-series collections")
+    parser.add_argument("--only", choices=["forecasts", "observations"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="start over instead of resuming")
+    parser.add_argument("--no-rollup", action="store_true")
+    args = parser.parse_args()
+
+    client = get_client()
+    db = client[TIMESERIES_DB]
+    predictions = client[os.getenv("MONGODB_PREDICTION_DB", "aqi_db")][
+        os.getenv("MONGODB_PREDICTION_COLLECTION", "predictions")]
+
+    ensure_storage(db)
+    results = migrate(db, predictions, get_feature_collection(client), args.only, args.batch_size,
+                      args.restart, not args.no_rollup)
+    for name, stats in results.items():
+        print(f"✅ {name}: {stats['documents']} documents, {stats['rows']} rows, "
+              f"{stats.get('rollups', 0)} daily rollups")
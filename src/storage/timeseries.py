@@ -0,0 +1,179 @@
+# src/storage/timeseries.py
+
+import os
+import argparse
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import ReplaceOne
+from pymongo.errors import CollectionInvalid
+
+load_dotenv()
+
+TIMESERIES_DB = os.getenv("MONGODB_TIMESERIES_DB", os.getenv("MONGODB_PREDICTION_DB", "aqi_db"))
+
+# Raw hourly rows live in time-series collections and expire after the TTL;
+# daily rollups are regular collections kept forever
+FORECAST_TS = os.getenv("MONGODB_FORECAST_TS_COLLECTION", "forecasts_ts")
+OBSERVATION_TS = os.getenv("MONGODB_OBSERVATION_TS_COLLECTION", "observations_ts")
+FORECAST_DAILY = os.getenv("MONGODB_FORECAST_DAILY_COLLECTION", "forecasts_daily")
+OBSERVATION_DAILY = os.getenv("MONGODB_OBSERVATION_DAILY_COLLECTION", "observations_daily")
+
+RAW_TTL_DAYS = int(os.getenv("TIMESERIES_RAW_TTL_DAYS", "180"))
+
+OBSERVATION_FIELDS = [
+    "aqi", "pm2_5", "pm10", "co", "no2", "o3", "so2", "nh3",
+    "temp", "humidity", "pressure", "wind_speed", "wind_deg", "clouds",
+]
+FORECAST_FIELDS = ["pm25_prediction", "aqi", "aqi_category_code", "aqi_category_label", "target_time"]
+
+# Fields aggregated into the daily rollups
+FORECAST_ROLLUP_FIELDS = ["pm25_prediction", "aqi"]
+OBSERVATION_ROLLUP_FIELDS = ["pm2_5", "aqi", "temp", "humidity", "wind_speed"]
+
+# -------------------- SCHEMA --------------------
+
+def ensure_timeseries(db, name, ttl_days=RAW_TTL_DAYS, granularity="hours"):
+    """
+    Create `name` as a time-series collection (timeField `timestamp`,
+    metaField `meta`), or bring the TTL of an existing one up to date.
+    collMod (dbAdmin) only runs when the stored TTL differs.
+    """
+    expire = int(ttl_days * 86400) if ttl_days else None
+    existing = next(iter(db.list_collections(filter={"name": name})), None)
+
+    if existing is None:
+        options = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": granularity}}
+        if expire:
+            options["expireAfterSeconds"] = expire
+        try:
+            db.create_collection(name, **options)
+            print(f"🗂️ Created time-series collection {name} (TTL {ttl_days or 'off'} days)")
+        except CollectionInvalid:
+            pass  # created concurrently by another job
+    elif existing.get("options", {}).get("expireAfterSeconds") != expire:
+        db.command({"collMod": name, "expireAfterSeconds": expire or "off"})
+        print(f"🗂️ Set TTL of {name} to {ttl_days or 'off'} days")
+    return db[name]
+
+def ensure_storage(db, ttl_days=RAW_TTL_DAYS):
+    """
+    Both raw time-series collections, idempotently. Jobs call this at
+    startup (through ensure_indexes); the writers assume it has run.
+    """
+    for name in (FORECAST_TS, OBSERVATION_TS):
+        ensure_timeseries(db, name, ttl_days)
+
+# -------------------- CONVERSION --------------------
+
+def forecast_rows(doc):
+    """
+    One flat row per horizon from a nested prediction document, stamped at
+    the run time with meta {city, horizon}.
+    """
+    city = doc.get("city", "Karachi")  # pre multi-city documents have no city
+    versions = doc.get("model_versions") or {}
+
+    rows = []
+    for horizon, forecast in (doc.get("forecasts") or {}).items():
+        row = {
+            "timestamp": doc["timestamp"],
+            "meta": {"city": city, "horizon": horizon},
+            "model_version": versions.get(horizon, next(iter(versions.values()), None)),
+        }
+        if doc.get("observation_time") is not None:
+            row["observation_time"] = doc["observation_time"]
+        row.update({k: forecast[k] for k in FORECAST_FIELDS if forecast.get(k) is not None})
+        rows.append(row)
+    return rows
+
+def observation_row(record):
+    """Flat observation row with meta {city}; missing measurements are omitted"""
+    row = {"timestamp": record["timestamp"], "meta": {"city": record.get("city", "Karachi")}}
+    row.update({k: record[k] for k in OBSERVATION_FIELDS if record.get(k) is not None})
+    return row
+
+# -------------------- WRITES --------------------
+
+def write_forecasts(db, docs):
+    rows = [row for doc in docs for row in forecast_rows(doc)]
+    if rows:
+        db[FORECAST_TS].insert_many(rows, ordered=False)
+    return len(rows)
+
+def write_observations(db, records):
+    rows = [observation_row(r) for r in records if r.get("timestamp") is not None]
+    if rows:
+        db[OBSERVATION_TS].insert_many(rows, ordered=False)
+    return len(rows)
+
+# -------------------- ROLLUPS --------------------
+
+def _day_parts(field):
+    return {"year": {"$year": field}, "month": {"$month": field}, "day": {"$dayOfMonth": field}}
+
+def rollup_pipeline(fields, start, end):
+    """
+    Daily min/mean/max per meta (city[, horizon]) for [start, end).
+
+    Rows are first collapsed per (meta, timestamp), keeping the latest
+    insert, so re-ingested hours (time-series collections cannot enforce
+    uniqueness) are counted once.
+    """
+    return [
+        {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+        # Within an hour, _id (insert order) makes the re-ingested row the $last one
+        {"$sort": {"timestamp": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"meta": "$meta", "timestamp": "$timestamp"},
+            **{f: {"$last": f"${f}"} for f in fields},
+        }},
+        {"$group": {
+            "_id": {"meta": "$_id.meta", "day": {"$dateFromParts": _day_parts("$_id.timestamp")}},
+            "count": {"$sum": 1},
+            **{f"{f}_{stat}": {f"${op}": f"${f}"} for f in fields
+               for stat, op in (("min", "min"), ("mean", "avg"), ("max", "max"))},
+        }},
+    ]
+
+def rollup_daily(source, target, fields, start, end):
+    """
+    Recompute the daily rollups of [start, end) and upsert them into
+    `target`, keyed on {city, horizon, day}. Safe to rerun.
+    """
+    ops = []
+    for group in source.aggregate(rollup_pipeline(fields, start, end), allowDiskUse=True):
+        meta, day = group["_id"]["meta"], group["_id"]["day"]
+        key = {"city": meta.get("city"), "horizon": meta.get("horizon"), "day": day}
+        doc = {
+            "_id": key, **key, "count": group["count"],
+            **{f: {s: group[f"{f}_{s}"] for s in ("min", "mean", "max")} for f in fields},
+        }
+        ops.append(ReplaceOne({"_id": key}, doc, upsert=True))
+
+    if ops:
+        target.bulk_write(ops, ordered=False)
+    return len(ops)
+
+def rollup_days(db, days=2, end=None):
+    """Roll up the last `days` complete UTC days of forecasts and observations"""
+    end = (end or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    return {
+        FORECAST_DAILY: rollup_daily(db[FORECAST_TS], db[FORECAST_DAILY], FORECAST_ROLLUP_FIELDS, start, end),
+        OBSERVATION_DAILY: rollup_daily(db[OBSERVATION_TS], db[OBSERVATION_DAILY], OBSERVATION_ROLLUP_FIELDS, start, end),
+    }
+
+if __name__ == "__main__":
+    # Not data_loader: the rollup job installs only pymongo, no pandas/numpy
+    from src.storage.connection import get_client
+
+    parser = argparse.ArgumentParser(description="Daily rollups of the time-series collections")
+    parser.add_argument("--days", type=int, default=2,
+                        help="complete days to (re)compute; >1 heals a missed run")
+    args = parser.parse_args()
+
+    db = get_client()[TIMESERIES_DB]
+    ensure_storage(db)
+    for name, n in rollup_days(db, args.days).items():
+        print(f"📊 {name}: {n} daily rollups upserted")
@@ -0,0 +1,103 @@
+# src/training/backtest.py
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+def _purged_end(test_start, gap, timestamps):
+    """End of the training slice before a test block starting at row `test_start`"""
+    if timestamps is None:
+        return test_start - gap
+    # Rows of several cities share timestamps: purge by time, not by row count
+    cutoff = timestamps[test_start] - np.timedelta64(gap, "h")
+    return int(np.searchsorted(timestamps, cutoff, side="right"))
+
+def walk_forward_folds(n, n_folds=5, test_size=None, min_train=None, gap=72, expanding=True,
+                       timestamps=None):
+    """
+    Time-ordered (train, test) folds as slices.
+
+    Test windows are consecutive blocks at the end of the series. Targets
+    look up to 72h ahead, so training rows close to a test block would see
+    the test period: with `timestamps` (sorted, one per row) every training
+    row later than the first test timestamp minus `gap` hours is purged;
+    without them `gap` counts rows (one series, one row per hour).
+    With `expanding=False` the training window slides at `min_train` rows.
+
+    Returns:
+        list[tuple[slice, slice]]
+    """
+    test_size = test_size or max(1, n // (n_folds + 1))
+    min_train = min_train or max(1, test_size // 2)
+    first_test = n - n_folds * test_size
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+
+    if first_test < 0 or _purged_end(first_test, gap, timestamps) < min_train:
+        raise ValueError(
+            f"{n} rows are too few for {n_folds} folds of {test_size} "
+            f"with min_train={min_train} and gap={gap}"
+        )
+
+    folds = []
+    for k in range(n_folds):
+        test_start = first_test + k * test_size
+        train_end = _purged_end(test_start, gap, timestamps)
+        train_start = 0 if expanding else train_end - min_train
+        folds.append((slice(train_start, train_end), slice(test_start, test_start + test_size)))
+    return folds
+
+def _evaluate(name, estimator, X, y, fold, train, test):
+    model = clone(estimator)
+    model.fit(X[train], y[train])
+    preds = model.predict(X[test])
+    return {
+        "model_type": name,
+        "fold": fold,
+        "train_size": train.stop - train.start,
+        "test_start": test.start,
+        "rmse": float(np.sqrt(mean_squared_error(y[test], preds))),
+        "mae": mean_absolute_error(y[test], preds),
+        "r2": r2_score(y[test], preds),
+    }
+
+def run_backtest(X, y, models, folds, n_jobs=-1):
+    """
+    Evaluate every candidate on every fold in parallel.
+
+    X and y are converted to NumPy once; folds are contiguous slices, so
+    each task works on views and joblib memory-maps the large arrays to
+    workers instead of pickling a copy per fold.
+
+    Returns:
+        DataFrame: one row per (model, fold)
+    """
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+    y = np.asarray(y, dtype=np.float64)
+
+    for estimator in models.values():
+        if "n_jobs" in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate)(name, estimator, X, y, k, train, test)
+        for name, estimator in models.items()
+        for k, (train, test) in enumerate(folds)
+    )
+    return pd.DataFrame(rows)
+
+def summarize(results, risk=1.0):
+    """
+    Error distribution per model. `score` = mean RMSE + risk * std, so a
+    model that is good on average but unstable across folds is penalized.
+    """
+    summary = results.groupby("model_type")["rmse"].agg(
+        mean_rmse="mean", std_rmse="std", median_rmse="median",
+        p90_rmse=lambda s: s.quantile(0.9), worst_rmse="max"
+    )
+    summary["std_rmse"] = summary["std_rmse"].fillna(0)
+    summary["mean_mae"] = results.groupby("model_type")["mae"].mean()
+    summary["score"] = summary["mean_rmse"] + risk * summary["std_rmse"]
+    return summary.sort_values("score")
@@ -0,0 +1,125 @@
+# src/training/scheduler.py
+
+import os
+import time
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Fit the slowest families first so they do not end up as stragglers
+MODEL_ORDER = ["GradientBoosting", "RandomForest", "Ridge"]
+
+# Per-worker handles to the shared, read-only arrays
+_SHARED = {}
+
+def _init_worker(x_path, y_path):
+    _SHARED["X"] = np.load(x_path, mmap_mode="r")
+    _SHARED["Y"] = np.load(y_path, mmap_mode="r")
+
+def _fit_candidate(horizon, column, model_name, split, params=None):
+    """Fit one (horizon, model) pair inside a worker process"""
+    from src.training.train_multi_day import get_models
+
+    X, Y = _SHARED["X"], _SHARED["Y"]
+    model = get_models(params)[model_name]
+
+    # One core per task: parallelism comes from the pool, not from the model
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X[:split], Y[:split, column])
+    fit_seconds = time.perf_counter() - start
+
+    y_test = Y[split:, column]
+    preds = model.predict(X[split:])
+
+    return {
+        "horizon": horizon,
+        "model_type": model_name,
+        "mae": mean_absolute_error(y_test, preds),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, preds))),
+        "r2": r2_score(y_test, preds),
+        "fit_seconds": fit_seconds,
+        "model": pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL),
+    }
+
+def fit_grid(X, targets, model_names=None, test_size=0.2, max_workers=None, params=None):
+    """
+    Fit every (horizon x model) pair on a process pool.
+
+    X and the stacked targets are written once to .npy files that every
+    worker memory-maps read-only, so the feature matrix is not copied per
+    task. The time-ordered holdout matches train_test_split(shuffle=False).
+
+    Args:
+        X: feature matrix (DataFrame or array)
+        targets: dict of horizon name -> target Series/array
+        params: optional dict of horizon name -> get_models() overrides
+
+    Returns:
+        list[dict]: metrics per pair, with the fitted model under "model"
+    """
+    model_names = model_names or MODEL_ORDER
+    horizons = list(targets)
+    n = len(X)
+    split = n - int(np.ceil(n * test_size))
+
+    X_arr = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+    Y_arr = np.column_stack([np.asarray(targets[h], dtype=np.float64) for h in horizons])
+
+    params = params or {}
+    tasks = [(h, i, name, split, params.get(h)) for name in model_names for i, h in enumerate(horizons)]
+    max_workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory(prefix="aqi_train_") as tmp:
+        x_path, y_path = os.path.join(tmp, "X.npy"), os.path.join(tmp, "Y.npy")
+        np.save(x_path, X_arr)
+        np.save(y_path, Y_arr)
+        del X_arr, Y_arr
+
+        results = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(x_path, y_path)) as pool:
+            futures = [pool.submit(_fit_candidate, *task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                result["model"] = pickle.loads(result["model"])
+                print(f"  ✔ {result['horizon']} [{result['model_type']}] "
+                      f"RMSE {result['rmse']:.3f} ({result['fit_seconds']:.1f}s)")
+                results.append(result)
+
+    order = {(task[0], task[2]): k for k, task in enumerate(tasks)}
+    return sorted(results, key=lambda r: order[(r["horizon"], r["model_type"])])
+
+def log_and_register(results, n_samples):
+    """
+    Flush worker results to MLflow from the parent process and register the
+    best model per horizon as aqi_<horizon>@production.
+    """
+    import mlflow
+    from src.training.train_multi_day import register_production
+
+    best = {}
+    for r in results:
+        with mlflow.start_run(run_name=f"{r['horizon']}_{r['model_type']}") as run:
+            mlflow.log_metric("mae", r["mae"])
+            mlflow.log_metric("rmse", r["rmse"])
+            mlflow.log_metric("r2", r["r2"])
+            mlflow.log_metric("fit_seconds", r["fit_seconds"])
+            mlflow.log_param("model_type", r["model_type"])
+            mlflow.log_param("horizon", r["horizon"])
+            mlflow.log_param("n_samples", n_samples)
+            mlflow.sklearn.log_model(r["model"], "model")
+
+            if r["horizon"] not in best or r["rmse"] < best[r["horizon"]][0]["rmse"]:
+                best[r["horizon"]] = (r, run.info.run_id)
+
+    for horizon, (r, run_id) in best.items():
+        print(f"\n  🏆 {horizon} BEST: {r['model_type']} (RMSE={r['rmse']:.3f}, R²={r['r2']:.3f})")
+        register_production(run_id, f"aqi_{horizon}")
+
+    return {h: r["model"] for h, (r, _) in best.items()}
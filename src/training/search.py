@@ -0,0 +1,145 @@
+# src/training/search.py
+
+import time
+import math
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import ParameterSampler
+
+# Candidate hyperparameters per family in get_models(); the tree count is
+# the halving resource, so it is not part of the space
+SEARCH_SPACES = {
+    "RandomForest": {
+        "max_depth": [8, 12, 16, None],
+        "min_samples_split": [2, 5, 10],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [0.33, 0.5, 1.0],
+    },
+    "GradientBoosting": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_depth": [3, 4, 5, 6],
+        "min_samples_split": [2, 5, 10],
+        "subsample": [0.7, 0.85, 1.0],
+    },
+    "Ridge": {
+        "alpha": [0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0],
+    },
+}
+
+TREE_MODELS = {"RandomForest", "GradientBoosting"}
+
+def _configure(estimator, name, params, n_estimators):
+    model = clone(estimator).set_params(**params)
+    if name in TREE_MODELS:
+        model.set_params(n_estimators=n_estimators)
+    if name == "GradientBoosting":
+        # Early stopping on an internal validation split
+        model.set_params(n_iter_no_change=10, validation_fraction=0.1)
+    return model
+
+def successive_halving(name, estimator, X_train, y_train, X_val, y_val,
+                       n_candidates=18, eta=3, min_fraction=1 / 9,
+                       max_estimators=400, deadline=None, seed=42):
+    """
+    Successive halving over training-set size and tree count.
+
+    Every rung trains the surviving configs on the most recent `fraction`
+    of the training rows with `fraction * max_estimators` trees, scores them
+    on the validation block and keeps the best 1/eta. Stops early at
+    `deadline` (time.monotonic()) and returns the best config of the last
+    fully evaluated rung. The tree count is only returned when that rung
+    trained on all rows: a count picked on a fraction of them would
+    undertrain the production fit.
+
+    Returns:
+        tuple: (best_params:dict, log:list[dict])
+    """
+    space = SEARCH_SPACES.get(name)
+    if not space:
+        return {}, []
+
+    n_configs = min(n_candidates, math.prod(len(v) for v in space.values()))
+    candidates = list(ParameterSampler(space, n_iter=n_configs, random_state=seed))
+    n_rungs = max(1, int(round(math.log(1 / min_fraction, eta))) + 1)
+
+    log = []
+    best_params, best_rmse = {}, float("inf")
+
+    for rung in range(n_rungs):
+        fraction = min(1.0, min_fraction * eta ** rung)
+        n_rows = max(50, int(len(X_train) * fraction))
+        n_estimators = max(20, int(max_estimators * fraction))
+        Xr, yr = X_train[-n_rows:], y_train[-n_rows:]
+
+        scores = []
+        for params in candidates:
+            if deadline is not None and time.monotonic() > deadline:
+                print(f"  ⏱️ {name}: budget exhausted at rung {rung}")
+                return best_params, log
+
+            model = _configure(estimator, name, params, n_estimators)
+            start = time.perf_counter()
+            model.fit(Xr, yr)
+            rmse = float(np.sqrt(mean_squared_error(y_val, model.predict(X_val))))
+
+            used = getattr(model, "n_estimators_", n_estimators) if name in TREE_MODELS else None
+            scores.append((rmse, params, used))
+            log.append({
+                "model_type": name, "rung": rung, "n_rows": n_rows,
+                "n_estimators": used, "params": params, "rmse": rmse,
+                "fit_seconds": time.perf_counter() - start,
+            })
+
+        scores.sort(key=lambda s: s[0])
+        rmse, params, used = scores[0]
+        # The final rung (most data and trees) decides; earlier rungs only prune
+        best_rmse = rmse
+        best_params = dict(params)
+        if used is not None and fraction >= 1.0:
+            best_params["n_estimators"] = int(used)
+
+        keep = max(1, len(scores) // eta)
+        candidates = [p for _, p, _ in scores[:keep]]
+        if len(candidates) == 1 and fraction >= 1.0:
+            break
+
+    print(f"  🔎 {name}: best RMSE {best_rmse:.3f} with {best_params}")
+    return best_params, log
+
+def search_models(models, X, y, budget_seconds=600, val_size=0.2, holdout_size=0.2, **kwargs):
+    """
+    Budgeted search for every family in `models`, splitting the wall-clock
+    budget evenly.
+
+    The last `holdout_size` of X is the selection/reporting holdout of
+    train_and_register_best (same split as its train_test_split) and is
+    never seen here; the validation block is the last `val_size` of the
+    remaining training rows.
+
+    Returns:
+        tuple: (params:dict[name -> dict], log:list[dict])
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_train = len(X) - int(np.ceil(len(X) * holdout_size))
+    X, y = X[:n_train], y[:n_train]
+    split = n_train - int(np.ceil(n_train * val_size))
+
+    params, log = {}, []
+    start = time.monotonic()
+    searchable = [n for n in models if n in SEARCH_SPACES]
+
+    for k, name in enumerate(searchable):
+        remaining = budget_seconds - (time.monotonic() - start)
+        deadline = time.monotonic() + remaining / (len(searchable) - k)
+        best, rows = successive_halving(
+            name, models[name], X[:split], y[:split], X[split:], y[split:],
+            deadline=deadline, **kwargs
+        )
+        if best:
+            params[name] = best
+        log.extend(rows)
+
+    return params, log
@@ -1,44 +1,38 @@
 # src/training/train_multi_day.py
 
 import os
+import argparse
 import numpy as np
-import pandas as pd
 
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, ExtraTreesRegressor
 from sklearn.linear_model import Ridge
 
-from src.utils.data_loader import load_data
+from src.utils.data_loader import load_data, get_quarantine_collection
 from src.preprocessing.preprocess import clean_data
-from src.features.feature_engineering import (
-    add_time_features,
-    add_lag_features,
-    add_rolling_features,
-    add_derived_features,
-    create_targets
-)
+from src.features.feature_engineering import build_features, gap_statistics, FEATURE_COLUMNS, TARGET_COLUMNS
+from src.features.feature_cache import cached_features
+from src.registry.tracking import init_tracking
+from src.training.scheduler import fit_grid, log_and_register
+from src.training.backtest import walk_forward_folds, run_backtest, summarize
+from src.training.search import search_models
+from src.utils import tracing
+from src.utils.tracing import span, traced
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# MLflow Setup (REQUIRED for serverless)
-import dagshub
 import mlflow
 
-dagshub.init(
-    repo_owner=os.environ.get("DAGSHUB_USER"),
-    repo_name=os.environ.get("DAGSHUB_REPO", "pearls-aqi-predictor"),
-    mlflow=True
-)
-mlflow.set_experiment("AQI_Multi_Day_Forecasting_Production")
+EXPERIMENT_NAME = "AQI_Multi_Day_Forecasting_Production"
+MULTI_OUTPUT_MODEL_NAME = "aqi_multi_horizon"
 
-print("✅ MLflow tracking enabled")
-
-def get_models():
-    return {
+def get_models(params=None):
+    """Candidate models; `params` (family -> dict) overrides the defaults, e.g. from search"""
+    models = {
         "RandomForest": RandomForestRegressor(
             n_estimators=200, max_depth=12, min_samples_split=5, 
             min_samples_leaf=2, random_state=42, n_jobs=-1
@@ -49,8 +43,49 @@ def get_models():
         ),
         "Ridge": Ridge(alpha=1.0),
     }
+    for name, overrides in (params or {}).items():
+        if name in models:
+            models[name].set_params(**overrides)
+    return models
+
+def get_multi_output_models():
+    """Model families that fit all horizons natively in one fit/predict"""
+    return {
+        "RandomForest": RandomForestRegressor(
+            n_estimators=200, max_depth=12, min_samples_split=5, 
+            min_samples_leaf=2, random_state=42, n_jobs=-1
+        ),
+        "ExtraTrees": ExtraTreesRegressor(
+            n_estimators=200, max_depth=14, min_samples_split=5, 
+            min_samples_leaf=2, random_state=42, n_jobs=-1
+        ),
+        "Ridge": Ridge(alpha=1.0),
+    }
+
+@traced("register")
+def register_production(run_id, model_name):
+    """Register the run's model and point @production at the new version"""
+    model_uri = f"runs:/{run_id}/model"
+    
+    try:
+        # Register model
+        model_version = mlflow.register_model(model_uri, model_name)
+        print(f"✅ Registered: {model_name} Version {model_version.version}")
+        
+        # Set as production
+        client = mlflow.tracking.MlflowClient()
+        client.set_registered_model_alias(
+            model_name, 
+            "production", 
+            model_version.version
+        )
+        print("✅ Set as @production")
+        
+    except Exception as e:
+        print(f"⚠️ Registration warning: {e}")
+        print("   Model logged but not registered. Check DAGsHub manually.")
 
-def train_and_register_best(X, y, horizon_name):
+def train_and_register_best(X, y, horizon_name, params=None):
     """Train models, select best, and AUTO-REGISTER to MLflow"""
     
     print(f"\n📊 Training data for {horizon_name}:")
@@ -69,7 +104,7 @@ def train_and_register_best(X, y, horizon_name):
     best_r2 = -999
     best_run_id = None
 
-    for name, model in get_models().items():
+    for name, model in get_models(params).items():
         with mlflow.start_run(run_name=f"{horizon_name}_{name}") as run:
             model.fit(X_train, y_train)
             preds = model.predict(X_test)
@@ -90,6 +125,7 @@ def train_and_register_best(X, y, horizon_name):
             mlflow.log_param("model_type", name)
             mlflow.log_param("horizon", horizon_name)
             mlflow.log_param("n_samples", len(X))
+            mlflow.log_params({f"hp_{k}": v for k, v in (params or {}).get(name, {}).items()})
             mlflow.sklearn.log_model(model, "model")
 
             if rmse < best_rmse:
@@ -102,84 +138,231 @@ def train_and_register_best(X, y, horizon_name):
     print(f"\n  🏆 BEST: {best_name} (RMSE={best_rmse:.3f}, R²={best_r2:.3f})")
     
     # AUTO-REGISTER TO MODEL REGISTRY
-    model_name = f"aqi_{horizon_name}"
-    model_uri = f"runs:/{best_run_id}/model"
+    register_production(best_run_id, f"aqi_{horizon_name}")
     
-    try:
-        # Register model
-        model_version = mlflow.register_model(model_uri, model_name)
-        print(f"✅ Registered: {model_name} Version {model_version.version}")
-        
-        # Set as production
-        client = mlflow.tracking.MlflowClient()
-        client.set_registered_model_alias(
-            model_name, 
-            "production", 
-            model_version.version
-        )
-        print(f"✅ Set as @production")
+    return best_model
+
+def train_and_register_backtested(X, y, horizon_name, n_folds=5, n_jobs=-1, params=None, timestamps=None):
+    """
+    Select the best model by walk-forward backtest instead of a single
+    holdout, then refit it on all data and register it. `timestamps`
+    (sorted, one per row) purge the 72h target horizon by time.
+    """
+    print(f"\n📊 Walk-forward backtest for {horizon_name}:")
+    
+    folds = walk_forward_folds(len(X), n_folds=n_folds, timestamps=timestamps)
+    print(f"  • {len(folds)} folds, test size {folds[0][1].stop - folds[0][1].start}")
+    
+    results = run_backtest(X, y, get_models(params), folds, n_jobs=n_jobs)
+    summary = summarize(results)
+    print(summary.round(3).to_string())
+    
+    for name, fold_results in results.groupby("model_type"):
+        with mlflow.start_run(run_name=f"{horizon_name}_{name}_backtest"):
+            for row in fold_results.itertuples():
+                mlflow.log_metric("fold_rmse", row.rmse, step=row.fold)
+                mlflow.log_metric("fold_mae", row.mae, step=row.fold)
+                mlflow.log_metric("fold_r2", row.r2, step=row.fold)
+            for metric, value in summary.loc[name].items():
+                mlflow.log_metric(metric, value)
+            mlflow.log_param("model_type", name)
+            mlflow.log_param("horizon", horizon_name)
+            mlflow.log_param("selection", "walk_forward")
+            mlflow.log_param("n_folds", len(folds))
+    
+    best_name = summary.index[0]
+    print(f"\n  🏆 BEST: {best_name} (mean RMSE={summary.loc[best_name, 'mean_rmse']:.3f} "
+          f"± {summary.loc[best_name, 'std_rmse']:.3f})")
+    
+    best_model = get_models(params)[best_name]
+    with mlflow.start_run(run_name=f"{horizon_name}_{best_name}") as run:
+        best_model.fit(X, y)
+        for metric, value in summary.loc[best_name].items():
+            mlflow.log_metric(metric, value)
+        mlflow.log_metric("rmse", summary.loc[best_name, "mean_rmse"])
+        mlflow.log_param("model_type", best_name)
+        mlflow.log_param("horizon", horizon_name)
+        mlflow.log_param("n_samples", len(X))
+        mlflow.sklearn.log_model(best_model, "model")
+    
+    register_production(run.info.run_id, f"aqi_{horizon_name}")
+    
+    return best_model
+
+def run_search(X, y, horizon_name, budget_seconds):
+    """Budgeted successive-halving search; the log lands in MLflow"""
+    print(f"\n🔎 Hyperparameter search for {horizon_name} ({budget_seconds:.0f}s budget)")
+    
+    with mlflow.start_run(run_name=f"{horizon_name}_search"):
+        params, log = search_models(get_models(), X, y, budget_seconds=budget_seconds)
         
-    except Exception as e:
-        print(f"⚠️ Registration warning: {e}")
-        print("   Model logged but not registered. Check DAGsHub manually.")
+        mlflow.log_param("horizon", horizon_name)
+        mlflow.log_param("budget_seconds", budget_seconds)
+        mlflow.log_metric("n_fits", len(log))
+        for name in sorted({row["model_type"] for row in log}):
+            rows = [r for r in log if r["model_type"] == name]
+            last_rung = max(r["rung"] for r in rows)
+            mlflow.log_metric(f"{name}_best_rmse", min(r["rmse"] for r in rows if r["rung"] == last_rung))
+        mlflow.log_dict({"best_params": params, "log": log}, f"search/{horizon_name}.json")
+    
+    return params
+
+def train_and_register_multi_output(X, Y):
+    """
+    Train one model predicting every horizon (columns of Y) in a single
+    fit/predict, select by mean RMSE across horizons and register it as
+    aqi_multi_horizon@production.
+    """
+    print("\n📊 Multi-output training data:")
+    print(f"  • X shape: {X.shape}, horizons: {list(Y.columns)}")
+    
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, Y, test_size=0.2, shuffle=False
+    )
+    
+    best_model = None
+    best_rmse = float("inf")
+    best_name = None
+    best_run_id = None
+    
+    for name, model in get_multi_output_models().items():
+        with mlflow.start_run(run_name=f"multi_horizon_{name}") as run:
+            model.fit(X_train, Y_train)
+            preds = model.predict(X_test)
+            
+            print(f"\n  [{name}]")
+            rmses = []
+            for i, horizon in enumerate(Y.columns):
+                rmse = np.sqrt(mean_squared_error(Y_test.iloc[:, i], preds[:, i]))
+                mae = mean_absolute_error(Y_test.iloc[:, i], preds[:, i])
+                r2 = r2_score(Y_test.iloc[:, i], preds[:, i])
+                rmses.append(rmse)
+                print(f"    {horizon}: RMSE {rmse:.3f}, MAE {mae:.3f}, R² {r2:.3f}")
+                
+                mlflow.log_metric(f"rmse_{horizon}", rmse)
+                mlflow.log_metric(f"mae_{horizon}", mae)
+                mlflow.log_metric(f"r2_{horizon}", r2)
+            
+            mean_rmse = float(np.mean(rmses))
+            mlflow.log_metric("rmse", mean_rmse)
+            mlflow.log_param("model_type", name)
+            mlflow.log_param("horizon", "multi_horizon")
+            mlflow.log_param("n_samples", len(X))
+            mlflow.sklearn.log_model(model, "model")
+            
+            if mean_rmse < best_rmse:
+                best_rmse = mean_rmse
+                best_model = model
+                best_name = name
+                best_run_id = run.info.run_id
+    
+    print(f"\n  🏆 BEST: {best_name} (mean RMSE={best_rmse:.3f})")
+    register_production(best_run_id, MULTI_OUTPUT_MODEL_NAME)
     
     return best_model
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--multi-output", action="store_true",
+                        help="train one model for all horizons (aqi_multi_horizon)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for the (horizon x model) grid; 1 trains sequentially")
+    parser.add_argument("--selection", choices=["holdout", "backtest"], default="holdout",
+                        help="pick models on one holdout or on a walk-forward backtest")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--search-budget", type=float, default=0,
+                        help="wall-clock seconds for hyperparameter search (0 = defaults)")
+    parser.add_argument("--compact", action="store_true",
+                        help="float32/int8/category frames through cleaning and features")
+    parser.add_argument("--no-quarantine", action="store_true",
+                        help="do not write rejected rows to the quarantine collection")
+    parser.add_argument("--trace", action="store_true",
+                        help="record per-stage timings/resources (also enabled by AQI_TRACE=1)")
+    parser.add_argument("--no-feature-cache", action="store_true",
+                        help="always recompute features instead of reusing the feature cache")
+    args = parser.parse_args()
+    
+    if args.trace:
+        tracing.enable()
+    
     print("="*60)
     print("🚀 AQI TRAINING PIPELINE (SERVERLESS)")
     print("="*60)
     
-    print("\n📥 Loading data...")
-    df = load_data()
-    df = clean_data(df)
+    # MLflow Setup (REQUIRED for serverless)
+    init_tracking(EXPERIMENT_NAME)
+    print("✅ MLflow tracking enabled")
     
-    print(f"✅ Raw data: {len(df)} records")
-    print(f"📅 Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
+    print("\n📥 Loading data...")
+    raw = load_data(incremental=True)
 
-    print("\n🔧 Engineering features...")
-    df = add_time_features(df)
-    df = add_lag_features(df, target="pm2_5", lags=[24, 48, 72])
-    df = add_rolling_features(df)
-    df = add_derived_features(df)
-    df = create_targets(df)
+    def prepare(df):
+        quarantine = None if args.no_quarantine else get_quarantine_collection()
+        df = clean_data(df, compact=args.compact, quarantine=quarantine)
+        print(f"✅ Raw data: {len(df)} records")
+        print(f"📅 Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
 
-    df = df.dropna()
+        gaps = gap_statistics(df)
+        print(f"🕳️ Missing hours: {gaps['missing_rows'].sum()} "
+              f"(longest gap {gaps['longest_gap'].max()}h, coverage {gaps['coverage'].min():.1%})")
+
+        print("\n🔧 Engineering features...")
+        return build_features(df, time_aware=True, compact=args.compact)
+
+    # Unchanged data and feature code skip cleaning and feature engineering
+    if args.no_feature_cache:
+        df = prepare(raw)
+    else:
+        df = cached_features(raw, build=prepare, spec={"time_aware": True, "targets": True, "compact": args.compact})
+    del raw
+
+    # Time order across cities, so holdouts and backtest folds never look back
+    df = df.dropna().sort_values("timestamp", kind="stable").reset_index(drop=True)
     print(f"✅ Final dataset: {df.shape}")
     
     if len(df) < 100:
         print(f"\n⚠️ WARNING: Only {len(df)} samples!")
         print("   Continuing anyway for serverless demo...")
     
-    feature_cols = [
-        "pm2_5", "pm10", "co", "no2", "o3", "so2", "nh3",
-        "hour", "day", "month", "day_of_week", "is_weekend",
-        "is_morning_rush", "is_evening_rush",
-        "temp", "humidity", "pressure", "wind_speed", "clouds",
-        "wind_from_north", "wind_from_east", "wind_from_south", "wind_from_west",
-        "temp_high", "temp_low", "stable_atmosphere",
-        "pm2_5_lag24", "pm2_5_lag48", "pm2_5_lag72",
-        "temp_lag24", "wind_speed_lag24", "humidity_lag24",
-        "aqi_roll24", "aqi_roll72", "aqi_std24", "aqi_roll24_max",
-        "temp_roll24", "wind_roll24",
-        "pm2_5_change_rate", "aqi_change_24h",
-        "temp_change_24h", "wind_change_24h",
-        "pm2_5_pm10_ratio", "co_no2_ratio"
-    ]
-
-    X = df[feature_cols]
+    X = df[FEATURE_COLUMNS]
+
+    params = {h: None for h in TARGET_COLUMNS}
+    if args.search_budget > 0:
+        with span("search", rows=len(X)):
+            for horizon, col in TARGET_COLUMNS.items():
+                params[horizon] = run_search(X, df[col], horizon, args.search_budget / len(TARGET_COLUMNS))
 
     print("\n" + "="*60)
     print("📈 Training & Registering Models")
     print("="*60)
     
-    train_and_register_best(X, df["target_t1"], "t_plus_1")
-    train_and_register_best(X, df["target_t2"], "t_plus_2")
-    train_and_register_best(X, df["target_t3"], "t_plus_3")
+    with span("train", rows=len(X)):
+        if args.multi_output:
+            Y = df[list(TARGET_COLUMNS.values())]
+            Y.columns = list(TARGET_COLUMNS)
+            train_and_register_multi_output(X, Y)
+        elif args.selection == "backtest":
+            for horizon, col in TARGET_COLUMNS.items():
+                train_and_register_backtested(X, df[col], horizon, n_folds=args.folds,
+                                              n_jobs=args.workers, params=params[horizon],
+                                              timestamps=df["timestamp"])
+        elif args.workers > 1:
+            targets = {h: df[col] for h, col in TARGET_COLUMNS.items()}
+            results = fit_grid(X, targets, max_workers=args.workers, params=params)
+            log_and_register(results, n_samples=len(X))
+        else:
+            train_and_register_best(X, df["target_t1"], "t_plus_1", params=params["t_plus_1"])
+            train_and_register_best(X, df["target_t2"], "t_plus_2", params=params["t_plus_2"])
+            train_and_register_best(X, df["target_t3"], "t_plus_3", params=params["t_plus_3"])
 
     print("\n" + "="*60)
     print("✅ SERVERLESS TRAINING COMPLETE!")
     print("="*60)
     print("\n📍 Models registered in DAGsHub MLflow Registry")
     print("🎯 Tagged with @production alias")
-    print("\nNext: Run predictions using registered models")
\ No newline at end of file
+    print("\nNext: Run predictions using registered models")
+
+    if tracing.is_enabled():
+        with mlflow.start_run(run_name="pipeline_trace"):
+            tracing.log_to_mlflow()
+        print(f"🧭 Stage timings logged to MLflow (pipeline_trace) and {tracing.trace_path()}")
\ No newline at end of file
@@ -1,21 +1,142 @@
 # src/utils/aqi_converter.py
 
+import numpy as np
+
+# US EPA AQI breakpoints: (concentration low, concentration high) per category.
+# PM in µg/m³, O3/NO2/SO2 in ppb, CO in ppm.
+AQI_BREAKPOINTS = [(0, 50), (51, 100), (101, 150), (151, 200), (201, 300), (301, 400), (401, 500)]
+
+CONCENTRATION_BREAKPOINTS = {
+    "pm2_5": [(0.0, 12.0), (12.1, 35.4), (35.5, 55.4), (55.5, 150.4), (150.5, 250.4), (250.5, 350.4), (350.5, 500.4)],
+    "pm10": [(0, 54), (55, 154), (155, 254), (255, 354), (355, 424), (425, 504), (505, 604)],
+    # 8-hour O3 up to 200 ppb, then the 1-hour table's upper segments
+    "o3": [(0, 54), (55, 70), (71, 85), (86, 105), (106, 200), (201, 504), (505, 604)],
+    "no2": [(0, 53), (54, 100), (101, 360), (361, 649), (650, 1249), (1250, 1649), (1650, 2049)],
+    "so2": [(0, 35), (36, 75), (76, 185), (186, 304), (305, 604), (605, 804), (805, 1004)],
+    "co": [(0.0, 4.4), (4.5, 9.4), (9.5, 12.4), (12.5, 15.4), (15.5, 30.4), (30.5, 40.4), (40.5, 50.4)],
+}
+
+# OpenWeather reports every pollutant in µg/m³; gases are converted to EPA
+# units at 25°C / 1 atm: ppb = µg/m³ * 24.45 / molecular weight
+UGM3_TO_EPA_UNITS = {
+    "pm2_5": 1.0,
+    "pm10": 1.0,
+    "o3": 24.45 / 48.00,
+    "no2": 24.45 / 46.01,
+    "so2": 24.45 / 64.07,
+    "co": 24.45 / 28.01 / 1000,  # ppm
+}
+
+AQI_LABELS = [
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous",
+]
+
+_AQI_UPPER = np.array([hi for _, hi in AQI_BREAKPOINTS[:5]], dtype=float)
+_LABELS = np.array([""] + AQI_LABELS, dtype=object)
+
+def _tables(pollutant):
+    if pollutant not in CONCENTRATION_BREAKPOINTS:
+        raise ValueError(f"Unsupported pollutant: {pollutant}")
+    conc = np.array(CONCENTRATION_BREAKPOINTS[pollutant], dtype=float)
+    aqi = np.array(AQI_BREAKPOINTS, dtype=float)
+    return conc[:, 0], conc[:, 1], aqi[:, 0], aqi[:, 1]
+
+def sub_index(pollutant, values, units="ugm3"):
+    """
+    Vectorized sub-index for one pollutant.
+
+    Returns:
+        tuple: (sub_index:float[], aqi_code:int8[], aqi_label:object[])
+        Invalid inputs (NaN, negative) give NaN / 0 / "".
+    """
+    c = np.asarray(values, dtype=float)
+    if units == "ugm3":
+        c = c * UGM3_TO_EPA_UNITS[pollutant]
+
+    c_lo, c_hi, i_lo, i_hi = _tables(pollutant)
+    valid = np.isfinite(c) & (c >= 0)
+
+    # One searchsorted gives the segment, which is also the category
+    seg = np.searchsorted(c_hi, np.where(valid, c, 0.0), side="left")
+    above = seg >= len(c_hi)
+    seg = np.minimum(seg, len(c_hi) - 1)
+
+    index = (i_hi[seg] - i_lo[seg]) / (c_hi[seg] - c_lo[seg]) * (c - c_lo[seg]) + i_lo[seg]
+    index = np.clip(index, 0, 500)
+    index = np.where(above, 500.0, index)
+    index = np.where(valid, index, np.nan)
+
+    codes = np.where(valid, np.minimum(seg + 1, len(AQI_LABELS)), 0).astype(np.int8)
+    return index, codes, _LABELS[codes]
+
+def aqi_category(aqi):
+    """Vectorized AQI value -> (aqi_code:int8[], aqi_label:object[])"""
+    aqi = np.asarray(aqi, dtype=float)
+    valid = np.isfinite(aqi) & (aqi >= 0)
+    codes = np.where(valid, np.searchsorted(_AQI_UPPER, np.where(valid, aqi, 0), side="left") + 1, 0)
+    codes = codes.astype(np.int8)
+    return codes, _LABELS[codes]
+
+def compute_aqi(concentrations, units="ugm3"):
+    """
+    Overall AQI from several pollutants at once.
+
+    Args:
+        concentrations: mapping (dict or DataFrame) of pollutant -> array.
+            Any subset of pm2_5, pm10, o3, no2, so2, co.
+
+    Returns:
+        dict: per-pollutant `<name>_aqi` sub-indices plus `aqi` (max
+        sub-index), `dominant_pollutant`, `aqi_code` and `aqi_label`.
+    """
+    pollutants = [p for p in CONCENTRATION_BREAKPOINTS if p in concentrations]
+    if not pollutants:
+        raise ValueError("No supported pollutant columns given")
+
+    result = {}
+    stacked = []
+    for p in pollutants:
+        index, _, _ = sub_index(p, concentrations[p], units=units)
+        result[f"{p}_aqi"] = index
+        stacked.append(index)
+
+    stacked = np.vstack(stacked)
+    any_valid = np.isfinite(stacked).any(axis=0)
+    filled = np.where(np.isfinite(stacked), stacked, -1.0)
+
+    aqi = np.where(any_valid, filled.max(axis=0), np.nan)
+    dominant = np.array(pollutants, dtype=object)[filled.argmax(axis=0)]
+    codes, labels = aqi_category(aqi)
+
+    result["aqi"] = aqi
+    result["dominant_pollutant"] = np.where(any_valid, dominant, None)
+    result["aqi_code"] = codes
+    result["aqi_label"] = labels
+    return result
+
+def pm25_to_aqi(pm25):
+    """
+    PM2.5 (µg/m³) -> integer AQI. Accepts scalars or arrays; NaN, inf and
+    negative readings map to 0 so the dashboard never crashes on bad rows.
+    """
+    index, _, _ = sub_index("pm2_5", pm25)
+    aqi = np.where(np.isfinite(index), np.round(index), 0).astype(int)
+    return int(aqi) if aqi.ndim == 0 else aqi
+
 def pm25_to_aqi_category(pm25_value):
     """
     Convert PM2.5 value to AQI category code and label.
-    
+
     Returns:
         tuple: (aqi_code:int, aqi_label:str)
+        For array input, (aqi_code:int8[], aqi_label:object[]).
     """
-    if pm25_value <= 12.0:
-        return 1, "Good"
-    elif pm25_value <= 35.4:
-        return 2, "Moderate"
-    elif pm25_value <= 55.4:
-        return 3, "Unhealthy for Sensitive Groups"
-    elif pm25_value <= 150.4:
-        return 4, "Unhealthy"
-    elif pm25_value <= 250.4:
-        return 5, "Very Unhealthy"
-    else:
-        return 6, "Hazardous"
+    _, codes, labels = sub_index("pm2_5", pm25_value)
+    if codes.ndim == 0:
+        return int(codes), str(labels)
+    return codes, labels
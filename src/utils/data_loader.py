@@ -1,42 +1,238 @@
 # src/utils/data_loader.py
 
 import os
+import json
+import numpy as np
 import pandas as pd
-from pymongo import MongoClient
+from bson import decode_all
 
-def get_client():
-    """Create MongoDB client with fallback connection strategies"""
-    uri = os.getenv("MONGODB_URI")
-    if not uri:
-        raise ValueError("MONGODB_URI environment variable not set")
+from src.utils.tracing import traced
+from src.storage.connection import get_client  # re-exported: callers import it from here
+
+# Columns the cleaning/feature/training pipeline actually reads
+FEATURE_FIELDS = [
+    "city", "lat", "lon", "timestamp",
+    "aqi", "pm2_5", "pm10", "co", "no2", "o3", "so2", "nh3",
+    "temp", "humidity", "pressure", "wind_speed", "wind_deg", "clouds", "weather_main",
+    "source", "ingestion_time",
+]
+
+# Column dtypes for streaming decode (anything not listed is kept as object)
+FIELD_DTYPES = {
+    "lat": "float64", "lon": "float64",
+    "timestamp": "datetime64[ms]", "ingestion_time": "datetime64[ms]",
+    "aqi": "float64", "pm2_5": "float64", "pm10": "float64", "co": "float64",
+    "no2": "float64", "o3": "float64", "so2": "float64", "nh3": "float64",
+    "temp": "float64", "humidity": "float64", "pressure": "float64",
+    "wind_speed": "float64", "wind_deg": "float64", "clouds": "float64",
+}
+
+CACHE_DIR = os.getenv("AQI_CACHE_DIR", os.path.join("data", "cache"))
+
+def get_feature_collection(client=None):
+    """Return the feature collection configured through the environment"""
+    client = client or get_client()
+    
+    db_name = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
+    collection_name = os.getenv("MONGODB_FEATURE_COLLECTION", "aqi_features")
+    
+    return client[db_name][collection_name]
+
+def get_quarantine_collection(client=None):
+    """Collection receiving rows rejected by clean_data's validation rules"""
+    client = client or get_client()
+    
+    db_name = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
+    collection_name = os.getenv("MONGODB_QUARANTINE_COLLECTION", "aqi_quarantine")
+    
+    return client[db_name][collection_name]
+
+@traced("load")
+def load_data(incremental=False, columnar=False, fields=None, cache_dir=None):
+    """Load data from MongoDB feature collection"""
+    coll = get_feature_collection()
+    
+    if incremental:
+        return load_data_incremental(coll, fields=fields or FEATURE_FIELDS, cache_dir=cache_dir)
+    if columnar:
+        return load_data_columnar(coll, fields=fields or FEATURE_FIELDS)
+    
+    projection = {f: 1 for f in fields} if fields else None
+    return pd.DataFrame(list(coll.find({}, projection)))
+
+# -------------------- STREAMING COLUMNAR DECODE --------------------
+
+def _empty_column(dtype, n):
+    if dtype == "float64":
+        return np.full(n, np.nan, dtype="float64")
+    if dtype.startswith("datetime64"):
+        return np.full(n, np.datetime64("NaT"), dtype=dtype)
+    return np.empty(n, dtype=object)
+
+def load_data_columnar(coll, fields=FEATURE_FIELDS, query=None, batch_size=10000):
+    """
+    Full scan that streams raw BSON batches straight into typed NumPy columns.
+    
+    Columns are preallocated from the document count, so only one batch of
+    decoded documents is alive at a time instead of the whole result set as
+    Python dicts. Uses pymongoarrow's native decoder when it is installed.
+    """
+    query = query or {}
+    fields = list(fields)
     
-    # Try standard connection first
     try:
-        return MongoClient(
-            uri,
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000
-        )
-    except Exception as e:
-        print(f"⚠️ Standard connection failed: {e}")
-        print("🔄 Retrying with tlsInsecure=True...")
+        import pymongoarrow
+        from pymongoarrow.api import Schema, find_pandas_all
+        from pymongoarrow.types import ObjectIdType
+    except ImportError:
+        find_pandas_all = None
+    
+    # A wheel without its compiled extension imports fine but cannot decode
+    if find_pandas_all is not None and pymongoarrow.libbson_version is not None:
+        import pyarrow as pa
+        arrow_types = {"float64": pa.float64(), "datetime64[ms]": pa.timestamp("ms")}
+        schema = Schema({
+            f: ObjectIdType() if f == "_id" else arrow_types.get(FIELD_DTYPES.get(f), pa.string())
+            for f in fields
+        })
+        df = find_pandas_all(coll, query, schema=schema)
+        if "_id" in df.columns:
+            # ObjectId values, as the fallback decoder returns them
+            df["_id"] = np.array(list(df["_id"]), dtype=object)
+        return df
+    
+    n = coll.count_documents(query)
+    columns = {f: _empty_column(FIELD_DTYPES.get(f, "object"), n) for f in fields}
+    projection = {f: 1 for f in fields}
+    if "_id" not in fields:
+        projection["_id"] = 0
+    
+    i = 0
+    for raw in coll.find_raw_batches(query, projection, batch_size=batch_size):
+        docs = decode_all(raw)
+        k = len(docs)
         
-        # Fallback to insecure TLS
-        return MongoClient(
-            uri,
-            tlsInsecure=True,
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000
-        )
-
-def load_data():
-    """Load data from MongoDB feature collection"""
-    client = get_client()
+        # Documents inserted during the scan: grow the columns
+        capacity = len(columns[fields[0]])
+        if i + k > capacity:
+            extra = max(i + k, 2 * capacity) - capacity
+            for f in fields:
+                columns[f] = np.concatenate([columns[f], _empty_column(FIELD_DTYPES.get(f, "object"), extra)])
+        
+        for f in fields:
+            values = [d.get(f) for d in docs]
+            dtype = FIELD_DTYPES.get(f, "object")
+            if dtype == "float64":
+                columns[f][i:i + k] = np.array(values, dtype="float64")
+            elif dtype.startswith("datetime64"):
+                columns[f][i:i + k] = np.array(values, dtype=dtype)
+            else:
+                columns[f][i:i + k] = values
+        i += k
     
-    db_name = os.getenv("MONGODB_FEATURE_DB", "aqi_db")
-    collection_name = os.getenv("MONGODB_FEATURE_COLLECTION", "aqi_features")
+    return pd.DataFrame({f: columns[f][:i] for f in fields})
+
+# -------------------- LOCAL COLUMNAR CACHE --------------------
+
+def _cache_paths(coll, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    base = os.path.join(cache_dir, f"{coll.database.name}.{coll.name}")
+    return f"{base}.parquet", f"{base}.meta.json"
+
+def invalidate_cache(coll, cache_dir=None):
+    """Drop the local cache of a collection (call after bulk rewrites)"""
+    for path in _cache_paths(coll, cache_dir):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _read_cache(coll, fields, cache_dir=None):
+    data_path, meta_path = _cache_paths(coll, cache_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    
+    with open(meta_path) as f:
+        meta = json.load(f)
+    
+    # A cache built with another projection cannot be extended
+    if meta.get("fields") != list(fields):
+        return None, None
+    
+    return pd.read_parquet(data_path), meta
+
+def _write_cache(coll, df, fields, cache_dir=None):
+    data_path, meta_path = _cache_paths(coll, cache_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    
+    meta = {
+        "fields": list(fields),
+        "rows": len(df),
+        "timestamp_mark": None,
+        "ingestion_mark": None,
+    }
+    if len(df) and "timestamp" in df.columns:
+        meta["timestamp_mark"] = pd.Timestamp(df["timestamp"].max()).isoformat()
+    if len(df) and "ingestion_time" in df.columns and df["ingestion_time"].notna().any():
+        meta["ingestion_mark"] = pd.Timestamp(df["ingestion_time"].max()).isoformat()
+    
+    # Write-then-rename so an interrupted run never leaves a torn cache
+    df.to_parquet(data_path + ".tmp", index=False)
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+def _fetch(coll, query, fields):
+    projection = {f: 1 for f in fields}
+    df = pd.DataFrame(list(coll.find(query, projection)))
+    if "_id" in df.columns:
+        df["_id"] = df["_id"].astype(str)
+    return df
+
+def _fetch_all(coll, fields):
+    df = load_data_columnar(coll, fields=["_id"] + list(fields))
+    df["_id"] = df["_id"].astype(str)
+    return df
+
+def load_data_incremental(coll, fields=FEATURE_FIELDS, cache_dir=None):
+    """
+    Load the feature collection through a local Parquet cache.
+    
+    Only documents newer than the cached high-water marks are fetched: new
+    hours (`timestamp`) and rewritten/upserted documents (`ingestion_time`).
+    If the merged cache no longer matches the server document count (rows
+    deleted or re-inserted, e.g. by backfill_with_weather), it is rebuilt.
+    """
+    cached, meta = _read_cache(coll, fields, cache_dir)
+    
+    if cached is None or meta.get("timestamp_mark") is None:
+        print("📥 Cache miss: loading full collection")
+        df = _fetch_all(coll, fields)
+        _write_cache(coll, df, fields, cache_dir)
+        return df
+    
+    ts_mark = pd.Timestamp(meta["timestamp_mark"]).to_pydatetime()
+    conditions = [{"timestamp": {"$gt": ts_mark}}]
+    if meta.get("ingestion_mark"):
+        ing_mark = pd.Timestamp(meta["ingestion_mark"]).to_pydatetime()
+        conditions.append({"ingestion_time": {"$gt": ing_mark}})
+    
+    new = _fetch(coll, {"$or": conditions}, fields)
+    
+    if len(new):
+        df = pd.concat([cached, new], ignore_index=True)
+        df = df.drop_duplicates(subset=["_id"], keep="last").reset_index(drop=True)
+    else:
+        df = cached
+    
+    # Deleted or re-inserted documents leave the cache out of step with the server
+    if len(df) != coll.estimated_document_count():
+        print("🔄 Cache out of sync with collection: reloading")
+        df = _fetch_all(coll, fields)
+        _write_cache(coll, df, fields, cache_dir)
+        return df
+    
+    if len(new):
+        _write_cache(coll, df, fields, cache_dir)
     
-    coll = client[db_name][collection_name]
-    return pd.DataFrame(list(coll.find()))
\ No newline at end of file
+    print(f"✅ Cache hit: {len(df)} records ({len(new)} fetched)")
+    return df
@@ -0,0 +1,59 @@
+# src/utils/downsample.py
+
+import numpy as np
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `n_out - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket. Peaks and dips
+    survive, unlike plain striding or averaging.
+
+    Args:
+        x: increasing numeric or datetime64 values
+        y: values (NaNs are dropped first)
+        n_out: number of points to keep
+
+    Returns:
+        ndarray: sorted indices into the original x/y
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(valid)
+    if n <= n_out:
+        return valid
+    if n_out < 3:
+        return valid[[0, n - 1][:max(n_out, 0)]]
+
+    xv, yv = x[valid], y[valid]
+    # Bucket edges over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Mean of the next bucket (the last point for the final bucket)
+        if b + 2 < len(edges):
+            nlo, nhi = edges[b + 1], edges[b + 2]
+            next_x, next_y = xv[nlo:nhi].mean(), yv[nlo:nhi].mean()
+        else:
+            next_x, next_y = xv[-1], yv[-1]
+
+        area = np.abs(
+            (xv[prev] - next_x) * (yv[lo:hi] - yv[prev])
+            - (xv[prev] - xv[lo:hi]) * (next_y - yv[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        keep[b + 1] = prev
+
+    keep[-1] = n - 1
+    return valid[keep]
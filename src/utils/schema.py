@@ -0,0 +1,37 @@
+# src/utils/schema.py
+
+import numpy as np
+import pandas as pd
+
+# 0/1 flags and calendar parts: all fit in int8
+INT8_COLUMNS = [
+    "hour", "day", "month", "day_of_week", "is_weekend",
+    "is_morning_rush", "is_evening_rush",
+    "wind_from_north", "wind_from_east", "wind_from_south", "wind_from_west",
+    "temp_high", "temp_low", "stable_atmosphere",
+]
+
+# Low-cardinality strings
+CATEGORY_COLUMNS = ["city", "weather_main", "source"]
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow a frame's dtypes: float64 -> float32,
+    known flags/calendar parts -> int8, low-cardinality strings -> category.
+    Columns that are already compact are left untouched.
+    """
+    casts = {}
+    for col, dtype in df.dtypes.items():
+        if col in INT8_COLUMNS:
+            if dtype != np.int8 and not df[col].isna().any():
+                casts[col] = np.int8
+        elif col in CATEGORY_COLUMNS:
+            if not isinstance(dtype, pd.CategoricalDtype):
+                casts[col] = "category"
+        elif dtype == np.float64:
+            casts[col] = np.float32
+    return df.astype(casts) if casts else df
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Deep memory usage of a frame in MiB"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
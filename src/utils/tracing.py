@@ -0,0 +1,256 @@
+# src/utils/tracing.py
+
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is not reported
+    resource = None
+
+# AQI_TRACE=1 writes <AQI_TRACE_DIR>/<run>.jsonl; any other non-false value is used as the file path
+TRACE_ENV = os.getenv("AQI_TRACE", "")
+TRACE_DIR = os.getenv("AQI_TRACE_DIR", os.path.join("data", "traces"))
+
+# Round-trip counters, bumped by the Mongo listeners and the HTTP hook
+_COUNTERS = {"mongo_calls": 0, "mongo_ms": 0.0, "http_calls": 0, "http_ms": 0.0,
+             "pool_checkouts": 0, "pool_wait_ms": 0.0}
+_LOCK = threading.Lock()
+
+def _bump(calls, ms_key, ms):
+    with _LOCK:
+        _COUNTERS[calls] += 1
+        _COUNTERS[ms_key] += ms
+
+def bump_pool_wait(ms):
+    """Called by the shared Mongo client's pool listener on every checkout"""
+    _bump("pool_checkouts", "pool_wait_ms", ms)
+
+def _peak_rss_mb():
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 ** 2 if os.uname().sysname == "Darwin" else peak / 1024
+
+_HOOKS_INSTALLED = False
+
+def _install_hooks():
+    """Count Mongo commands (clients created afterwards) and requests' HTTP sends"""
+    global _HOOKS_INSTALLED
+    if _HOOKS_INSTALLED:
+        return
+    _HOOKS_INSTALLED = True
+
+    from pymongo import monitoring
+
+    class _CommandCounter(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            _bump("mongo_calls", "mongo_ms", event.duration_micros / 1000)
+
+        def failed(self, event):
+            _bump("mongo_calls", "mongo_ms", event.duration_micros / 1000)
+
+    monitoring.register(_CommandCounter())
+
+    try:
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+
+    send = HTTPAdapter.send
+
+    @functools.wraps(send)
+    def traced_send(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send(self, *args, **kwargs)
+        finally:
+            _bump("http_calls", "http_ms", (time.perf_counter() - start) * 1000)
+
+    HTTPAdapter.send = traced_send
+
+class Span:
+    """One timed stage; set `rows` (or any attribute via set()) inside the block"""
+
+    __slots__ = ("name", "attrs", "rows", "parent", "_start")
+
+    def __init__(self, name, parent=None, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.rows = None
+        self.parent = parent
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+class _NoopSpan:
+    """Returned when tracing is off: no clocks, no allocation per call"""
+
+    __slots__ = ()
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+_NOOP = _NoopSpan()
+
+class Tracer:
+    """Collects finished spans in memory and appends each one to a JSONL file"""
+
+    def __init__(self, path, run_name=None):
+        self.path = path
+        self.run_id = run_name or f"{datetime.utcnow():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        self.records = []
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def start(self, name, **attrs):
+        stack = self._stack()
+        span = Span(name, parent=stack[-1].name if stack else None, **attrs)
+        with _LOCK:
+            counters = dict(_COUNTERS)
+        span._start = (time.perf_counter(), time.process_time(), _peak_rss_mb(), counters, datetime.utcnow())
+        stack.append(span)
+        return span
+
+    def finish(self, span, error=None):
+        wall0, cpu0, rss0, counters0, started = span._start
+        wall, cpu, rss = time.perf_counter() - wall0, time.process_time() - cpu0, _peak_rss_mb()
+        with _LOCK:
+            counters = dict(_COUNTERS)
+        self._stack().pop()
+
+        record = {
+            "run_id": self.run_id,
+            "span": span.name,
+            "parent": span.parent,
+            "start": started.isoformat(),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "peak_rss_mb": round(rss, 1),
+            "peak_rss_delta_mb": round(rss - rss0, 1),
+            "rows": span.rows,
+            "mongo_calls": counters["mongo_calls"] - counters0["mongo_calls"],
+            "mongo_ms": round(counters["mongo_ms"] - counters0["mongo_ms"], 3),
+            "http_calls": counters["http_calls"] - counters0["http_calls"],
+            "http_ms": round(counters["http_ms"] - counters0["http_ms"], 3),
+            "pool_checkouts": counters["pool_checkouts"] - counters0["pool_checkouts"],
+            "pool_wait_ms": round(counters["pool_wait_ms"] - counters0["pool_wait_ms"], 3),
+            **span.attrs,
+        }
+        if error is not None:
+            record["error"] = repr(error)
+
+        with _LOCK:
+            self.records.append(record)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        return record
+
+_TRACER = None
+
+def enable(path=None, run_name=None):
+    """Start tracing this process; returns the Tracer. Idempotent."""
+    global _TRACER
+    if _TRACER is None:
+        run_name = run_name or f"{datetime.utcnow():%Y%m%d_%H%M%S}_{os.getpid()}"
+        _TRACER = Tracer(path or os.path.join(TRACE_DIR, f"{run_name}.jsonl"), run_name)
+        _install_hooks()
+        print(f"🧭 Tracing to {_TRACER.path}")
+    return _TRACER
+
+def is_enabled():
+    return _TRACER is not None
+
+def trace_path():
+    return _TRACER.path if _TRACER is not None else None
+
+class _SpanContext:
+    __slots__ = ("span",)
+
+    def __init__(self, name, attrs):
+        self.span = _TRACER.start(name, **attrs)
+
+    def __enter__(self):
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _TRACER.finish(self.span, error=exc)
+        return False
+
+def span(name, **attrs):
+    """
+    Context manager timing one stage:
+
+        with span("features") as s:
+            df = build_features(df)
+            s.rows = len(df)
+    """
+    if _TRACER is None:
+        return _NOOP
+    return _SpanContext(name, attrs)
+
+def traced(name=None):
+    """Decorator form of span(); `rows` is taken from the result's shape when it has one"""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return fn(*args, **kwargs)
+            with _SpanContext(span_name, {}) as s:
+                result = fn(*args, **kwargs)
+                shape = getattr(result, "shape", None)
+                if shape:
+                    s.rows = shape[0]
+                return result
+        return wrapper
+    return decorator
+
+def records():
+    """Finished spans of this process (empty when tracing is off)"""
+    return list(_TRACER.records) if _TRACER is not None else []
+
+def log_to_mlflow():
+    """
+    Log every finished span to the active MLflow run as `<span>.<metric>`.
+    Repeated span names are logged as steps of the same metric.
+    """
+    if _TRACER is None:
+        return
+    import mlflow
+
+    steps = {}
+    for record in records():
+        step = steps[record["span"]] = steps.get(record["span"], -1) + 1
+        for metric in ("wall_s", "cpu_s", "peak_rss_delta_mb", "rows", "mongo_calls", "http_calls", "pool_wait_ms"):
+            if record.get(metric) is not None:
+                mlflow.log_metric(f"{record['span']}.{metric}", record[metric], step=step)
+    mlflow.log_artifact(_TRACER.path, artifact_path="trace")
+
+if TRACE_ENV.lower() not in ("", "0", "false", "no"):
+    enable(None if TRACE_ENV.lower() in ("1", "true", "yes") else TRACE_ENV)
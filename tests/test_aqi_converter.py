@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+
+from src.utils.aqi_converter import (
+    compute_aqi,
+    pm25_to_aqi,
+    pm25_to_aqi_category,
+    sub_index,
+)
+
+
+def test_pm25_matches_scalar_categories():
+    values = np.array([0, 5, 12.0, 12.05, 30, 35.4, 45, 55.4, 120, 150.4, 200, 250.4, 300, 600])
+    codes, labels = pm25_to_aqi_category(values)
+
+    for value, code, label in zip(values, codes, labels):
+        assert pm25_to_aqi_category(float(value)) == (code, label)
+
+    assert pm25_to_aqi_category(45) == (3, "Unhealthy for Sensitive Groups")
+    assert pm25_to_aqi_category(250) == (5, "Very Unhealthy")
+
+
+def test_pm25_to_aqi_values():
+    assert pm25_to_aqi(12.0) == 50
+    assert pm25_to_aqi(35.4) == 100
+    assert pm25_to_aqi(55.5) == 151
+    assert pm25_to_aqi([np.nan, -3, np.inf]).tolist() == [0, 0, 0]
+    assert pm25_to_aqi(10_000) == 500
+
+
+def test_overall_aqi_is_max_sub_index():
+    # CO in µg/m³: 20000 µg/m³ ~ 17.5 ppm -> Very Unhealthy
+    result = compute_aqi({"pm2_5": [10.0, 80.0], "co": [300.0, 20000.0], "no2": [np.nan, 10.0]})
+
+    assert result["dominant_pollutant"].tolist() == ["pm2_5", "co"]
+    np.testing.assert_allclose(result["aqi"], np.fmax(result["pm2_5_aqi"], result["co_aqi"]))
+    assert result["aqi_label"].tolist() == ["Good", "Very Unhealthy"]
+
+
+def test_epa_units_passthrough():
+    index, codes, _ = sub_index("so2", [35, 75], units="epa")
+    np.testing.assert_allclose(index, [50, 100])
+    assert codes.tolist() == [1, 2]
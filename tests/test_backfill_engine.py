@@ -0,0 +1,129 @@
+import sys
+import json
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from src.ingestion.backfill_engine import BackfillEngine
+
+START = datetime(2026, 1, 1)
+
+
+class FakeOpenWeather(BaseHTTPRequestHandler):
+    """Serves hourly AQI history and weather; can fail requests on demand"""
+
+    calls = []
+    flaky = set()      # paths failing once with 503
+    broken = set()     # AQI chunk starts that always fail with 500
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: int(v[0]) if k in ("start", "end", "dt") else v[0] for k, v in parse_qs(url.query).items()}
+
+        with self.lock:
+            self.calls.append((url.path, params))
+            if url.path in self.flaky:
+                self.flaky.discard(url.path)
+                return self._send(503, {})
+
+        if url.path == "/history":
+            if params["start"] in self.broken:
+                return self._send(500, {})
+            hours = range(params["start"], params["end"], 3600)
+            body = {"list": [
+                {"dt": dt, "main": {"aqi": 3}, "components": {"pm2_5": 40.0, "pm10": 80.0}}
+                for dt in hours
+            ]}
+            return self._send(200, body)
+
+        return self._send(200, {"current": {"temp": 300.15, "humidity": 50, "weather": [{"main": "Haze"}]}})
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeOpenWeather.calls = []
+    FakeOpenWeather.flaky = set()
+    FakeOpenWeather.broken = set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenWeather)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def make_engine(base_url, checkpoint_dir):
+    return BackfillEngine(
+        "key", 24.86, 67.00, "Karachi", checkpoint_dir=str(checkpoint_dir),
+        chunk_hours=48, max_workers=4, rate_per_sec=200, backoff=0.01,
+        aqi_url=f"{base_url}/history", weather_url=f"{base_url}/weather",
+    )
+
+
+def test_backfill_retries_and_merges(server, tmp_path):
+    FakeOpenWeather.flaky = {"/history", "/weather"}
+
+    records, failed = make_engine(server, tmp_path).run(START, START + timedelta(days=6))
+
+    assert failed == []
+    assert len(records) == 6 * 24
+    assert [r["timestamp"] for r in records] == sorted(r["timestamp"] for r in records)
+    assert records[0]["temp"] == pytest.approx(27.0)
+    assert records[0]["weather_main"] == "Haze"
+
+
+def test_backfill_resumes_from_checkpoints(server, tmp_path):
+    broken_chunk = START + timedelta(hours=48)
+    FakeOpenWeather.broken = {int(broken_chunk.timestamp())}
+
+    engine = make_engine(server, tmp_path)
+    engine.max_retries = 1
+    records, failed = engine.run(START, START + timedelta(days=6))
+    assert failed == [(broken_chunk, broken_chunk + timedelta(hours=48))]
+    assert len(records) == 4 * 24
+
+    # Second run only refetches the failed chunk
+    FakeOpenWeather.broken = set()
+    FakeOpenWeather.calls = []
+    records, failed = make_engine(server, tmp_path).run(START, START + timedelta(days=6))
+
+    aqi_calls = [p for path, p in FakeOpenWeather.calls if path == "/history"]
+    assert failed == []
+    assert len(records) == 6 * 24
+    assert [p["start"] for p in aqi_calls] == [int(broken_chunk.timestamp())]
+
+
+def test_rerun_at_a_later_hour_reuses_checkpoints(server, tmp_path):
+    # Runs go back a fixed number of days from "now"; the second one starts 5 hours later
+    now = START + timedelta(days=6, hours=7)
+    make_engine(server, tmp_path).run(now - timedelta(days=6), now)
+
+    FakeOpenWeather.calls = []
+    later = now + timedelta(hours=5)
+    records, failed = make_engine(server, tmp_path).run(later - timedelta(days=6), later)
+
+    aqi_calls = [p for path, p in FakeOpenWeather.calls if path == "/history"]
+    assert failed == []
+    assert len(records) == 6 * 24
+    # Interior grid chunks come from the checkpoints; only the partial edges are refetched
+    assert [datetime.utcfromtimestamp(p["start"]) for p in sorted(aqi_calls, key=lambda p: p["start"])] == [
+        later - timedelta(days=6), START + timedelta(days=6)]
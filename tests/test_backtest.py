@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.dummy import DummyRegressor
+
+from src.training.backtest import walk_forward_folds, run_backtest, summarize
+
+
+def test_folds_are_ordered_and_purged():
+    folds = walk_forward_folds(1000, n_folds=4, gap=72)
+    assert len(folds) == 4
+    for train, test in folds:
+        assert train.start == 0
+        assert test.start - train.stop == 72
+    assert [test.start for _, test in folds] == sorted(test.start for _, test in folds)
+    assert folds[-1][1].stop == 1000
+
+    sliding = walk_forward_folds(1000, n_folds=2, min_train=300, gap=24, expanding=False)
+    assert all(train.stop - train.start == 300 for train, _ in sliding)
+
+
+def test_too_little_data():
+    with pytest.raises(ValueError):
+        walk_forward_folds(100, n_folds=10, gap=72)
+
+
+def test_backtest_ranks_models():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = X @ np.array([3.0, -2.0, 0.5, 0.0, 1.0]) + rng.normal(0, 0.1, 600)
+
+    folds = walk_forward_folds(len(X), n_folds=5, gap=10)
+    results = run_backtest(X, y, {"Ridge": Ridge(), "Mean": DummyRegressor()}, folds, n_jobs=2)
+
+    assert len(results) == 10
+    assert set(results["fold"]) == set(range(5))
+
+    summary = summarize(results)
+    assert summary.index[0] == "Ridge"
+    assert summary.loc["Ridge", "mean_rmse"] < summary.loc["Mean", "mean_rmse"]
+
+
+def test_multi_city_folds_purge_by_time():
+    # 4 cities per hour: a 72-row gap would only purge 18 hours
+    hours = np.repeat(np.arange(500), 4)
+    timestamps = np.datetime64("2026-01-01T00") + hours.astype("timedelta64[h]")
+
+    folds = walk_forward_folds(len(timestamps), n_folds=3, min_train=100, gap=72, timestamps=timestamps)
+
+    for train, test in folds:
+        first_test = timestamps[test.start]
+        assert timestamps[train.stop - 1] <= first_test - np.timedelta64(72, "h")
+        # Nothing later than the cutoff is purged
+        assert timestamps[train.stop] > first_test - np.timedelta64(72, "h")
@@ -0,0 +1,64 @@
+import sys
+import json
+import inspect
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_raw_data
+from benchmarks.suite import BASELINE_PATH, build_cases, run_suite, compare
+
+
+def test_generator_is_deterministic_with_gaps():
+    a = generate_raw_data(n_cities=2, years=0.1, gap_rate=0.05)
+    b = generate_raw_data(n_cities=2, years=0.1, gap_rate=0.05)
+    full = generate_raw_data(n_cities=2, years=0.1)
+
+    pd.testing.assert_frame_equal(a, b)
+    assert 0.02 < 1 - len(a) / len(full) < 0.10
+    # Gaps only remove rows; the kept rows are unchanged
+    kept = full.merge(a[["city", "timestamp"]], on=["city", "timestamp"])
+    pd.testing.assert_frame_equal(kept, a)
+
+
+def test_suite_reports_every_stage_offline():
+    report = run_suite(cities=1, years=0.05, repeats=1, only=["clean_data", "add_lag_features", "pm25_to_aqi"])
+
+    assert set(report["results"]) == {"clean_data", "add_lag_features", "pm25_to_aqi"}
+    for result in report["results"].values():
+        assert result["min_s"] > 0 and result["peak_mb"] >= 0
+    assert report["config"]["rows"] > 0
+
+
+def test_compare_flags_time_and_memory_regressions():
+    baseline = {"results": {
+        "a": {"min_s": 1.0, "peak_mb": 100.0},
+        "b": {"min_s": 1.0, "peak_mb": 100.0},
+        "tiny": {"min_s": 0.0001, "peak_mb": 0.1},
+    }}
+    report = {"results": {
+        "a": {"min_s": 1.5, "peak_mb": 100.0},
+        "b": {"min_s": 1.1, "peak_mb": 150.0},
+        "tiny": {"min_s": 0.001, "peak_mb": 0.2},
+        "new": {"min_s": 9.0, "peak_mb": 9.0},
+    }}
+
+    flagged = {(r["case"], r["metric"]) for r in compare(report, baseline)}
+    assert flagged == {("a", "min_s"), ("b", "peak_mb")}
+
+
+def test_committed_baseline_matches_the_default_config():
+    with open(PROJECT_ROOT / BASELINE_PATH) as f:
+        baseline = json.load(f)
+
+    defaults = {k: p.default for k, p in inspect.signature(run_suite).parameters.items() if k != "only"}
+    raw = generate_raw_data(n_cities=defaults["cities"], years=defaults["years"],
+                            gap_rate=defaults["gap_rate"], seed=defaults["seed"])
+
+    assert baseline["config"] == {**defaults, "rows": len(raw)}
+    assert set(baseline["results"]) == set(build_cases(raw.head(1000), defaults["train_rows"]))
+
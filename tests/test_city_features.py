@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import (
+    add_time_features,
+    add_lag_features,
+    add_rolling_features,
+    add_derived_features,
+    create_targets,
+)
+
+
+def engineer(df):
+    df = add_time_features(df)
+    df = add_lag_features(df, target="pm2_5", lags=[24, 48, 72])
+    df = add_rolling_features(df)
+    df = add_derived_features(df)
+    return create_targets(df)
+
+
+def test_windows_do_not_cross_cities():
+    raw = generate_raw_data(n_cities=3, days=10, seed=7)
+    multi = engineer(clean_data(raw))
+
+    for city, group in raw.groupby("city"):
+        single = engineer(clean_data(group)).set_index("timestamp")
+        combined = multi[multi["city"] == city].set_index("timestamp")
+        pd.testing.assert_frame_equal(combined[single.columns], single, check_dtype=False)
+
+
+def test_first_rows_of_each_city_have_no_history():
+    multi = engineer(clean_data(generate_raw_data(n_cities=2, days=5)))
+    first = multi.sort_values("timestamp").groupby("city").head(1)
+    assert first["pm2_5_lag24"].isna().all()
+    assert first["aqi_roll24"].isna().all()
@@ -0,0 +1,84 @@
+import sys
+import importlib
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import bson
+import numpy as np
+import pytest
+
+from src.utils.data_loader import load_data_columnar
+
+
+class RawBatchCollection:
+    """Minimal stand-in for a pymongo collection serving raw BSON batches"""
+
+    def __init__(self, docs, undercount=0):
+        self.docs = docs
+        self.undercount = undercount
+
+    def count_documents(self, query):
+        return len(self.docs) - self.undercount
+
+    def find_raw_batches(self, query, projection, batch_size):
+        for start in range(0, len(self.docs), batch_size):
+            chunk = self.docs[start:start + batch_size]
+            yield b"".join(bson.encode(d) for d in chunk)
+
+
+@pytest.fixture
+def streaming_decoder(monkeypatch):
+    """Force the NumPy decoder even where pymongoarrow is installed"""
+    monkeypatch.setitem(sys.modules, "pymongoarrow.api", None)
+
+
+def make_docs(n):
+    start = datetime(2026, 1, 1)
+    return [
+        {"timestamp": start + timedelta(hours=i), "pm2_5": float(i), "city": "Karachi",
+         **({"temp": 20.0} if i % 2 else {})}
+        for i in range(n)
+    ]
+
+
+def test_columnar_decode(streaming_decoder):
+    df = load_data_columnar(RawBatchCollection(make_docs(25)), fields=["timestamp", "pm2_5", "temp", "city"], batch_size=7)
+
+    assert len(df) == 25
+    assert df["pm2_5"].dtype == np.float64
+    assert str(df["timestamp"].dtype).startswith("datetime64")
+    assert df["temp"].isna().sum() == 13
+    assert (df["city"] == "Karachi").all()
+
+
+def test_columnar_grows_when_count_is_stale(streaming_decoder):
+    df = load_data_columnar(RawBatchCollection(make_docs(30), undercount=10), fields=["timestamp", "pm2_5"], batch_size=8)
+    assert len(df) == 30
+    assert df["pm2_5"].tolist() == [float(i) for i in range(30)]
+
+
+class ArrowCollection(RawBatchCollection):
+    """Adds what pymongoarrow's find_pandas_all needs besides raw batches"""
+
+    codec_options = bson.DEFAULT_CODEC_OPTIONS
+    database = SimpleNamespace(client=SimpleNamespace(append_metadata=None))
+
+    def find_raw_batches(self, query, projection=None, batch_size=None, **kwargs):
+        yield from super().find_raw_batches(query, projection, batch_size or 101)
+
+
+def test_pymongoarrow_decode_keeps_distinct_ids():
+    pytest.importorskip("pymongoarrow.api")
+    if importlib.import_module("pymongoarrow").libbson_version is None:
+        pytest.skip("pymongoarrow compiled extension unavailable")
+
+    docs = [{"_id": bson.ObjectId(), **d} for d in make_docs(5)]
+    df = load_data_columnar(ArrowCollection(docs), fields=["_id", "timestamp", "pm2_5"])
+
+    assert df["_id"].astype(str).tolist() == [str(d["_id"]) for d in docs]
+    assert df["pm2_5"].tolist() == [float(i) for i in range(5)]
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features, FEATURE_COLUMNS
+from src.utils.schema import INT8_COLUMNS, memory_mb
+
+
+def test_compact_features_match_default():
+    raw = generate_raw_data(n_cities=3, days=15)
+    # Drop a few hours so the grid path creates filler rows
+    raw = raw.drop(raw.index[[30, 31, 200]]).reset_index(drop=True)
+
+    wide = build_features(clean_data(raw))
+    compact = build_features(clean_data(raw, compact=True), compact=True)
+
+    assert list(wide.columns) == list(compact.columns)
+    assert memory_mb(compact) < 0.6 * memory_mb(wide)
+
+    for col in FEATURE_COLUMNS:
+        if col in INT8_COLUMNS:
+            assert compact[col].dtype == np.int8, col
+        else:
+            assert compact[col].dtype == np.float32, col
+    assert isinstance(compact["city"].dtype, pd.CategoricalDtype)
+    assert isinstance(compact["weather_main"].dtype, pd.CategoricalDtype)
+
+    np.testing.assert_allclose(
+        compact[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+        wide[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+        rtol=1e-5, atol=1e-4, equal_nan=True,
+    )
+    assert (compact["city"].astype(str).to_numpy() == wide["city"].astype(str).to_numpy()).all()
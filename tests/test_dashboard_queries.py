@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from app.queries import cache_window, fetch_current, fetch_forecast_series
+
+
+def test_empty_collections():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    assert fetch_forecast_series(db.forecasts_ts, "Karachi").empty
+    assert fetch_current(db.features) is None
+
+
+def test_current_is_latest_projected_row():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.features
+    coll.insert_many([{"timestamp": datetime(2026, 1, 1, h), "aqi": h, "pm2_5": 1.0, "temp": 30} for h in range(5)])
+    assert fetch_current(coll) == {"timestamp": datetime(2026, 1, 1, 4), "aqi": 4, "pm2_5": 1.0}
+
+
+def test_cache_window_turns_over_after_the_hourly_job():
+    assert cache_window(datetime(2026, 1, 1, 10, 14), 15) == datetime(2026, 1, 1, 9, 15)
+    assert cache_window(datetime(2026, 1, 1, 10, 15), 15) == datetime(2026, 1, 1, 10, 15)
+    assert cache_window(datetime(2026, 1, 1, 10, 59), 15) == datetime(2026, 1, 1, 10, 15)
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pytest
+
+from src.utils.downsample import lttb
+from app.queries import fetch_history
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_000)
+    y = np.sin(x / 500) + rng.normal(0, 0.05, len(x))
+    y[43_210] = 25.0
+
+    idx = lttb(x, y, 1000)
+
+    assert len(idx) == 1000
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert (np.diff(idx) > 0).all()
+    assert 43_210 in idx
+
+
+def test_lttb_short_inputs_and_nans():
+    y = np.array([1.0, np.nan, 3.0, 4.0])
+    assert lttb(np.arange(4), y, 10).tolist() == [0, 2, 3]
+    assert lttb(np.arange(4), y, 2).tolist() == [0, 3]
+
+    ts = np.arange("2026-01-01", "2026-02-01", dtype="datetime64[h]")
+    assert len(lttb(ts, np.arange(len(ts)), 50)) == 50
+
+
+def seed(coll, days):
+    start = datetime(2024, 1, 1)
+    coll.insert_many([
+        {"timestamp": start + timedelta(hours=h), "pm2_5": float(h % 24), "city": "Karachi"}
+        for h in range(days * 24)
+    ])
+    return start
+
+
+def test_history_uses_hourly_buckets_for_short_ranges():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.features
+    start = seed(coll, 3)
+
+    df, unit = fetch_history(coll, "pm2_5", start, start + timedelta(days=2), max_points=100)
+
+    assert unit == "hour"
+    assert len(df) == 48
+    assert (df["count"] == 1).all()
+
+
+def test_history_aggregates_daily_and_caps_points():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.features
+    start = seed(coll, 40)
+
+    df, unit = fetch_history(coll, "pm2_5", start, start + timedelta(days=40), max_points=500)
+    assert unit == "day" and len(df) == 40
+    assert df.iloc[0][["min", "mean", "max", "count"]].tolist() == [0.0, 11.5, 23.0, 24]
+
+    capped, _ = fetch_history(coll, "pm2_5", start, start + timedelta(days=40), max_points=10)
+    assert len(capped) == 10
+    assert capped["timestamp"].iloc[0] == df["timestamp"].iloc[0]
+    assert capped["timestamp"].iloc[-1] == df["timestamp"].iloc[-1]
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features
+from src.features import feature_cache
+from src.features.feature_cache import FeatureCache, cached_features
+from src.utils import schema
+
+
+def test_hit_returns_identical_memmapped_frame(tmp_path):
+    raw = generate_raw_data(n_cities=2, days=10)
+    cache = FeatureCache(cache_dir=str(tmp_path))
+    calls = []
+
+    def build(df):
+        calls.append(1)
+        return build_features(clean_data(df))
+
+    first = cached_features(raw, build=build, cache=cache)
+    second = cached_features(raw, build=build, cache=cache)
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(second, build_features(clean_data(raw)).reset_index(drop=True))
+    assert not second["pm2_5_lag24"].to_numpy().flags.writeable  # read-only file mapping
+
+
+def test_key_changes_with_data_and_spec(tmp_path):
+    raw = generate_raw_data(days=5)
+    cache = FeatureCache(cache_dir=str(tmp_path))
+
+    changed = raw.copy()
+    changed.loc[3, "pm2_5"] += 1
+
+    assert cache.key(raw) == cache.key(raw.copy())
+    assert cache.key(raw) != cache.key(changed)
+    assert cache.key(raw, {"targets": True}) != cache.key(raw, {"targets": False})
+
+
+
+def test_key_changes_with_schema_source(tmp_path, monkeypatch):
+    raw = generate_raw_data(days=5)
+    cache = FeatureCache(cache_dir=str(tmp_path))
+    before = cache.key(raw, {"compact": True})
+
+    getsource = feature_cache.inspect.getsource
+    monkeypatch.setattr(feature_cache.inspect, "getsource",
+                        lambda obj: getsource(obj) + ("\n# edited" if obj is schema else ""))
+
+    assert cache.key(raw, {"compact": True}) != before
+
+def test_lru_eviction_by_entries_and_size(tmp_path):
+    cache = FeatureCache(cache_dir=str(tmp_path), max_entries=2)
+    frame = pd.DataFrame({"x": np.arange(1000, dtype=np.float64)})
+
+    for key in ["a", "b", "c"]:
+        cache.put(key, frame)
+    assert [k for k, _ in cache.entries()] == ["b", "c"]
+
+    # A hit refreshes recency, so "c" is evicted next
+    cache.get("b")
+    cache.put("d", frame)
+    assert sorted(k for k, _ in cache.entries()) == ["b", "d"]
+
+    cache.max_bytes = frame["x"].nbytes
+    assert cache.evict(keep="d") == ["b"]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = FeatureCache(cache_dir=str(tmp_path))
+    cache.put("k", pd.DataFrame({"x": [1.0, 2.0]}))
+    (tmp_path / "k" / "0.npy").write_bytes(b"garbage")
+
+    assert cache.get("k") is None
+    assert cache.entries() == []
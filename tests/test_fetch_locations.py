@@ -0,0 +1,100 @@
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from src.ingestion import fetch_data
+from src.ingestion.locations import load_locations
+
+
+WEATHER = {"main": {"temp": 298.15, "humidity": 60, "pressure": 1008}, "wind": {"speed": 3.5, "deg": 200},
+           "clouds": {"all": 40}, "weather": [{"main": "Haze"}]}
+
+
+class SlowAirPollution(BaseHTTPRequestHandler):
+    """Answers after a fixed delay; latitude 0 always fails, latitude 1 has no weather"""
+
+    delay = 0.1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        lat = float(parse_qs(url.query)["lat"][0])
+        time.sleep(self.delay)
+        if lat == 0 or (lat == 1 and url.path == "/weather"):
+            self.send_response(500)
+            self.end_headers()
+            return
+        if url.path == "/weather":
+            body = json.dumps(WEATHER).encode()
+        else:
+            body = json.dumps({"list": [{"dt": 1767225600, "main": {"aqi": 2}, "components": {"pm2_5": 20.0}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(fetch_data, "OPENWEATHER_API_KEY", "key")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlowAirPollution)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_parallel_sweep_isolates_errors(server):
+    locations = [{"city": f"grid_{i:03d}", "lat": 10 + i / 10, "lon": 60.0} for i in range(100)]
+    locations.append({"city": "broken", "lat": 0.0, "lon": 0.0})
+
+    start = time.perf_counter()
+    records, errors = fetch_data.fetch_all_locations(locations, max_workers=50, base_url=f"{server}/air_pollution",
+                                                     weather_url=f"{server}/weather")
+    elapsed = time.perf_counter() - start
+
+    assert len(records) == 100
+    assert list(errors) == ["broken"]
+    assert {r["city"] for r in records} == {loc["city"] for loc in locations[:100]}
+    # 202 requests x 0.1s sequentially would take 20s
+    assert elapsed < 5
+
+
+def test_record_carries_current_weather(server):
+    record = fetch_data.fetch_aqi_data({"city": "A", "lat": 10.0, "lon": 60.0},
+                                       base_url=f"{server}/air_pollution", weather_url=f"{server}/weather")
+
+    assert record["pm2_5"] == 20.0
+    assert abs(record["temp"] - 25.0) < 1e-9
+    assert (record["humidity"], record["pressure"], record["wind_speed"], record["wind_deg"], record["clouds"]) == (60, 1008, 3.5, 200, 40)
+    assert record["weather_main"] == "Haze"
+
+
+def test_weather_failure_keeps_the_aqi_record(server):
+    record = fetch_data.fetch_aqi_data({"city": "B", "lat": 1.0, "lon": 60.0},
+                                       base_url=f"{server}/air_pollution", weather_url=f"{server}/weather")
+
+    assert record["pm2_5"] == 20.0
+    assert "temp" not in record
+
+
+def test_registry_rejects_duplicates(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("locations:\n  - {city: A, lat: 1, lon: 2}\n  - {city: A, lat: 3, lon: 4}\n")
+    with pytest.raises(ValueError):
+        load_locations(str(path))
+
+
+def test_default_registry():
+    assert load_locations()[0]["city"] == "Karachi"
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import bson
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from src.utils.data_loader import load_data_incremental
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def raw_batches(monkeypatch):
+    """mongomock has no find_raw_batches; serve BSON built from find()"""
+    def find_raw_batches(self, query, projection, batch_size):
+        docs = list(self.find(query, projection))
+        for start in range(0, len(docs), batch_size):
+            yield b"".join(bson.encode(d) for d in docs[start:start + batch_size])
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find_raw_batches", find_raw_batches, raising=False)
+    # pymongoarrow needs a real client; the cache logic is what is under test here
+    monkeypatch.setitem(sys.modules, "pymongoarrow.api", None)
+
+
+def make_docs(hours, offset=0, source="live"):
+    now = datetime(2026, 2, 1)
+    return [
+        {
+            "city": "Karachi",
+            "timestamp": START + timedelta(hours=offset + h),
+            "aqi": 3, "pm2_5": 40.0 + h,
+            "source": source, "ingestion_time": now,
+            "unused_blob": "x" * 100,
+        }
+        for h in range(hours)
+    ]
+
+
+def test_incremental_fetch_and_projection(tmp_path):
+    coll = mongomock.MongoClient().aqi_db.aqi_features
+    coll.insert_many(make_docs(48))
+
+    first = load_data_incremental(coll, fields=["timestamp", "pm2_5", "ingestion_time"], cache_dir=tmp_path)
+    assert len(first) == 48
+    assert "unused_blob" not in first.columns
+
+    coll.insert_many(make_docs(2, offset=48))
+    second = load_data_incremental(coll, fields=["timestamp", "pm2_5", "ingestion_time"], cache_dir=tmp_path)
+    assert len(second) == 50
+    assert second["timestamp"].max() == START + timedelta(hours=49)
+
+
+def test_backfill_rewrite_invalidates(tmp_path):
+    coll = mongomock.MongoClient().aqi_db.aqi_features
+    coll.insert_many(make_docs(24, source="backfill_with_weather"))
+    load_data_incremental(coll, fields=["timestamp", "pm2_5", "source"], cache_dir=tmp_path)
+
+    # Same delete_many/insert_many pattern as backfill_with_weather, fewer rows
+    coll.delete_many({"source": "backfill_with_weather"})
+    coll.insert_many(make_docs(12, source="backfill_with_weather"))
+
+    df = load_data_incremental(coll, fields=["timestamp", "pm2_5", "source"], cache_dir=tmp_path)
+    assert len(df) == 12
@@ -0,0 +1,103 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+from datetime import datetime
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from src.storage.indexes import (
+    REQUIRED_INDEXES,
+    check_query_plans,
+    ensure_indexes,
+    hot_queries,
+    plan_stages,
+)
+
+# Set to a disposable mongod (e.g. mongodb://localhost:27017) to assert real query plans
+TEST_URI = os.getenv("AQI_TEST_MONGODB_URI")
+
+
+def storage_collections(db):
+    return {
+        "features": db.aqi_features, "quarantine": db.aqi_quarantine,
+        "forecasts_ts": db.forecasts_ts, "observations_ts": db.observations_ts,
+        "forecasts_daily": db.forecasts_daily, "observations_daily": db.observations_daily,
+    }
+
+
+def mock_collections():
+    mongomock = pytest.importorskip("mongomock")
+    return storage_collections(mongomock.MongoClient().db)
+
+
+def test_ensure_indexes_is_idempotent():
+    collections = mock_collections()
+    # An equivalent index under another name is not recreated
+    collections["features"].create_index([("timestamp", -1)], name="legacy_ts")
+
+    created = ensure_indexes(collections=collections)
+    assert created == {
+        "features": ["city_timestamp_unique", "ingestion_time"],
+        "quarantine": ["source_id"],
+        "forecasts_ts": ["city_timestamp"],
+        "observations_ts": ["city_timestamp"],
+        "forecasts_daily": ["city_horizon_day"],
+        "observations_daily": ["city_horizon_day"],
+    }
+    assert ensure_indexes(collections=collections) == {}
+    assert collections["features"].index_information()["city_timestamp_unique"]["unique"]
+
+
+def test_plan_stages_reads_find_and_aggregate_plans():
+    find = {"queryPlanner": {"winningPlan": {
+        "stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}]}}
+    sbe = {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}}}
+    aggregate = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}},
+                            {"$group": {}}]}
+
+    assert plan_stages(find) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert plan_stages(sbe) == ["OR", "IXSCAN", "COLLSCAN"]
+    assert plan_stages(aggregate) == ["COLLSCAN"]
+
+
+def test_check_query_plans_reports_collscans():
+    queries = {
+        "indexed": lambda: {"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}},
+        "scan": lambda: {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}},
+    }
+    assert check_query_plans({}, queries) == {"scan": ["COLLSCAN"]}
+
+
+@pytest.mark.skipif(not TEST_URI, reason="AQI_TEST_MONGODB_URI not set")
+def test_hot_queries_use_indexes_on_mongod():
+    from pymongo import MongoClient
+
+    client = MongoClient(TEST_URI, serverSelectionTimeoutMS=5000)
+    db_name = f"aqi_index_test_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    try:
+        collections = storage_collections(db)
+        now = datetime(2026, 1, 1)
+        collections["features"].insert_one({"city": "Karachi", "timestamp": now, "ingestion_time": now, "pm2_5": 1.0})
+        collections["quarantine"].insert_one({"source_id": "x"})
+        for name in ("forecasts_ts", "observations_ts"):
+            collections[name].insert_one({"meta": {"city": "Karachi"}, "timestamp": now, "pm2_5": 1.0})
+        for name in ("forecasts_daily", "observations_daily"):
+            collections[name].insert_one({"city": "Karachi", "horizon": None, "day": now})
+
+        # Without the declared indexes the checker must catch the scans
+        assert check_query_plans(collections, hot_queries(collections, now))
+
+        ensure_indexes(collections=collections)
+        assert set(REQUIRED_INDEXES) == set(collections)
+        assert check_query_plans(collections, hot_queries(collections, now)) == {}
+    finally:
+        client.drop_database(db_name)
+        client.close()
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from src.ingestion.writer import upsert_records, ensure_unique_key
+
+START = datetime(2026, 1, 1)
+
+
+def make_records(hours, offset=0, pm2_5=40.0, city="Karachi"):
+    return [
+        {"city": city, "timestamp": START + timedelta(hours=offset + h), "pm2_5": pm2_5}
+        for h in range(hours)
+    ]
+
+
+def test_overlapping_windows_do_not_duplicate():
+    coll = mongomock.MongoClient().aqi_db.aqi_features
+
+    stats = upsert_records(coll, make_records(48), batch_size=10)
+    assert stats["upserted"] == 48
+
+    # Re-ingest an overlapping window with revised values
+    stats = upsert_records(coll, make_records(48, offset=24, pm2_5=55.0), batch_size=10)
+    assert stats["upserted"] == 24
+    assert stats["matched"] == 24
+
+    assert coll.count_documents({}) == 72
+    assert coll.find_one({"timestamp": START + timedelta(hours=30)})["pm2_5"] == 55.0
+    assert coll.find_one({"timestamp": START})["pm2_5"] == 40.0
+
+
+def test_cities_are_keyed_separately():
+    coll = mongomock.MongoClient().aqi_db.aqi_features
+    upsert_records(coll, make_records(5) + make_records(5, city="Lahore"))
+    assert coll.count_documents({}) == 10
+
+
+def test_existing_duplicates_are_collapsed():
+    coll = mongomock.MongoClient().aqi_db.aqi_features
+    coll.insert_many(make_records(3) + make_records(3, pm2_5=60.0))
+
+    ensure_unique_key(coll)
+
+    assert coll.count_documents({}) == 3
+    assert {d["pm2_5"] for d in coll.find()} == {60.0}
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_raw_data
+from src.features.feature_engineering import FEATURE_COLUMNS, build_features
+from src.inference.predict_multi_day import latest_features, load_online_state, save_online_state, update_latest
+from app.queries import fetch_latest, flatten_forecast
+
+
+def forecast(city, observed, pm25):
+    return {
+        "city": city,
+        "timestamp": observed + timedelta(minutes=5),
+        "observation_time": observed,
+        "current": {"pm2_5": pm25, "aqi": 3},
+        "forecasts": {
+            h: {"pm25_prediction": pm25 + i, "aqi_category_label": "Moderate", "aqi": 80}
+            for i, h in enumerate(["t_plus_1", "t_plus_2", "t_plus_3"])
+        },
+        "model_versions": {"t_plus_1": "7"},
+    }
+
+
+def test_one_document_per_city_replaced_each_run():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.latest_forecast
+    t0 = datetime(2026, 1, 1, 10)
+
+    update_latest(coll, [forecast("Karachi", t0, 40.0), forecast("Lahore", t0, 90.0)])
+    update_latest(coll, [forecast("Karachi", t0 + timedelta(hours=1), 42.0)])
+
+    assert coll.count_documents({}) == 2
+    karachi = fetch_latest(coll, "Karachi")
+    assert karachi["observation_time"] == t0 + timedelta(hours=1)
+    assert flatten_forecast(karachi)["t1_pm25"] == 42.0
+    assert fetch_latest(coll, "Lahore")["current"]["pm2_5"] == 90.0
+    assert fetch_latest(coll, "Quetta") is None
+
+
+def test_stale_run_does_not_overwrite_newer_forecast():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.latest_forecast
+    t0 = datetime(2026, 1, 1, 10)
+
+    update_latest(coll, [forecast("Karachi", t0 + timedelta(hours=2), 50.0)])
+    update_latest(coll, [forecast("Karachi", t0, 10.0), forecast("Lahore", t0, 90.0)])
+
+    assert fetch_latest(coll, "Karachi")["current"]["pm2_5"] == 50.0
+    assert fetch_latest(coll, "Lahore") is not None
+
+
+def test_inserted_prediction_ids_are_not_reused():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.latest_forecast
+    doc = forecast("Karachi", datetime(2026, 1, 1), 40.0)
+    doc["_id"] = "some-object-id"
+
+    update_latest(coll, [doc])
+    assert coll.find_one()["_id"] == "Karachi"
+
+
+def test_newest_row_without_weather_falls_back_to_last_complete_row():
+    df = generate_raw_data(n_cities=2, days=5)
+    newest = df["timestamp"].max()
+    # The live fetcher's row for the newest hour of city_000 came without weather
+    live = df.index[(df["city"] == "city_000") & (df["timestamp"] == newest)]
+    df.loc[live, ["temp", "humidity", "pressure", "wind_speed", "wind_deg", "clouds"]] = np.nan
+
+    latest = latest_features(df).set_index("city")
+
+    assert sorted(latest.index) == ["city_000", "city_001"]
+    assert latest.loc["city_000", "timestamp"] == newest - pd.Timedelta(hours=1)
+    assert latest.loc["city_001", "timestamp"] == newest
+
+
+def test_hourly_runs_resume_from_checkpoint_and_match_batch_features(tmp_path):
+    df = generate_raw_data(n_cities=3, days=8, gap_rate=0.05)
+    newest = df["timestamp"].max()
+    earlier = df[df["timestamp"] <= newest - pd.Timedelta(hours=3)]
+
+    engine, previous = load_online_state(str(tmp_path))
+    save_online_state(engine, latest_features(earlier, engine, previous), str(tmp_path))
+
+    engine, previous = load_online_state(str(tmp_path))
+    fed = engine.n_updates
+    latest = latest_features(df, engine, previous).set_index("city").sort_index()
+
+    # Only the newest checkpointed hour and the three new ones per city
+    assert engine.n_updates - fed <= 3 * 4
+
+    batch = build_features(df.copy(), time_aware=True, targets=False)
+    batch = batch[batch[FEATURE_COLUMNS].notna().all(axis=1)]  # rows in or after a gap lack some lags
+    expected = batch.sort_values("timestamp").groupby("city").tail(1).set_index("city").sort_index()
+    assert (latest["timestamp"] == expected["timestamp"]).all()
+    np.testing.assert_allclose(latest[FEATURE_COLUMNS].astype(float), expected[FEATURE_COLUMNS].astype(float),
+                               rtol=1e-9, atol=1e-9)
+
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+from sklearn.linear_model import Ridge
+
+from src.registry.model_cache import ModelCache, ModelUnavailableError
+
+
+class FakeVersion:
+    def __init__(self, version):
+        self.version = version
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.aliases = {"aqi_t_plus_1": 1}
+        self.online = True
+        self.downloads = []
+
+    def get_model_version_by_alias(self, name, alias):
+        if not self.online:
+            raise ConnectionError("registry down")
+        return FakeVersion(self.aliases[name])
+
+    def loader(self, name, version):
+        self.downloads.append((name, version))
+        return Ridge(alpha=float(version))
+
+
+def make_cache(tmp_path, registry):
+    return ModelCache(cache_dir=str(tmp_path), client=registry, loader=registry.loader)
+
+
+def test_hit_skips_download(tmp_path):
+    registry = FakeRegistry()
+
+    model, version, source = make_cache(tmp_path, registry).load("aqi_t_plus_1")
+    assert (version, source) == ("1", "registry")
+
+    # A new process (new cache object) only resolves the alias
+    model, version, source = make_cache(tmp_path, registry).load("aqi_t_plus_1")
+    assert (version, source) == ("1", "cache")
+    assert model.alpha == 1.0
+    assert registry.downloads == [("aqi_t_plus_1", "1")]
+
+
+def test_new_version_is_downloaded(tmp_path):
+    registry = FakeRegistry()
+    make_cache(tmp_path, registry).load("aqi_t_plus_1")
+
+    registry.aliases["aqi_t_plus_1"] = 2
+    model, version, source = make_cache(tmp_path, registry).load("aqi_t_plus_1")
+    assert (version, source, model.alpha) == ("2", "registry", 2.0)
+
+
+def test_fallback_when_registry_unreachable(tmp_path):
+    registry = FakeRegistry()
+    make_cache(tmp_path, registry).load("aqi_t_plus_1")
+
+    registry.online = False
+    model, version, source = make_cache(tmp_path, registry).load("aqi_t_plus_1")
+    assert (version, source) == ("1", "fallback")
+
+    with pytest.raises(ModelUnavailableError):
+        make_cache(tmp_path / "empty", registry).load("aqi_t_plus_1")
+
+
+def test_corrupt_blob_is_redownloaded(tmp_path):
+    registry = FakeRegistry()
+    make_cache(tmp_path, registry).load("aqi_t_plus_1")
+
+    for blob in (tmp_path / "blobs").glob("*.pkl"):
+        blob.write_bytes(b"garbage")
+
+    _, _, source = make_cache(tmp_path, registry).load("aqi_t_plus_1")
+    assert source == "registry"
@@ -0,0 +1,93 @@
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from src.storage import connection
+from src.storage.connection import PoolMetrics
+
+
+class FakeClient:
+    """Records its options; ping fails with `error` unless tlsInsecure is set"""
+    instances = []
+    error = None
+
+    def __init__(self, uri, **options):
+        self.options = options
+        self.closed = False
+        FakeClient.instances.append(self)
+
+    @property
+    def admin(self):
+        return self
+
+    def command(self, name):
+        if FakeClient.error and not self.options.get("tlsInsecure"):
+            raise ServerSelectionTimeoutError(FakeClient.error)
+        return {"ok": 1}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeClient.instances, FakeClient.error = [], None
+    monkeypatch.setattr(connection, "MongoClient", FakeClient)
+    monkeypatch.setenv("MONGODB_URI", "mongodb+srv://cluster.example.net")
+    connection.close_client()
+    yield FakeClient
+    connection.close_client()
+
+
+def test_one_client_per_process(fake_client):
+    client = connection.get_client(pool_size=7)
+
+    assert connection.get_client() is client
+    assert len(fake_client.instances) == 1
+    assert client.options["maxPoolSize"] == 7
+    assert client.options["event_listeners"] == [connection.POOL_METRICS]
+
+
+def test_tls_failure_falls_back_to_insecure(fake_client):
+    fake_client.error = "SSL handshake failed: [SSL: CERTIFICATE_VERIFY_FAILED]"
+
+    client = connection.get_client()
+
+    first, second = fake_client.instances
+    assert first.closed and "tlsInsecure" not in first.options
+    assert client is second and second.options["tlsInsecure"] is True
+
+
+def test_other_failures_are_raised(fake_client):
+    fake_client.error = "cluster.example.net:27017: [Errno -2] Name or service not known"
+
+    with pytest.raises(ServerSelectionTimeoutError):
+        connection.get_client()
+    assert len(fake_client.instances) == 1
+    assert fake_client.instances[0].closed
+
+
+def test_pool_metrics_measure_checkout_wait():
+    metrics = PoolMetrics()
+
+    metrics.connection_created(None)
+    metrics.connection_check_out_started(None)
+    time.sleep(0.02)
+    metrics.connection_checked_out(None)
+    metrics.connection_check_out_started(None)
+    metrics.connection_checked_out(None)
+    metrics.connection_check_out_started(None)
+    metrics.connection_check_out_failed(None)
+
+    stats = metrics.snapshot()
+    assert stats["checkouts"] == 2 and stats["failures"] == 1
+    assert stats["max_wait_ms"] >= 20
+    assert stats["mean_wait_ms"] == pytest.approx(stats["wait_ms"] / 2, abs=1e-3)
+    assert stats["connections_open"] == 1
@@ -0,0 +1,121 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from src.features.feature_engineering import (
+    add_lag_features,
+    add_rolling_features,
+    add_change_rate_features,
+    build_features,
+)
+from src.features.online_features import OnlineFeatureEngine
+
+
+def make_frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2026-01-01", periods=n, freq="h"),
+        "pm2_5": rng.gamma(4.0, 20.0, n),
+        "aqi": rng.integers(1, 6, n).astype(float),
+        "temp": rng.normal(25, 5, n),
+        "wind_speed": rng.gamma(2.0, 1.5, n),
+        "humidity": rng.uniform(20, 90, n),
+    })
+    df.loc[rng.choice(n, 20, replace=False), "temp"] = np.nan
+    return df
+
+
+def test_online_matches_batch():
+    df = make_frame()
+    batch = add_change_rate_features(add_rolling_features(add_lag_features(df.copy())))
+
+    engine = OnlineFeatureEngine()
+    online = pd.DataFrame(engine.update_many(df.to_dict("records")))
+
+    for col in online.columns:
+        np.testing.assert_allclose(online[col], batch[col], rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+def test_checkpoint_resume(tmp_path):
+    df = make_frame(n=300, seed=1)
+    batch = add_change_rate_features(add_rolling_features(add_lag_features(df.copy())))
+
+    engine = OnlineFeatureEngine.from_history(df.iloc[:200])
+    path = tmp_path / "engine.pkl"
+    engine.save(path)
+
+    resumed = OnlineFeatureEngine.load(path)
+    online = pd.DataFrame(resumed.update_many(df.iloc[200:].to_dict("records")))
+    expected = batch.iloc[200:].reset_index(drop=True)
+
+    for col in online.columns:
+        np.testing.assert_allclose(online[col], expected[col], rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+def make_cities(n=300, seed=2):
+    """Two cities with dropped hours, a missed-run gap and a re-ingested hour"""
+    frames = []
+    for i, city in enumerate(["Karachi", "Lahore"]):
+        df = make_frame(n, seed + i).assign(
+            city=city, pm10=80.0, co=300.0, no2=20.0, o3=30.0, so2=5.0, nh3=2.0,
+            pressure=1008.0, clouds=40.0, wind_deg=90.0,
+        )
+        rng = np.random.default_rng(seed + 10 + i)
+        dropped = rng.choice(n, 30, replace=False)
+        df = df.drop(index=dropped).drop(index=range(150, 150 + 30 * (i + 1)), errors="ignore")
+        frames.append(df)
+
+    df = pd.concat(frames)
+    rerun = df.iloc[[100]].assign(timestamp=lambda d: d["timestamp"] + pd.Timedelta(minutes=30), pm2_5=1.0, aqi=5.0)
+    return pd.concat([df, rerun]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def test_online_matches_build_features_per_city_with_gaps():
+    df = make_cities()
+    batch = build_features(df.copy(), time_aware=True, targets=False)
+
+    engine = OnlineFeatureEngine()
+    online = pd.DataFrame(engine.update_many(df.to_dict("records")))
+    online["city"] = df["city"].to_numpy()
+    online["timestamp"] = df["timestamp"].dt.floor("h").to_numpy()
+    # A second reading of an hour supersedes the first, as on the grid
+    online = online.drop_duplicates(["city", "timestamp"], keep="last")
+
+    batch = batch.assign(timestamp=batch["timestamp"].dt.floor("h"))
+    merged = online.merge(batch, on=["city", "timestamp"], suffixes=("", "_batch"), validate="1:1")
+    assert len(merged) == len(batch)
+    for col in online.columns.drop(["city", "timestamp"]):
+        np.testing.assert_allclose(merged[col], merged[f"{col}_batch"], rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+def test_warm_start_per_city_matches_full_replay():
+    df = make_cities(seed=5)
+    cut = df["timestamp"].iloc[len(df) * 2 // 3]
+    history, live = df[df["timestamp"] < cut], df[df["timestamp"] >= cut]
+
+    replayed = OnlineFeatureEngine()
+    replayed.update_many(history.to_dict("records"))
+    expected = pd.DataFrame(replayed.update_many(live.to_dict("records")))
+
+    warmed = OnlineFeatureEngine.from_history(history)
+    online = pd.DataFrame(warmed.update_many(live.to_dict("records")))
+
+    for col in online.columns:
+        np.testing.assert_allclose(online[col], expected[col], rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_online_matches_batch()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_checkpoint_resume(Path(tmp))
+    test_online_matches_build_features_per_city_with_gaps()
+    test_warm_start_per_city_matches_full_replay()
+    print("✅ Online features match batch features")
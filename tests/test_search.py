@@ -0,0 +1,83 @@
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mlflow")
+
+from src.training import search
+from src.training.search import search_models, successive_halving, SEARCH_SPACES
+from src.training.train_multi_day import get_models
+
+
+def make_data(n=900, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 6))
+    y = 10 * np.sin(X[:, 0]) + X[:, 1] ** 2 + rng.normal(0, 0.5, n)
+    return X, y
+
+
+def test_search_returns_valid_params_and_log():
+    X, y = make_data()
+    models = {k: v for k, v in get_models().items() if k in ("GradientBoosting", "Ridge")}
+
+    params, log = search_models(models, X, y, budget_seconds=60, n_candidates=6, max_estimators=60)
+
+    assert set(params) == {"GradientBoosting", "Ridge"}
+    assert set(params["Ridge"]) == {"alpha"}
+    assert params["GradientBoosting"]["n_estimators"] <= 60
+    for key in SEARCH_SPACES["GradientBoosting"]:
+        assert key in params["GradientBoosting"]
+
+    # Halving: fewer configs and more rows at every rung
+    rungs = sorted({r["rung"] for r in log if r["model_type"] == "GradientBoosting"})
+    counts = [sum(1 for r in log if r["model_type"] == "GradientBoosting" and r["rung"] == k) for k in rungs]
+    rows = [max(r["n_rows"] for r in log if r["model_type"] == "GradientBoosting" and r["rung"] == k) for k in rungs]
+    assert counts == sorted(counts, reverse=True) and counts[0] > counts[-1]
+    assert rows == sorted(rows)
+
+    # Tuned params plug straight into get_models()
+    tuned = get_models(params)
+    assert tuned["Ridge"].alpha == params["Ridge"]["alpha"]
+
+
+def test_search_respects_budget():
+    X, y = make_data(n=3000)
+    start = time.monotonic()
+    search_models({"RandomForest": get_models()["RandomForest"]}, X, y, budget_seconds=1.0)
+    # At most one small first-rung fit can overrun the deadline
+    assert time.monotonic() - start < 2.0
+
+
+def test_budget_cut_keeps_structure_but_not_tree_count(monkeypatch):
+    X, y = make_data(n=600)
+    # The clock passes the deadline right after the three rung-0 fits
+    ticks = iter([0.0] * 3 + [10.0] * 100)
+    monkeypatch.setattr(search, "time", type("Clock", (), {
+        "monotonic": staticmethod(lambda: next(ticks)), "perf_counter": staticmethod(time.perf_counter),
+    }))
+
+    params, log = successive_halving("GradientBoosting", get_models()["GradientBoosting"],
+                                     X[:480], y[:480], X[480:], y[480:],
+                                     n_candidates=3, max_estimators=60, deadline=5.0)
+
+    assert {r["rung"] for r in log} == {0}
+    assert set(params) == set(SEARCH_SPACES["GradientBoosting"])
+
+
+def test_search_never_validates_on_the_holdout(monkeypatch):
+    X, y = make_data(n=1000)
+    seen = []
+    monkeypatch.setattr(search, "successive_halving",
+                        lambda name, est, Xt, yt, Xv, yv, **kw: seen.append((len(Xt), len(Xv))) or ({}, []))
+
+    search_models({"Ridge": get_models()["Ridge"]}, X, y, holdout_size=0.2, val_size=0.2)
+
+    # 800 training rows (the last 200 are the holdout), 160 of them for validation
+    assert seen == [(640, 160)]
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features, gap_statistics, to_hourly_grid
+
+
+def test_complete_grid_matches_row_based_features():
+    df = clean_data(generate_raw_data(n_cities=1, days=10))
+
+    row_based = build_features(df.copy(), time_aware=False)
+    time_aware = build_features(df.copy(), time_aware=True)
+
+    pd.testing.assert_frame_equal(time_aware[row_based.columns], row_based, check_dtype=False)
+
+
+def test_gaps_use_timestamp_offsets():
+    df = clean_data(generate_raw_data(n_cities=2, days=10))
+    gapped = df.drop(df.sample(frac=0.1, random_state=0).index).reset_index(drop=True)
+
+    features = build_features(gapped.copy())
+    assert len(features) == len(gapped)
+
+    # Each lag must equal the reading exactly 24h earlier, or NaN if that hour is missing
+    lookup = gapped.set_index(["city", "timestamp"])["pm2_5"]
+    keys = pd.MultiIndex.from_arrays([features["city"], features["timestamp"] - pd.Timedelta(hours=24)])
+    expected = lookup.reindex(keys).to_numpy()
+    np.testing.assert_array_equal(features["pm2_5_lag24"].to_numpy(), expected)
+
+    keys = pd.MultiIndex.from_arrays([features["city"], features["timestamp"] + pd.Timedelta(hours=48)])
+    np.testing.assert_array_equal(features["target_t2"].to_numpy(), lookup.reindex(keys).to_numpy())
+
+
+def test_gap_statistics():
+    df = clean_data(generate_raw_data(n_cities=1, days=2))
+    df = df.drop(index=[5, 6, 7, 20]).reset_index(drop=True)
+
+    stats = gap_statistics(df).iloc[0]
+    assert stats["expected_rows"] == 48
+    assert stats["missing_rows"] == 4
+    assert stats["n_gaps"] == 2
+    assert stats["longest_gap"] == 3
+
+    grid = to_hourly_grid(df)
+    assert len(grid) == 48
+    assert (~grid["_observed"]).sum() == 4
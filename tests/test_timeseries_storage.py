@@ -0,0 +1,159 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from src.storage import timeseries
+from src.storage.timeseries import (
+    ensure_timeseries,
+    forecast_rows,
+    observation_row,
+    rollup_daily,
+    write_forecasts,
+)
+from src.storage.migrate import migrate
+from app.queries import fetch_forecast_series, fetch_stored_history
+
+
+def forecast(city, issued, pm25):
+    return {
+        "city": city,
+        "timestamp": issued,
+        "observation_time": issued - timedelta(minutes=5),
+        "forecasts": {
+            h: {"pm25_prediction": pm25 + i, "aqi": 80 + i, "aqi_category_label": "Moderate"}
+            for i, h in enumerate(["t_plus_1", "t_plus_2", "t_plus_3"])
+        },
+        "model_versions": {"t_plus_1": "7", "t_plus_2": "3", "t_plus_3": "3"},
+    }
+
+
+@pytest.fixture
+def db():
+    # mongomock cannot create time-series collections; the writers use plain ones
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient().db
+
+
+def test_forecast_rows_flatten_one_row_per_horizon():
+    rows = forecast_rows(forecast("Lahore", datetime(2026, 1, 1, 10), 40.0))
+
+    assert [r["meta"] for r in rows] == [{"city": "Lahore", "horizon": h}
+                                         for h in ["t_plus_1", "t_plus_2", "t_plus_3"]]
+    assert [r["pm25_prediction"] for r in rows] == [40.0, 41.0, 42.0]
+    assert [r["model_version"] for r in rows] == ["7", "3", "3"]
+    assert all(r["timestamp"] == datetime(2026, 1, 1, 10) for r in rows)
+
+
+def test_observation_row_defaults_city_and_skips_missing_fields():
+    row = observation_row({"timestamp": datetime(2026, 1, 1), "pm2_5": 12.0, "pm10": None, "_id": 1})
+
+    assert row == {"timestamp": datetime(2026, 1, 1), "meta": {"city": "Karachi"}, "pm2_5": 12.0}
+
+
+def test_rollup_counts_each_hour_once_and_is_rerunnable(db):
+    day = datetime(2026, 1, 1)
+    docs = [forecast("Karachi", day + timedelta(hours=h), float(h)) for h in range(24)]
+    write_forecasts(db, docs)
+    write_forecasts(db, docs[:3])  # a rerun duplicates three hours
+
+    window = (day, day + timedelta(days=1))
+    assert rollup_daily(db.forecasts_ts, db.forecasts_daily, ["pm25_prediction"], *window) == 3
+    assert rollup_daily(db.forecasts_ts, db.forecasts_daily, ["pm25_prediction"], *window) == 3
+
+    assert db.forecasts_daily.count_documents({}) == 3
+    t1 = db.forecasts_daily.find_one({"horizon": "t_plus_1"})
+    assert t1["count"] == 24
+    assert t1["pm25_prediction"] == {"min": 0.0, "mean": 11.5, "max": 23.0}
+    assert t1["day"] == day
+
+
+def test_ensure_timeseries_only_runs_collmod_when_the_ttl_differs():
+    class Db:
+        def __init__(self):
+            self.options, self.commands = {}, []
+
+        def list_collections(self, filter):
+            name = filter["name"]
+            return [{"name": name, "options": self.options[name]}] if name in self.options else []
+
+        def create_collection(self, name, **options):
+            self.options[name] = options
+
+        def command(self, cmd):
+            self.commands.append(cmd)
+            self.options[cmd["collMod"]]["expireAfterSeconds"] = cmd["expireAfterSeconds"]
+
+        def __getitem__(self, name):
+            return name
+
+    db = Db()
+    ensure_timeseries(db, "forecasts_ts", ttl_days=30)
+    ensure_timeseries(db, "forecasts_ts", ttl_days=30)
+    assert db.options["forecasts_ts"]["timeseries"]["metaField"] == "meta"
+    assert db.options["forecasts_ts"]["expireAfterSeconds"] == 30 * 86400
+    assert db.commands == []
+
+    ensure_timeseries(db, "forecasts_ts", ttl_days=60)
+    ensure_timeseries(db, "forecasts_ts", ttl_days=60)
+    assert db.commands == [{"collMod": "forecasts_ts", "expireAfterSeconds": 60 * 86400}]
+
+
+def test_rollup_keeps_the_latest_insert_of_a_reingested_hour():
+    pipeline = timeseries.rollup_pipeline(["pm25_prediction"], datetime(2026, 1, 1), datetime(2026, 1, 2))
+    stages = [next(iter(stage)) for stage in pipeline]
+
+    assert stages[:3] == ["$match", "$sort", "$group"]
+    assert pipeline[1]["$sort"] == {"timestamp": 1, "_id": 1}
+
+
+def test_migration_resumes_from_checkpoint(db):
+    start = datetime(2026, 1, 1)
+    db.predictions.insert_many([forecast("Karachi", start + timedelta(hours=h), 10.0) for h in range(5)])
+
+    stats = migrate(db, db.predictions, db.aqi_features, only="forecasts", batch_size=2)["forecasts"]
+    assert (stats["documents"], stats["rows"]) == (5, 15)
+    assert stats["rollups"] == 3
+    assert db.migrations.find_one({"_id": "forecasts"})["documents"] == 5
+
+    # New legacy documents only: the checkpoint skips everything already copied
+    db.predictions.insert_one(forecast("Karachi", start + timedelta(hours=5), 10.0))
+    stats = migrate(db, db.predictions, db.aqi_features, only="forecasts", rollup=False)["forecasts"]
+    assert (stats["documents"], stats["rows"]) == (1, 3)
+    assert db.forecasts_ts.count_documents({}) == 18
+
+
+def test_dashboard_reads_forecast_runs_from_time_series_rows(db):
+    start = datetime(2026, 1, 1)
+    write_forecasts(db, [forecast(city, start + timedelta(hours=h), float(h))
+                         for h in range(60) for city in ("Karachi", "Lahore")])
+
+    df = fetch_forecast_series(db.forecasts_ts, "Karachi", limit=48)
+
+    assert list(df.columns) == ["timestamp", "t1_pm25", "t1_label", "t2_pm25", "t2_label", "t3_pm25", "t3_label"]
+    assert len(df) == 48 and df["timestamp"].is_monotonic_increasing
+    assert df.iloc[-1][["t1_pm25", "t3_pm25"]].tolist() == [59.0, 61.0]
+
+
+def test_history_uses_raw_rows_for_short_ranges_and_rollups_beyond(db):
+    start = datetime(2026, 1, 1)
+    docs = [forecast(city, start + timedelta(hours=h), float(h % 24))
+            for h in range(10 * 24) for city in ("Karachi", "Lahore")]
+    write_forecasts(db, docs)
+    rollup_daily(db.forecasts_ts, db.forecasts_daily, ["pm25_prediction"], start, start + timedelta(days=10))
+    db.forecasts_ts.delete_many({"timestamp": {"$lt": start + timedelta(days=8)}})  # expired by the TTL
+
+    hourly, unit = fetch_stored_history(db.forecasts_ts, db.forecasts_daily, "pm25_prediction",
+                                        start + timedelta(days=8), start + timedelta(days=10),
+                                        "Karachi", "t_plus_1", max_points=100)
+    assert unit == "hour" and len(hourly) == 48 and (hourly["count"] == 1).all()
+
+    daily, unit = fetch_stored_history(db.forecasts_ts, db.forecasts_daily, "pm25_prediction",
+                                       start, start + timedelta(days=10), "Karachi", "t_plus_1", max_points=100)
+    assert unit == "day" and len(daily) == 10
+    assert daily.iloc[0][["min", "mean", "max", "count"]].tolist() == [0.0, 11.5, 23.0, 24]
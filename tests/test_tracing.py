@@ -0,0 +1,104 @@
+import sys
+import json
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+import requests
+
+from src.utils import tracing
+
+
+class Ok(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_TRACER", None)
+    yield tracing.enable(path=str(tmp_path / "trace.jsonl"), run_name="test")
+    monkeypatch.setattr(tracing, "_TRACER", None)
+
+
+def test_disabled_spans_are_shared_noops(monkeypatch):
+    monkeypatch.setattr(tracing, "_TRACER", None)
+
+    with tracing.span("load") as s:
+        s.rows = 10
+    assert s is tracing._NOOP
+    assert tracing.records() == []
+
+    @tracing.traced("clean")
+    def clean(x):
+        return x * 2
+    assert clean(3) == 6
+
+
+def test_nested_spans_record_resources_and_rows(tracer):
+    @tracing.traced("features")
+    def build(n):
+        import numpy as np
+        return np.ones((n, 4))
+
+    with tracing.span("train", horizon="t_plus_1") as s:
+        build(1000)
+        s.rows = 42
+
+    features, train = tracing.records()
+    assert features["span"] == "features" and features["parent"] == "train"
+    assert features["rows"] == 1000
+    assert train["rows"] == 42 and train["horizon"] == "t_plus_1"
+    assert train["wall_s"] >= features["wall_s"] >= 0
+    for key in ("cpu_s", "peak_rss_delta_mb", "mongo_calls", "http_calls"):
+        assert key in train
+
+    lines = [json.loads(l) for l in Path(tracer.path).read_text().splitlines()]
+    assert [l["span"] for l in lines] == ["features", "train"]
+
+
+def test_failed_span_is_recorded(tracer):
+    with pytest.raises(ValueError):
+        with tracing.span("write"):
+            raise ValueError("boom")
+    assert "boom" in tracing.records()[-1]["error"]
+
+
+def test_http_round_trips_counted(tracer):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Ok)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        with tracing.span("fetch"):
+            with requests.Session() as session:
+                for _ in range(3):
+                    session.get(url, timeout=5)
+    finally:
+        server.shutdown()
+
+    assert tracing.records()[-1]["http_calls"] == 3
+
+
+def test_mongo_listener_counts_commands(tracer):
+    from pymongo import monitoring
+
+    class Event:
+        duration_micros = 1500
+
+    listener = next(l for l in monitoring._LISTENERS.command_listeners if type(l).__name__ == "_CommandCounter")
+    with tracing.span("load"):
+        listener.succeeded(Event())
+        listener.failed(Event())
+
+    record = tracing.records()[-1]
+    assert record["mongo_calls"] == 2 and record["mongo_ms"] == pytest.approx(3.0)
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mlflow")
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error
+
+from benchmarks.synthetic import generate_raw_data
+from src.preprocessing.preprocess import clean_data
+from src.features.feature_engineering import build_features, FEATURE_COLUMNS, TARGET_COLUMNS
+from src.training.scheduler import fit_grid
+from src.training.train_multi_day import get_models
+
+
+def test_parallel_grid_matches_sequential_fit():
+    df = build_features(clean_data(generate_raw_data(days=20))).dropna()
+    X = df[FEATURE_COLUMNS]
+    targets = {h: df[col] for h, col in TARGET_COLUMNS.items()}
+
+    results = fit_grid(X, targets, model_names=["Ridge"], max_workers=2)
+    assert [(r["horizon"], r["model_type"]) for r in results] == [(h, "Ridge") for h in TARGET_COLUMNS]
+
+    for r in results:
+        X_train, X_test, y_train, y_test = train_test_split(X, targets[r["horizon"]], test_size=0.2, shuffle=False)
+        preds = get_models()["Ridge"].fit(X_train, y_train).predict(X_test)
+        assert r["rmse"] == pytest.approx(np.sqrt(mean_squared_error(y_test, preds)))
+        assert r["model"].predict(X_test.to_numpy()[:1]).shape == (1,)
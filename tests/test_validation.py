@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running this test as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessing.preprocess import clean_data
+from src.preprocessing.validation import validate, rejection_counts, rejected_records, write_quarantine
+
+
+def make_frame():
+    return pd.DataFrame({
+        "_id": [f"id{i}" for i in range(7)],
+        "city": ["Karachi"] * 7,
+        "timestamp": pd.date_range("2025-01-01", periods=7, freq="h").astype(object),
+        "pm2_5": [10.0, 0.0, 600.0, np.nan, 20.0, 30.0, 40.0],
+        "aqi": [2.0, 2.0, 2.0, 2.0, 0.0, 3.0, 3.0],
+        "pm10": [20.0, 20.0, 20.0, 20.0, 20.0, 2000.0, -5.0],
+    })
+
+
+def test_rules_evaluated_in_one_mask():
+    valid, failures = validate(make_frame())
+
+    assert valid.tolist() == [True, False, False, False, False, False, True]
+    counts = rejection_counts(failures)
+    assert counts["pm2_5_not_positive"] == 1
+    assert counts["pm2_5_outlier"] == 1
+    assert counts["pm2_5_missing"] == 1
+    assert counts["aqi_not_positive"] == 1
+    assert counts["pm10_outlier"] == 1
+
+
+def test_missing_pm10_is_filled_not_rejected():
+    df = make_frame()
+    df.loc[0, "pm10"] = np.nan
+    cleaned = clean_data(df)
+    assert cleaned.loc[cleaned["_id"] == "id0", "pm10"].item() == 0.0
+
+
+def test_optional_rule_skipped_when_column_missing():
+    _, failures = validate(make_frame().drop(columns="pm10"))
+    assert "pm10_outlier" not in failures
+
+
+def test_rejected_records_carry_reasons():
+    df = make_frame()
+    valid, failures = validate(df)
+    records = rejected_records(df, valid, failures)
+
+    by_id = {r["_id"]: r for r in records}
+    assert set(by_id) == {"id1", "id2", "id3", "id4", "id5"}
+    assert by_id["id3"]["reasons"] == ["pm2_5_missing"]
+    assert by_id["id2"]["reasons"] == ["pm2_5_outlier"]
+    assert by_id["id3"]["pm2_5"] is None
+
+
+def test_quarantine_write_is_idempotent():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.quarantine
+    df = make_frame()
+    records = rejected_records(df, *validate(df))
+
+    write_quarantine(coll, records, batch_size=2)
+    write_quarantine(coll, records, batch_size=2)
+
+    assert coll.count_documents({}) == 5
+    assert coll.find_one({"source_id": "id5"})["reasons"] == ["pm10_outlier"]
+
+
+def test_clean_data_filters_once_and_reports(capsys):
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.quarantine
+    df = make_frame()
+    df = pd.concat([df, df.iloc[[0]]], ignore_index=True)  # duplicate hour
+
+    cleaned = clean_data(df, quarantine=coll)
+    out = capsys.readouterr().out
+
+    assert cleaned["_id"].tolist() == ["id0", "id6"]
+    assert cleaned["pm10"].tolist() == [20.0, 0.0]  # negatives clipped
+    assert "removed 5 invalid, 1 duplicates" in out
+    assert "pm2_5_outlier: 1" in out
+    assert coll.count_documents({}) == 5